@@ -7,23 +7,133 @@ academic structure, saving students/researchers 10+ hours of work.
 
 import os
 import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 import json
 
 # Import utilities
 from utils.ai_generator import AIGenerator
+from utils.artifacts import (
+    ArtifactStore, atomic_open, atomic_path, collect_garbage, finish_request, new_request_id,
+    request_directory, write_json
+)
+from utils.clients import configure as configure_clients
+from utils.dedup import DEFAULT_THRESHOLD, ENHANCEMENT_SECTIONS, SECTION_INPUTS, DedupIndex
+from utils.jobs import (
+    DEFAULT_LEASE_SECONDS, JobCheckpoints, JobStore, LeaseHeartbeat, LeaseLost, worker_name
+)
+from utils.literature_cache import LiteratureCache
 from utils.pdf_builder import PDFBuilder
-from utils.templates import get_template
+from utils.pdf_optimizer import optimize_pdf
+from utils.references import load_references
+from utils.speculation import Speculation
+from utils.templates import get_length_policy, get_template
 from utils.timeline import create_timeline
+from utils.usage import render_metrics, summarize_usage
+from utils.validation import (
+    REQUIRED_FIELDS, parse_budget, parse_flag, parse_positive, parse_workers, validate_record,
+    validate_records, write_error_report
+)
+
+
+# Seconds a worker waits before polling the job queue again
+POLL_SECONDS = 1.0
+
+# Dedup indexes and literature caches loaded in this process, shared by worker threads
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
 
 
 def setup_output_directory() -> Path:
-    """Create and return output directory."""
+    """
+    Create and return output directory. With request_id or isolate_output
+    set, each run writes to its own output/requests/<id> so parallel runs
+    on one host do not overwrite each other.
+    """
     output_dir = Path('output')
     output_dir.mkdir(exist_ok=True)
+
+    request_id = os.environ.get('request_id', '').strip()
+    if not request_id and parse_flag(os.environ.get('isolate_output', '')):
+        request_id = new_request_id()
+    if request_id:
+        return request_directory(output_dir, request_id)
     return output_dir
 
 
+def get_storage_settings() -> dict:
+    """Artifact store and retention settings from environment variables."""
+    retention_days = os.environ.get('retention_days', '').strip()
+    retention_max_mb = os.environ.get('retention_max_mb', '').strip()
+    return {
+        # Hard-link identical artifacts to one copy under output/objects
+        'artifact_store': parse_flag(os.environ.get('artifact_store', '')),
+        'retention_days': parse_positive(retention_days, 'retention_days') if retention_days else None,
+        'retention_bytes': (
+            int(parse_positive(retention_max_mb, 'retention_max_mb') * 1024 * 1024)
+            if retention_max_mb else None
+        ),
+    }
+
+
+def get_client_settings() -> dict:
+    """AI client pool size and per-request timeout from environment variables."""
+    pool_size = os.environ.get('ai_pool_size', '').strip()
+    timeout = os.environ.get('ai_timeout', '').strip()
+    return {
+        'pool_size': int(parse_positive(pool_size, 'ai_pool_size')) if pool_size else None,
+        'timeout': parse_positive(timeout, 'ai_timeout') if timeout else None,
+    }
+
+
+def finalize_output(output_dir: Path, settings: dict) -> None:
+    """
+    Store a finished request's artifacts and apply retention to old
+    requests; the request just finished is never removed.
+    """
+    output_root = Path('output')
+    finish_request(output_dir)
+    if settings['artifact_store'] and output_dir != output_root:
+        manifest = ArtifactStore(output_root).put_directory(output_dir)
+        print(f"🗄️  Stored {len(manifest)} artifacts")
+    if settings['retention_days'] is not None or settings['retention_bytes'] is not None:
+        result = collect_garbage(
+            output_root, settings['retention_days'], settings['retention_bytes'],
+            keep={output_dir.name} if output_dir != output_root else ()
+        )
+        if result['requests_removed']:
+            print(f"🧹 Removed {len(result['requests_removed'])} expired request outputs")
+        if result['over_budget']:
+            print(f"⚠️  Output is {result['bytes'] / 1024 / 1024:.1f} MB, over retention_max_mb; "
+                  f"the remaining requests are current, pending or recent")
+
+
+def shared_store(store_class, path: Path, *options):
+    """
+    The DedupIndex or LiteratureCache at path, loaded once per process so
+    concurrent jobs update one instance instead of overwriting each other's saves.
+    """
+    key = (store_class, str(Path(path).resolve())) + options
+    with _shared_stores_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = store_class.load(Path(path), *options)
+        return _shared_stores[key]
+
+
+def get_reference_dirs(input_dir: Path = None) -> list:
+    """
+    Directories reference files may be read from: the batch input file's
+    directory, then references_dir from the environment.
+    """
+    directories = [str(input_dir)] if input_dir is not None else []
+    references_dir = os.environ.get('references_dir', '').strip()
+    if references_dir:
+        directories.append(references_dir)
+    return directories
+
+
 def get_inputs() -> dict:
     """Get inputs from environment variables."""
     return {
@@ -36,37 +146,35 @@ def get_inputs() -> dict:
         # Optional fields
         'researcher_name': os.environ.get('researcher_name', 'Anonymous Researcher'),
         'field_of_study': os.environ.get('field_of_study', 'Sciences'),
-        'duration_months': int(os.environ.get('duration_months', '12')),
+        'duration_months': os.environ.get('duration_months', '12'),
 
         # Fixed defaults (not exposed to user)
         'institution': '',
         'budget': '',
         'proposal_type': 'Research Project',
         'references': '',
+        'reference_dirs': get_reference_dirs(),  # Where reference files may be read from
         'ai_provider': 'openai',  # Fixed to OpenAI
-        'citation_format': 'APA',
+        'citation_format': '',  # Empty uses the field's citation style
+        'optimize_pdf': os.environ.get('optimize_pdf', '').lower() in ('1', 'true', 'yes'),
+        'deterministic': os.environ.get('deterministic', '').lower() in ('1', 'true', 'yes'),
+        'dedup_index': os.environ.get('dedup_index', ''),  # Directory; empty disables reuse
+        'dedup_threshold': os.environ.get('dedup_threshold', str(DEFAULT_THRESHOLD)),
+        'literature_cache': os.environ.get('literature_cache', ''),  # JSON file; empty disables
+        'job_store': os.environ.get('job_store', ''),  # SQLite file; empty runs in-process
+        'workers': os.environ.get('workers', '1'),
+        # Start sections on raw inputs while they are enhanced
+        'speculative': os.environ.get('speculative', '').lower() in ('1', 'true', 'yes'),
+        'speculation_threshold': os.environ.get('speculation_threshold', str(DEFAULT_THRESHOLD)),
     }
 
 
-def validate_inputs(inputs: dict) -> None:
-    """Validate required inputs."""
-    required = [
-        'research_title',
-        'research_question',
-        'methodology',
-        'expected_outcomes'
-    ]
-
-    for field in required:
-        if not inputs.get(field):
-            raise ValueError(
-                f"Required field '{field}' is missing. "
-                f"Please provide all required information."
-            )
-
-    # Validate duration
-    if inputs['duration_months'] < 1 or inputs['duration_months'] > 60:
-        raise ValueError("Duration must be between 1 and 60 months")
+def validate_inputs(inputs: dict) -> dict:
+    """Validate inputs, reporting every problem at once; returns them normalised."""
+    normalized, errors = validate_record(inputs)
+    if errors:
+        raise ValueError(' '.join(error['message'] + '.' for error in errors))
+    return normalized
 
 
 def get_api_key(provider: str) -> str:
@@ -78,21 +186,145 @@ def get_api_key(provider: str) -> str:
     return ''
 
 
-def process_proposal(inputs: dict, output_dir: Path) -> dict:
-    """Main processing logic to generate research proposal."""
+def get_generation_time(deterministic: bool = False) -> datetime:
+    """
+    Time the proposal is generated at; SOURCE_DATE_EPOCH pins it for
+    reproducible builds. Deterministic mode requires it, since the time is
+    part of the hashed output.
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH', '').strip()
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None)
+    if deterministic:
+        raise ValueError("Deterministic mode needs SOURCE_DATE_EPOCH (seconds since 1970) to be set")
+    return datetime.now()
+
+
+def generate_section(generator: AIGenerator, name: str, inputs: dict):
+    """Generate one AI section (a key of SECTION_INPUTS) from inputs."""
+    if name == 'executive_summary':
+        return generator.generate_executive_summary(
+            title=inputs['research_title'],
+            question=inputs['research_question'],
+            methodology=inputs['methodology'],
+            outcomes=inputs['expected_outcomes'],
+            field=inputs['field_of_study'],
+            proposal_type=inputs['proposal_type']
+        )
+    if name == 'literature_review':
+        return generator.generate_literature_review(
+            field=inputs['field_of_study'],
+            topic=inputs['research_title'],
+            question=inputs['research_question']
+        )
+    if name == 'methodology':
+        return generator.expand_methodology(
+            methodology=inputs['methodology'],
+            field=inputs['field_of_study'],
+            research_type=inputs['proposal_type']
+        )
+    return generator.generate_objectives(
+        question=inputs['research_question'],
+        field=inputs['field_of_study']
+    )
+
+
+def process_proposal(
+    inputs: dict,
+    output_dir: Path,
+    now: datetime = None,
+    dedup: DedupIndex = None,
+    literature_cache: LiteratureCache = None,
+    checkpoints: JobCheckpoints = None
+) -> dict:
+    """
+    Main processing logic to generate research proposal.
+    With checkpoints (a leased job), each completed stage is saved and a
+    retried job resumes after its last completed stage.
+    """
     print("🚀 Generating research proposal...")
 
+    # Every date in the proposal derives from one injected "now"
+    now = now or get_generation_time(inputs.get('deterministic', False))
+
+    # Read a reference file up front so a rejected path fails before any AI call
+    references = load_references(inputs.get('references', ''), inputs.get('reference_dirs') or ())
+
+    def stage(name, compute):
+        """
+        Run a stage, or load its result if a previous attempt completed it.
+        Sections reused from a duplicate request are not computed either.
+        """
+        saved = checkpoints.get(name) if checkpoints is not None else None
+        if saved is not None:
+            print(f"⏩ Resuming after completed stage: {name}")
+            return saved
+        value = reused[name] if name in reused else compute()
+        if checkpoints is not None:
+            checkpoints.save(name, value)
+        return value
+
+    def section(name):
+        """Generate a section, keeping its speculative version if its inputs barely changed."""
+        kept = speculation.take(name, inputs) if speculation is not None else None
+        return kept if kept is not None else generate_section(ai_generator, name, inputs)
+
     # Check if AI is available
     api_key = get_api_key(inputs['ai_provider'])
 
+    if literature_cache is None and inputs.get('literature_cache') and api_key:
+        literature_cache = shared_store(LiteratureCache, inputs['literature_cache'])
+
     # Initialize AI generator
     ai_generator = AIGenerator(
         provider=inputs['ai_provider'],
-        api_key=api_key
+        api_key=api_key,
+        literature_cache=literature_cache
     )
 
+    # Section lengths follow the proposal type and its emphasis areas
+    length_policy = get_length_policy(get_template(inputs['field_of_study'], inputs['proposal_type']))
+    ai_generator.set_length_policy(length_policy)
+
+    # Reuse enhanced inputs and sections of an earlier, near-identical request
+    if dedup is None and inputs.get('dedup_index') and ai_generator.client:
+        dedup = shared_store(DedupIndex, inputs['dedup_index'], inputs['dedup_threshold'])
+    match = dedup.lookup(inputs) if dedup and ai_generator.client else None
+    reused = match['sections'] if match else {}
+    if match:
+        print(f"♻️  Matches an earlier request ({match['similarity']:.0%} similar); "
+              f"reusing {len(match['enhanced'])} inputs and {len(reused)} sections")
+
+    # Speculatively generate sections from the raw inputs while they are enhanced
+    speculation = None
+    completed = checkpoints.completed if checkpoints is not None else {}
+    if inputs.get('speculative') and ai_generator.client and 'enhancement' not in completed:
+        speculation = Speculation(inputs, inputs['speculation_threshold'])
+        speculative_generator = AIGenerator(provider=inputs['ai_provider'], api_key=api_key)
+        speculative_generator.set_length_policy(length_policy)
+        speculative_generator.set_context(
+            title=inputs['research_title'],
+            question=inputs['research_question'],
+            methodology=inputs['methodology'],
+            outcomes=inputs['expected_outcomes'],
+            field=inputs['field_of_study'],
+            proposal_type=inputs['proposal_type']
+        )
+        raw_inputs = inputs
+        for name, fields in SECTION_INPUTS.items():
+            # Literature cache lookups are cheap enough to wait for
+            if name in reused or name in completed or (
+                    name == 'literature_review' and literature_cache is not None):
+                continue
+            speculation.start(
+                name, fields,
+                lambda name=name: generate_section(speculative_generator, name, raw_inputs)
+            )
+
     # LAYER 1: Enhance user input for better quality
-    enhanced_inputs = ai_generator.enhance_user_input(inputs)
+    enhanced_inputs = stage('enhancement', lambda: ai_generator.enhance_user_input(
+        inputs, reuse=match['enhanced'] if match else None
+    ))
 
     # Show what was enhanced (for debugging)
     if enhanced_inputs != inputs:
@@ -109,14 +341,11 @@ def process_proposal(inputs: dict, output_dir: Path) -> dict:
         print()
 
     # Use enhanced inputs for the rest of the process
+    original_inputs = inputs
     inputs = enhanced_inputs
 
-    # Get template for field of study
-    template = get_template(inputs['field_of_study'], inputs['proposal_type'])
-
-    # Generate AI-enhanced content
-    print("📝 Generating executive summary...")
-    executive_summary = ai_generator.generate_executive_summary(
+    # Proposal context the section prompts draw on
+    ai_generator.set_context(
         title=inputs['research_title'],
         question=inputs['research_question'],
         methodology=inputs['methodology'],
@@ -125,32 +354,61 @@ def process_proposal(inputs: dict, output_dir: Path) -> dict:
         proposal_type=inputs['proposal_type']
     )
 
+    # Get template for field of study
+    template = get_template(inputs['field_of_study'], inputs['proposal_type'])
+
+    # Generate AI-enhanced content
+    print("📝 Generating executive summary...")
+    executive_summary = stage('executive_summary', lambda: section('executive_summary'))
+
     print("📚 Creating literature review framework...")
-    literature_review = ai_generator.generate_literature_review(
-        field=inputs['field_of_study'],
-        topic=inputs['research_title'],
-        question=inputs['research_question']
-    )
+    literature_review = stage('literature_review', lambda: section('literature_review'))
 
     print("🔬 Expanding methodology section...")
-    expanded_methodology = ai_generator.expand_methodology(
-        methodology=inputs['methodology'],
-        field=inputs['field_of_study'],
-        research_type=inputs['proposal_type']
-    )
+    expanded_methodology = stage('methodology', lambda: section('methodology'))
 
     print("🎯 Generating research objectives...")
-    objectives = ai_generator.generate_objectives(
-        question=inputs['research_question'],
-        field=inputs['field_of_study']
-    )
+    objectives = stage('objectives', lambda: section('objectives'))
+
+    if speculation is not None:
+        speculation.close()
+        for record in speculative_generator.usage:
+            record['speculative'] = True
+        ai_generator.usage.extend(speculative_generator.usage)
+        report = speculation.stats()
+        print(f"🔮 Kept {len(report['kept'])} of {len(report['kept']) + len(report['reissued'])} "
+              f"speculative sections, saving {report['saved_seconds']:.1f}s")
+
+    if literature_cache is not None:
+        literature_cache.save()
+
+    if dedup is not None and ai_generator.client:
+        # Only real model output is offered for reuse, never template fallbacks
+        kept = set(speculation.stats()['kept']) if speculation is not None else set()
+        degraded = _degraded_sections(ai_generator.usage, kept)
+        sections = {
+            'executive_summary': executive_summary,
+            'literature_review': literature_review,
+            'methodology': expanded_methodology,
+            'objectives': objectives,
+        }
+        dedup.add(
+            original_inputs,
+            {
+                field: value for field, value in inputs.items()
+                if ENHANCEMENT_SECTIONS.get(field) not in degraded
+            },
+            {name: content for name, content in sections.items() if name not in degraded}
+        )
+        dedup.save()
 
     # Create timeline
     print("📅 Creating project timeline...")
-    timeline_data = create_timeline(
+    timeline_data = stage('timeline', lambda: create_timeline(
         duration_months=inputs['duration_months'],
-        proposal_type=inputs['proposal_type']
-    )
+        proposal_type=inputs['proposal_type'],
+        start_date=now
+    ))
 
     # Compile proposal data
     proposal_data = {
@@ -162,7 +420,8 @@ def process_proposal(inputs: dict, output_dir: Path) -> dict:
             'proposal_type': inputs['proposal_type'],
             'duration': inputs['duration_months'],
             'budget': inputs['budget'],
-            'citation_format': inputs['citation_format']
+            'citation_format': inputs['citation_format'] or template['formatting']['citation_style'],
+            'generated': now.isoformat(timespec='seconds')
         },
         'sections': {
             'executive_summary': executive_summary,
@@ -177,39 +436,258 @@ def process_proposal(inputs: dict, output_dir: Path) -> dict:
             'expected_outcomes': inputs['expected_outcomes'],
             'timeline': timeline_data,
             'budget_breakdown': _create_budget_breakdown(inputs['budget']) if inputs['budget'] else None,
-            'references': inputs.get('references', '')
+            'references': references
         },
         'template': template
     }
 
-    # Generate PDF
-    print("📄 Building professional PDF...")
-    pdf_builder = PDFBuilder(template)
+    # Generate PDF (rendered again if a checkpointed file has gone missing)
     pdf_path = output_dir / 'research_proposal.pdf'
-    pdf_builder.create_proposal(proposal_data, pdf_path)
+    rendered = checkpoints.get('render') if checkpoints is not None else None
+    if rendered is None or not pdf_path.exists():
+        print("📄 Building professional PDF...")
+        pdf_builder = PDFBuilder(template)
+        with atomic_path(pdf_path) as tmp_path:
+            pdf_builder.create_proposal(
+                proposal_data, tmp_path,
+                deterministic=inputs.get('deterministic', False)
+            )
+
+            # Optional web optimisation (object streams, linearisation)
+            pdf_report = None
+            if inputs.get('optimize_pdf'):
+                print("🗜️  Optimising PDF...")
+                pdf_report = optimize_pdf(tmp_path)
+
+        rendered = {
+            'pages': pdf_builder.page_count,
+            'content_hash': pdf_builder.content_hash,
+            'pdf_optimization': pdf_report,
+        }
+        if checkpoints is not None:
+            checkpoints.save('render', rendered)
 
     # Also save as JSON for reference
     json_path = output_dir / 'proposal_data.json'
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(proposal_data, f, indent=2)
+    write_json(json_path, proposal_data, indent=2)
+
+    # Export AI usage as Prometheus textfile metrics
+    if ai_generator.usage:
+        with atomic_open(output_dir / 'metrics.prom') as f:
+            f.write(render_metrics(ai_generator.usage))
 
     return {
         'status': 'success',
         'pdf_path': str(pdf_path),
         'json_path': str(json_path),
-        'pages': pdf_builder.page_count,
-        'sections': len(proposal_data['sections'])
+        'pages': rendered['pages'],
+        'content_hash': rendered['content_hash'],
+        'reused_sections': sorted(reused),
+        'resumed_stages': checkpoints.resumed if checkpoints is not None else [],
+        'speculation': speculation.stats() if speculation is not None else None,
+        'literature_cache': literature_cache.stats() if literature_cache is not None else None,
+        'pdf_optimization': rendered['pdf_optimization'],
+        'sections': len(proposal_data['sections']),
+        # Full call records, so batches can aggregate tokens and cost
+        'ai_calls': [dict(call) for call in ai_generator.usage],
+        'usage': summarize_usage(ai_generator.usage)
+    }
+
+
+def run_worker(job_store: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """
+    Lease and process jobs until the queue is drained, waiting while other
+    workers hold leases or retries back off. Returns the jobs completed.
+    """
+    store = JobStore(job_store)
+    worker = worker_name()
+    completed = 0
+
+    try:
+        while store.pending():
+            job = store.lease(worker, lease_seconds)
+            if job is None:
+                time.sleep(POLL_SECONDS)
+                continue
+
+            print(f"🧾 Job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+            output_dir = Path(job['output_dir'])
+            output_dir.mkdir(parents=True, exist_ok=True)
+            checkpoints = JobCheckpoints(store, job, worker, lease_seconds)
+            try:
+                # Keep the lease while stages run, not only at checkpoints
+                with LeaseHeartbeat(job_store, job['id'], worker, lease_seconds) as heartbeat:
+                    result = process_proposal(
+                        job['inputs'], output_dir,
+                        now=datetime.fromisoformat(job['generated']),
+                        checkpoints=checkpoints
+                    )
+                if heartbeat.lost:
+                    raise LeaseLost(f"Lease on job {job['id']} was lost")
+                store.complete(job['id'], worker, result)
+                completed += 1
+            except LeaseLost as e:
+                print(f"⚠️  {e}; another worker has taken it over")
+            except Exception as e:
+                retry = store.fail(job['id'], worker, str(e))
+                print(f"⚠️  Job {job['id']} failed: {e}"
+                      f"{' - will retry' if retry else ' - giving up'}")
+    finally:
+        store.close()
+
+    return completed
+
+
+def run_jobs(job_store: Path, workers: int = 1) -> dict:
+    """Drain the job queue with concurrent worker threads; returns queue statistics."""
+    threads = [
+        threading.Thread(target=run_worker, args=(job_store,), name=f'worker-{i}')
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = JobStore(job_store)
+    try:
+        stats = store.stats()
+    finally:
+        store.close()
+    print(f"📊 Jobs: {stats['done']} done, {stats['failed']} failed, "
+          f"{stats['retries']} retries, {stats['jobs_per_minute']:.1f} jobs/min")
+    return stats
+
+
+def process_batch(
+    records: list,
+    output_dir: Path,
+    now: datetime = None,
+    input_dir: Path = None
+) -> dict:
+    """
+    Validate a batch of input records in one pass and generate proposals for
+    the valid ones only, each in its own folder. Rejected records and
+    generation failures are written to validation_report.json. With a
+    job_store the valid records are queued and processed by workers.
+    Reference files are read only from input_dir (the batch file's
+    directory) and references_dir; storage, queue and worker settings
+    come from the environment, never from records. AI usage across the
+    batch goes into the report summary and metrics.prom.
+    """
+    defaults = {key: value for key, value in get_inputs().items() if key not in REQUIRED_FIELDS}
+    defaults['reference_dirs'] = get_reference_dirs(input_dir)
+    report = validate_records(records, defaults)
+    summary = report['summary']
+    print(f"🔎 Validated {summary['total']} records: "
+          f"{summary['valid']} valid, {summary['rejected']} rejected")
+
+    deterministic = any(entry['record'].get('deterministic') for entry in report['valid'])
+    now = now or get_generation_time(deterministic)
+    # Host settings are the same in every record (see HOST_FIELDS)
+    base = report['valid'][0]['record'] if report['valid'] else {}
+    results = []
+    failures = []
+
+    if base.get('job_store'):
+        store = JobStore(base['job_store'])
+        job_ids = {
+            entry['index']: store.enqueue(
+                entry['record'],
+                output_dir / f"proposal_{entry['index'] + 1:04d}",
+                now.isoformat(timespec='seconds')
+            )
+            for entry in report['valid']
+        }
+        summary['jobs'] = run_jobs(base['job_store'], base['workers'])
+        for index, job_id in job_ids.items():
+            job = store.job(job_id)
+            if job['status'] == 'done':
+                results.append(job['result'])
+            else:
+                failures.append((index, job['error'] or f"Job {job_id} is {job['status']}"))
+        store.close()
+    else:
+        dedup = None
+        if base.get('dedup_index'):
+            dedup = shared_store(DedupIndex, base['dedup_index'], base['dedup_threshold'])
+        literature_cache = None
+        if base.get('literature_cache'):
+            literature_cache = shared_store(LiteratureCache, base['literature_cache'])
+
+        for entry in report['valid']:
+            proposal_dir = output_dir / f"proposal_{entry['index'] + 1:04d}"
+            proposal_dir.mkdir(exist_ok=True)
+            try:
+                results.append(process_proposal(
+                    entry['record'], proposal_dir, now=now,
+                    dedup=dedup, literature_cache=literature_cache
+                ))
+            except Exception as e:
+                print(f"⚠️  Record {entry['index']} failed: {e}")
+                failures.append((entry['index'], str(e)))
+
+        if literature_cache is not None:
+            summary['literature_cache'] = literature_cache.stats()
+
+    for index, error in failures:
+        report['rejected'].append({
+            'index': index,
+            'record': records[index],
+            'errors': [{'field': None, 'code': 'generation_failed', 'message': error, 'value': None}],
+        })
+    report['rejected'].sort(key=lambda entry: entry['index'])
+    summary['generated'] = len(results)
+
+    # Usage across the batch, from every generated proposal's call records
+    calls = [call for result in results for call in result.get('ai_calls', [])]
+    if calls:
+        summary['usage'] = summarize_usage(calls)
+        with atomic_open(output_dir / 'metrics.prom') as f:
+            f.write(render_metrics(calls))
+
+    summary['rejected'] = len(report['rejected'])
+    write_error_report(report, output_dir / 'validation_report.json')
+
+    return {'status': 'success', 'summary': summary, 'results': results}
+
+
+def _process_as_job(inputs: dict, output_dir: Path) -> dict:
+    """Generate one proposal through the job queue so a crash can be resumed."""
+    generated = get_generation_time(inputs.get('deterministic', False))
+    store = JobStore(inputs['job_store'])
+    try:
+        job_id = store.enqueue(inputs, output_dir, generated.isoformat(timespec='seconds'))
+        run_jobs(inputs['job_store'], inputs['workers'])
+        job = store.job(job_id)
+    finally:
+        store.close()
+
+    if job['status'] != 'done':
+        raise RuntimeError(job['error'] or f"Job {job_id} is {job['status']}")
+    return job['result']
+
+
+def _degraded_sections(usage: list, speculative_kept: set = frozenset()) -> set:
+    """
+    Sections (usage section names) whose AI call failed or fell back to a
+    template. Speculative calls count only for the sections that were kept.
+    """
+    return {
+        record['section'] for record in usage
+        if record['fallback'] and (not record.get('speculative') or record['section'] in speculative_kept)
     }
 
 
 def _create_budget_breakdown(budget_str: str) -> dict:
     """Create structured budget breakdown."""
     try:
-        total_budget = float(budget_str.replace('$', '').replace(',', ''))
+        total_budget, currency = parse_budget(budget_str)
 
         # Standard research budget allocation
         return {
             'total': total_budget,
+            'currency': currency,
             'categories': [
                 {'name': 'Personnel', 'amount': total_budget * 0.40, 'percentage': 40},
                 {'name': 'Equipment', 'amount': total_budget * 0.25, 'percentage': 25},
@@ -218,13 +696,13 @@ def _create_budget_breakdown(budget_str: str) -> dict:
                 {'name': 'Other Costs', 'amount': total_budget * 0.10, 'percentage': 10},
             ]
         }
-    except:
+    except ValueError:
         return None
 
 
 def save_summary(result: dict, output_dir: Path) -> None:
     """Save execution summary."""
-    with open(output_dir / 'summary.txt', 'w', encoding='utf-8') as f:
+    with atomic_open(output_dir / 'summary.txt') as f:
         f.write("✅ Research Proposal Generated Successfully!\n\n")
         f.write("=" * 60 + "\n")
         f.write("PROPOSAL GENERATION SUMMARY\n")
@@ -233,6 +711,31 @@ def save_summary(result: dict, output_dir: Path) -> None:
         f.write(f"PDF Generated: {result['pdf_path']}\n")
         f.write(f"Total Pages: {result['pages']}\n")
         f.write(f"Sections Created: {result['sections']}\n\n")
+        if result.get('pdf_optimization'):
+            report = result['pdf_optimization']
+            f.write(f"PDF Size: {report['size_before'] / 1024:.1f} KB → "
+                    f"{report['size_after'] / 1024:.1f} KB "
+                    f"({report['seconds']:.2f}s"
+                    f"{', linearized' if report['linearized'] else ''})\n\n")
+        if result.get('ai_calls'):
+            f.write("AI Calls:\n")
+            for call in result['ai_calls']:
+                f.write(f"   {call['section']}: {call['model']} ({call['latency_s']:.2f}s)\n")
+            usage = result['usage']
+            f.write(f"Tokens: {usage['prompt_tokens']} in "
+                    f"({usage['cached_tokens']} cached), {usage['completion_tokens']} out\n")
+            f.write(f"Estimated Cost: ${usage['cost_usd']:.4f}\n")
+            f.write("\n")
+        if result.get('speculation'):
+            report = result['speculation']
+            f.write(f"Speculation: kept {', '.join(report['kept']) or 'none'}; "
+                    f"re-issued {', '.join(report['reissued']) or 'none'} "
+                    f"({report['hit_rate']:.0%} hit rate, {report['saved_seconds']:.1f}s saved)\n\n")
+        if result.get('literature_cache'):
+            cache = result['literature_cache']
+            f.write(f"Literature Cache: {cache['hits']}/{cache['lookups']} hits, "
+                    f"{cache['mean_lookup_ms']:.2f} ms lookup, {cache['entries']} entries "
+                    f"({cache['memory_bytes'] / 1024:.0f} KB)\n\n")
         f.write("Your professional research proposal is ready!\n")
         f.write("\n📄 Download the PDF from the output folder.\n")
         f.write("📊 Review the JSON file for structured data.\n")
@@ -240,7 +743,7 @@ def save_summary(result: dict, output_dir: Path) -> None:
 
 def save_error(error: Exception, output_dir: Path) -> None:
     """Save error information."""
-    with open(output_dir / 'error.txt', 'w', encoding='utf-8') as f:
+    with atomic_open(output_dir / 'error.txt') as f:
         f.write(f"❌ Error: {str(error)}\n\n")
         f.write("=" * 60 + "\n")
         f.write("TROUBLESHOOTING\n")
@@ -258,28 +761,58 @@ def save_error(error: Exception, output_dir: Path) -> None:
 
 def main():
     """Main execution function."""
+    output_dir = None
     try:
         # Setup
         output_dir = setup_output_directory()
+        storage = get_storage_settings()
+        configure_clients(**get_client_settings())
+
+        # Batch mode: a JSON list of input records
+        batch_file = os.environ.get('batch_file', '')
+        if batch_file:
+            with open(batch_file, encoding='utf-8') as f:
+                records = json.load(f)
+            batch = process_batch(records, output_dir, input_dir=Path(batch_file).resolve().parent)
+            print(f"\n✅ Generated {batch['summary']['generated']} of "
+                  f"{batch['summary']['total']} proposals; see validation_report.json")
+            if batch['summary'].get('usage'):
+                usage = batch['summary']['usage']
+                print(f"📊 {usage['calls']} AI calls, {usage['prompt_tokens']} tokens in "
+                      f"({usage['cached_tokens']} cached), {usage['completion_tokens']} out, "
+                      f"${usage['cost_usd']:.4f}")
+            finalize_output(output_dir, storage)
+            return 0
+
+        # Queue mode without new inputs: resume whatever jobs are left
+        job_store = os.environ.get('job_store', '')
+        if job_store and not os.environ.get('research_title'):
+            stats = run_jobs(job_store, parse_workers(os.environ.get('workers', '1')))
+            return 0 if not stats['failed'] else 1
 
         # Get and validate inputs
-        inputs = get_inputs()
-        validate_inputs(inputs)
+        inputs = validate_inputs(get_inputs())
 
         # Process
-        result = process_proposal(inputs, output_dir)
+        if job_store:
+            result = _process_as_job(inputs, output_dir)
+        else:
+            result = process_proposal(inputs, output_dir)
 
         # Save summary
         save_summary(result, output_dir)
+        finalize_output(output_dir, storage)
 
         print("\n✅ Processing complete!")
         print(f"📄 Your research proposal is ready: {result['pdf_path']}")
         return 0
 
     except Exception as e:
-        output_dir = Path('output')
-        output_dir.mkdir(exist_ok=True)
+        if output_dir is None:
+            output_dir = Path('output')
+            output_dir.mkdir(exist_ok=True)
         save_error(e, output_dir)
+        finish_request(output_dir)
 
         print(f"\n❌ Error: {e}")
         return 1
@@ -0,0 +1,11 @@
+"""
+Test Configuration
+
+Makes the repository root importable so tests can use run and utils.
+"""
+
+import sys
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,82 @@
+"""
+Batch Tests
+
+Runs process_batch with proposal generation replaced, to check what the
+batch report collects.
+"""
+
+import json
+
+import pytest
+
+import run
+
+
+RECORD = {
+    'research_title': 'Urban heat islands',
+    'research_question': 'Does street shade lower night temperatures?',
+    'methodology': 'Sensor network across twelve streets',
+    'expected_outcomes': 'A shade planning guide',
+}
+
+
+def _call(section: str, prompt_tokens: int, cost: float) -> dict:
+    """One usage record as AIGenerator records it."""
+    return {
+        'section': section, 'model': 'gpt-4o-mini', 'field': 'Sciences',
+        'prompt_tokens': prompt_tokens, 'completion_tokens': 50,
+        'cached_tokens': 0, 'cache_write_tokens': 0, 'latency_s': 1.0,
+        'cache_hit': False, 'fallback': False, 'cost_usd': cost,
+    }
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Replace proposal generation; returns the inputs of every proposal."""
+    inputs_seen = []
+
+    def process_proposal(inputs, output_dir, **kwargs):
+        inputs_seen.append(inputs)
+        return {'status': 'success', 'ai_calls': [_call('title', 100, 0.001), _call('objectives', 300, 0.002)]}
+
+    monkeypatch.setattr(run, 'process_proposal', process_proposal)
+    return inputs_seen
+
+
+@pytest.fixture
+def batch(tmp_path, generated):
+    """Run a three-record batch whose proposals each make two AI calls."""
+    return run.process_batch([dict(RECORD) for _ in range(3)], tmp_path), tmp_path
+
+
+def test_batch_usage_is_aggregated(batch):
+    result, output_dir = batch
+    usage = result['summary']['usage']
+    assert usage['calls'] == 6
+    assert usage['prompt_tokens'] == 1200
+    assert usage['cost_usd'] == pytest.approx(0.009)
+    assert usage['by_section']['objectives']['prompt_tokens'] == 900
+
+    with open(output_dir / 'validation_report.json', encoding='utf-8') as f:
+        assert json.load(f)['summary']['usage'] == usage
+    assert 'proposal_ai_prompt_tokens_total{section="title"' in (output_dir / 'metrics.prom').read_text()
+
+
+def test_records_cannot_set_host_settings(tmp_path, generated):
+    record = dict(
+        RECORD,
+        dedup_index=str(tmp_path / 'dedup'),
+        literature_cache=str(tmp_path / 'literature.json'),
+        job_store=str(tmp_path / 'jobs.sqlite'),
+        workers=8,
+        reference_dirs=['/'],
+    )
+    (tmp_path / 'out').mkdir()
+    result = run.process_batch([record], tmp_path / 'out', input_dir=tmp_path / 'in')
+
+    assert result['summary']['generated'] == 1
+    inputs = generated[0]
+    assert (inputs['dedup_index'], inputs['literature_cache'], inputs['job_store']) == ('', '', '')
+    assert inputs['workers'] == 1
+    assert inputs['reference_dirs'] == [str(tmp_path / 'in')]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['out']
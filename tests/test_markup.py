@@ -0,0 +1,121 @@
+"""
+Markup Fuzz Tests
+
+Runs markup over the fuzz corpus in tests/corpus/markup and random
+mixes of its fragments, and checks ReportLab accepts every output.
+"""
+
+import random
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from utils.markup import clean_text, inline_markup, markdown_blocks
+from utils.pdf_builder import PDFBuilder
+from utils.templates import get_template
+
+
+CORPUS_DIR = Path(__file__).parent / 'corpus' / 'markup'
+
+CORPUS = sorted(path.stem for path in CORPUS_DIR.glob('*.txt'))
+
+# Random documents built from corpus fragments per run, and their seed
+FUZZ_CASES = 200
+FUZZ_SEED = 34
+
+
+def _read(name: str) -> str:
+    """Corpus text exactly as stored (control characters and CRs kept)."""
+    with open(CORPUS_DIR / f'{name}.txt', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def _fragments() -> list:
+    """Every line of the corpus, split into words and single characters too."""
+    lines = [line for name in CORPUS for line in _read(name).splitlines()]
+    words = [word for line in lines for word in line.split(' ')]
+    return lines + words + list('<>&*_`[]()#-+•\n\r\t') + ['\n\n', '**', '__', '&amp;', '](']
+
+
+def _fuzz_documents() -> list:
+    """Reproducible random documents mixing corpus fragments."""
+    rng = random.Random(FUZZ_SEED)
+    fragments = _fragments()
+    return [
+        ''.join(rng.choice(fragments) + rng.choice(('', ' ', '\n')) for _ in range(rng.randint(1, 40)))
+        for _ in range(FUZZ_CASES)
+    ]
+
+
+def _build(flowables: list) -> bytes:
+    """Lay out and render flowables into a PDF, as doc.build does for a proposal."""
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(flowables)
+    return buffer.getvalue()
+
+
+def _assert_renders(text: str) -> None:
+    """Fail if ReportLab rejects the markup produced for text."""
+    builder = PDFBuilder(get_template('Sciences', 'Research Project'))
+    style = getSampleStyleSheet()['Normal']
+    flowables = builder._create_text_flowables(text) + [
+        Paragraph(inline_markup(text), style),
+        builder._section_heading(text[:200]),
+    ]
+    assert _build(flowables).startswith(b'%PDF')
+
+
+def test_corpus_is_present():
+    assert len(CORPUS) >= 10
+
+
+@pytest.mark.parametrize('name', CORPUS)
+def test_corpus_case_renders(name):
+    _assert_renders(_read(name))
+
+
+@pytest.mark.parametrize('name', CORPUS)
+def test_corpus_blocks_parse(name):
+    style = getSampleStyleSheet()['Normal']
+    for kind, payload in markdown_blocks(_read(name)):
+        for markup in (payload if kind in ('bullets', 'numbered') else (payload,)):
+            Paragraph(markup, style)
+
+
+@pytest.mark.parametrize('index', range(0, FUZZ_CASES, 20))
+def test_fuzz_documents_render(index):
+    for text in _fuzz_documents()[index:index + 20]:
+        _assert_renders(text)
+
+
+def test_user_tags_are_escaped():
+    markup = inline_markup('<script>alert(1)</script> & <b>x</b>')
+    assert '<script>' not in markup and '<b>x</b>' not in markup
+    assert '&lt;script&gt;' in markup and '&amp;' in markup
+
+
+def test_control_characters_are_removed():
+    text = clean_text(_read('control_chars'))
+    assert not any(ord(char) < 32 and char not in '\t\n' for char in text)
+    assert '\r' not in text
+
+
+def test_markdown_converts_to_tags():
+    assert markdown_blocks('# Title\n\n- **bold** and *italic*') == [
+        ('heading', 'Title'),
+        ('bullets', ('<b>bold</b> and <i>italic</i>',)),
+    ]
+
+
+def test_only_web_and_mail_links_are_linked():
+    markup = inline_markup(_read('link_targets'))
+    assert markup.count('<link ') == 3
+    assert 'href="https://en.wikipedia.org/wiki/Function_(mathematics)"' in markup
+    assert 'keep their closing parenthesis' in markup and ')) keep' not in markup
+    for target in ('#intro', 'document:', 'javascript:', 'JavaScript:', 'vbscript:', 'data:', 'ftp:'):
+        assert target not in markup
+    assert 'the introduction' in markup and 'a click' in markup
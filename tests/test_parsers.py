@@ -0,0 +1,72 @@
+"""
+Objectives Parser Tests
+
+Runs parse_objectives over the response corpus in tests/corpus/objectives.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.parsers import parse_objectives
+
+
+CORPUS_DIR = Path(__file__).parent / 'corpus' / 'objectives'
+
+with open(CORPUS_DIR / 'expected.json', encoding='utf-8') as f:
+    EXPECTED = json.load(f)
+
+
+def _read(name: str) -> str:
+    """Corpus response exactly as received (BOMs and CRLFs kept)."""
+    with open(CORPUS_DIR / f'{name}.txt', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def test_every_case_has_an_expectation():
+    assert sorted(path.stem for path in CORPUS_DIR.glob('*.txt')) == sorted(EXPECTED)
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED))
+def test_corpus_case(name):
+    assert parse_objectives(_read(name)) == EXPECTED[name]
+
+
+@pytest.mark.parametrize('name', sorted(name for name in EXPECTED if not name.startswith('malformed_')))
+def test_parsed_fields_are_clean(name):
+    objectives = parse_objectives(_read(name))
+    assert set(objectives) == {'primary', 'sub_objectives', 'hypotheses'}
+    assert objectives['primary'] and objectives['sub_objectives']
+    for text in [objectives['primary']] + objectives['sub_objectives'] + objectives['hypotheses']:
+        assert text == text.strip()
+        assert not text.startswith(('-', '*', '•', '#', '"', '﻿'))
+        assert '**' not in text and '\r' not in text
+
+
+@pytest.mark.parametrize('name', sorted(name for name in EXPECTED if name.startswith('malformed_')))
+def test_malformed_falls_back(name):
+    assert parse_objectives(_read(name)) == {}
+
+
+def test_truncated_json_keeps_complete_items():
+    objectives = parse_objectives(_read('json_truncated'))
+    assert objectives['primary'] == 'Reduce hospital readmissions'
+    assert objectives['sub_objectives'] == ['Identify risk factors', 'Design a follow-up protocol']
+
+
+def test_truncated_json_drops_the_unfinished_item():
+    objectives = parse_objectives(_read('json_truncated_in_hypothesis'))
+    assert objectives['hypotheses'] == ['Cover falls with heat stress']
+    assert not any('Recovery' in text for text in objectives['sub_objectives'] + objectives['hypotheses'])
+
+
+def test_json_followed_by_prose_is_complete():
+    reply = '{"primary": "Map reefs", "sub_objectives": ["Survey sites", "Tag spots"]} Note: "approximate, untested'
+    assert parse_objectives(reply)['sub_objectives'] == ['Survey sites', 'Tag spots']
+
+
+def test_anthropic_prefill_is_restored():
+    # The generator prepends the prefilled '{' to Anthropic replies
+    reply = '"primary": "Map reefs", "sub_objectives": ["Survey sites"], "hypotheses": []}'
+    assert parse_objectives('{' + reply)['sub_objectives'] == ['Survey sites']
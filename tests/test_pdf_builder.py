@@ -0,0 +1,27 @@
+"""
+PDF Builder Tests
+
+Checks that builds sharing cached cover markup never share flowables.
+"""
+
+from utils.pdf_builder import PDFBuilder
+from utils.templates import get_template
+
+
+METADATA = {
+    'title': 'Soil Microbiomes',
+    'researcher': 'A. Researcher',
+    'institution': 'Research Institution',
+    'field': 'Sciences',
+    'proposal_type': 'Research Project',
+    'generated': '2024-01-01T00:00:00',
+}
+
+
+def test_cover_pages_get_their_own_flowables():
+    first = PDFBuilder(get_template('Sciences', 'Research Project'))._create_cover_page(METADATA)
+    second = PDFBuilder(get_template('Sciences', 'Research Project'))._create_cover_page(METADATA)
+
+    assert len(first) == len(second)
+    assert not {id(flowable) for flowable in first} & {id(flowable) for flowable in second}
+    assert [getattr(f, 'text', None) for f in first] == [getattr(f, 'text', None) for f in second]
@@ -0,0 +1,29 @@
+"""
+Reference Tests
+
+Checks plain-text bibliographies keep their order and numbering.
+"""
+
+import pytest
+
+from utils.references import SUPPORTED_STYLES, format_bibliography
+
+
+NUMBERED_LIST = '\n'.join(
+    f"{number}. Author{number}, A. (2020). Title {number}." for number in range(1, 12)
+)
+
+BIBTEX = """@article{b, author={Zhu, Li}, title={Later}, journal={J}, year={2021}}
+@article{a, author={Adams, Ann}, title={Earlier}, journal={J}, year={2020}}
+"""
+
+
+@pytest.mark.parametrize('style', SUPPORTED_STYLES)
+def test_plain_references_are_printed_as_given(style):
+    assert format_bibliography(NUMBERED_LIST, style) == NUMBERED_LIST.splitlines()
+
+
+def test_structured_references_are_numbered_and_sorted():
+    assert format_bibliography(BIBTEX, 'IEEE')[0].startswith('[1] L. Zhu')
+    assert format_bibliography(BIBTEX, 'Vancouver')[1].startswith('2. Adams A')
+    assert format_bibliography(BIBTEX, 'APA')[0].startswith('Adams, A.')
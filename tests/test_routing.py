@@ -0,0 +1,39 @@
+"""
+Model Routing Tests
+
+Checks that slow and failing calls downgrade a section's model.
+"""
+
+import pytest
+
+from utils.ai_generator import AIGenerator
+from utils.routing import MODEL_TIERS, ModelRouter
+
+
+FAST, SLOW = MODEL_TIERS['openai']
+
+
+def test_failed_calls_downgrade_the_model():
+    router = ModelRouter(min_samples=5)
+    for _ in range(8):
+        router.observe('title', SLOW, 0.5)
+    for _ in range(2):
+        router.observe('title', SLOW, 0.1, failed=True)
+
+    assert router.p95_latency('title', SLOW) > router.budgets['title']['p95_latency']
+    assert router.choose('title', 'openai', SLOW, 'Improve this title.', 20) == FAST
+
+
+def test_generator_timeouts_are_observed():
+    router = ModelRouter(min_samples=1)
+    generator = AIGenerator(provider='openai', router=router)
+
+    def create(request):
+        raise TimeoutError('request timed out')
+
+    generator._create = create
+    with pytest.raises(TimeoutError):
+        generator._call('title', 'Improve this title.')
+
+    assert router.p95_latency('title', generator.usage[0]['model']) is not None
+    assert generator.usage[0]['fallback']
@@ -0,0 +1,44 @@
+"""
+Validation Tests
+
+Checks budget parsing with currencies and how batch records are merged
+with defaults.
+"""
+
+import pytest
+
+from utils.validation import format_budget, parse_budget, validate_records
+
+
+@pytest.mark.parametrize('value, expected', [
+    (50000, (50000.0, 'USD')),
+    ('$125,000', (125000.0, 'USD')),
+    ('USD 1.2m', (1200000.0, 'USD')),
+    ('€50k', (50000.0, 'EUR')),
+    ('50k eur', (50000.0, 'EUR')),
+    ('£ 20,000', (20000.0, 'GBP')),
+    ('CAD $75k', (75000.0, 'CAD')),
+])
+def test_budget_keeps_its_currency(value, expected):
+    assert parse_budget(value) == expected
+
+
+@pytest.mark.parametrize('value', ['€50k USD', 'EUR $10', 'USD 5 GBP', '50 mil', 'XYZ 100', '-5', True])
+def test_unknown_or_conflicting_currency_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_budget(value)
+
+
+def test_budget_is_printed_in_its_currency():
+    assert format_budget(50000, 'EUR') == '€50,000.00'
+    assert format_budget(1200000, 'USD') == '$1,200,000.00'
+    assert format_budget(900, 'CHF') == 'CHF 900.00'
+
+
+def test_null_fields_take_the_default():
+    record = {
+        'research_title': 'T', 'research_question': 'Q', 'methodology': 'M',
+        'expected_outcomes': 'O', 'duration_months': None,
+    }
+    report = validate_records([record], {'duration_months': '12'})
+    assert report['valid'][0]['record']['duration_months'] == 12
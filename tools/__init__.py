@@ -0,0 +1 @@
+"""Research Proposal Generator - Developer Tools"""
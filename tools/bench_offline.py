@@ -0,0 +1,118 @@
+"""
+Offline Benchmark
+
+Measures offline (no API key) section rendering with and without the compiled template cache.
+"""
+
+import sys
+import time
+
+from utils.ai_generator import AIGenerator
+from utils.template_engine import compile_section, render_batch, render_objectives
+
+FIELDS = ('Sciences', 'Engineering', 'Social Sciences', 'Humanities', 'Business', 'Medicine')
+
+PROPOSAL_TYPES = ('Research Project', 'Grant Application', 'Thesis Proposal', 'Conference Abstract')
+
+PROSE_SECTIONS = ('executive_summary', 'literature_review', 'methodology')
+
+
+def sample_records(count: int) -> list:
+    """Proposal inputs cycling through every field and proposal type."""
+    return [
+        {
+            'research_title': f'Ensemble models for regional climate prediction {index}',
+            'research_question': f'How can ensemble models improve forecast accuracy in region {index}?',
+            'methodology': 'compare neural networks and random forests on NOAA reanalysis data',
+            'expected_outcomes': '15% better accuracy in long-range forecasts',
+            'field_of_study': FIELDS[index % len(FIELDS)],
+            'proposal_type': PROPOSAL_TYPES[index // len(FIELDS) % len(PROPOSAL_TYPES)],
+        }
+        for index in range(count)
+    ]
+
+
+def render_uncompiled(records: list) -> list:
+    """Render every section, compiling its template per call (no cache)."""
+    results = []
+    for record in records:
+        field = record['field_of_study']
+        proposal_type = record['proposal_type']
+        values = {
+            'title': record['research_title'],
+            'topic': record['research_title'],
+            'question': record['research_question'],
+            'methodology': record['methodology'],
+            'outcomes': record['expected_outcomes'],
+            'field': field,
+        }
+        sections = {
+            section: compile_section.__wrapped__(section, field, proposal_type).render(values)
+            for section in PROSE_SECTIONS
+        }
+        sections['objectives'] = render_objectives(record['research_question'], field, proposal_type)
+        results.append(sections)
+    return results
+
+
+def render_generator(records: list) -> list:
+    """Render every section through AIGenerator without an API key, as run.py does offline."""
+    results = []
+    for record in records:
+        generator = AIGenerator()
+        generator.set_context(field=record['field_of_study'], proposal_type=record['proposal_type'])
+        results.append({
+            'executive_summary': generator._template_summary(
+                record['research_title'], record['research_question'],
+                record['methodology'], record['expected_outcomes']
+            ),
+            'literature_review': generator._template_literature(
+                record['field_of_study'], record['research_title']
+            ),
+            'methodology': generator._template_methodology(
+                record['methodology'], record['field_of_study']
+            ),
+            'objectives': generator._template_objectives(record['research_question']),
+        })
+    return results
+
+
+def run_benchmark(proposals: int = 5000, repeats: int = 5) -> list:
+    """
+    Render proposals with each approach and return the best of repeats:
+    [{'approach', 'seconds', 'proposals_per_second'}].
+    """
+    records = sample_records(proposals)
+    approaches = (
+        ('uncompiled', render_uncompiled),
+        ('compiled', render_batch),
+        ('generator', render_generator),
+    )
+
+    results = []
+    for name, render in approaches:
+        compile_section.cache_clear()
+        render(records[:len(FIELDS) * len(PROPOSAL_TYPES)])  # warm up every variant
+        best = min(_timed(render, records) for _ in range(repeats))
+        results.append({
+            'approach': name,
+            'seconds': round(best, 4),
+            'proposals_per_second': round(proposals / best),
+        })
+    return results
+
+
+def _timed(render, records: list) -> float:
+    """Seconds taken to render records once."""
+    start = time.perf_counter()
+    render(records)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    # Usage: python -m tools.bench_offline [PROPOSALS] [REPEATS]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{'approach':>10} {'seconds':>8} {'proposals/s':>12}")
+    for result in run_benchmark(count, repeats):
+        print(f"{result['approach']:>10} {result['seconds']:>8.3f} {result['proposals_per_second']:>12}")
@@ -0,0 +1,108 @@
+"""
+References Benchmark
+
+Compares build time and peak RSS of long bibliographies laid out as one Paragraph per entry and as a ReferenceList.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+
+from utils.flowables import ReferenceList
+from utils.pdf_builder import PDFBuilder
+from utils.references import format_bibliography
+from utils.templates import get_template
+
+
+# Bibliography sizes compared by the default run
+REFERENCE_COUNTS = (50, 500, 5000)
+
+# Paragraph: one justified Paragraph per entry (the layout before ReferenceList)
+LAYOUTS = ('paragraph', 'reference_list')
+
+
+def sample_bibliography(count: int) -> str:
+    """BibTeX text with count distinct journal articles."""
+    return '\n'.join(
+        f"@article{{ref{index},\n"
+        f"  author = {{Author{index}, First and Second, Sam and Third, Tess T.}},\n"
+        f"  title = {{A considerably longer title number {index} about regional climate prediction}},\n"
+        f"  journal = {{Journal of Climate Studies {index % 50}}},\n"
+        f"  year = {{{2000 + index % 20}}},\n"
+        f"  volume = {{{index % 30 + 1}}},\n"
+        f"  number = {{2}},\n"
+        f"  pages = {{{index}--{index + 10}}},\n"
+        f"  doi = {{10.1000/bench.{index}}}\n"
+        f"}}"
+        for index in range(count)
+    )
+
+
+def build(layout: str, count: int) -> dict:
+    """
+    Format count references and build a references-only PDF in memory.
+    Returns the build time and this process's peak RSS.
+    """
+    styles = PDFBuilder(get_template('Sciences', 'Research Project')).styles
+    entries = format_bibliography(sample_bibliography(count), 'APA')
+
+    start = time.perf_counter()
+    if layout == 'paragraph':
+        story = [Paragraph(entry, styles['CustomBody']) for entry in entries]
+    else:
+        story = [ReferenceList(entries, styles['Reference'], hanging_indent=0.35*inch)]
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(story)
+    seconds = time.perf_counter() - start
+
+    return {
+        'layout': layout,
+        'references': count,
+        'seconds': round(seconds, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+        'pdf_bytes': len(buffer.getvalue()),
+    }
+
+
+def run_benchmark(counts=REFERENCE_COUNTS) -> list:
+    """Build every layout and size in a fresh process, so peak RSS is per case."""
+    results = []
+    for count in counts:
+        for layout in LAYOUTS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'tools.bench_references', '--case', layout, str(count)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output))
+    return results
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+if __name__ == '__main__':
+    # Usage: python -m tools.bench_references [COUNT ...]
+    #        python -m tools.bench_references --case LAYOUT COUNT  (one case, as JSON)
+    if sys.argv[1:2] == ['--case']:
+        print(json.dumps(build(sys.argv[2], int(sys.argv[3]))))
+        sys.exit(0)
+
+    counts = [int(arg) for arg in sys.argv[1:]] or REFERENCE_COUNTS
+    print(f"{'references':>10} {'layout':>15} {'seconds':>8} {'peak RSS MB':>12} {'PDF KB':>8}")
+    for result in run_benchmark(counts):
+        print(f"{result['references']:>10} {result['layout']:>15} {result['seconds']:>8.3f} "
+              f"{result['peak_rss_mb']:>12} {result['pdf_bytes'] / 1024:>8.0f}")
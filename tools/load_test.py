@@ -0,0 +1,219 @@
+"""
+Load Test
+
+Drives many concurrent proposals through AsyncAIGenerator against a local stub server.
+"""
+
+import asyncio
+import json
+import sys
+import time
+
+from utils.ai_generator import AsyncAIGenerator
+from utils.clients import DEFAULT_MAX_CONNECTIONS, create_async_client
+
+
+# Concurrency levels compared by the default run
+CONCURRENCY_LEVELS = (1, 10, 50, 200)
+
+SAMPLE_INPUTS = {
+    'research_title': 'machine learning in climate prediction',
+    'research_question': 'how can ensemble models improve accuracy',
+    'methodology': 'compare neural nets and random forests on NOAA data',
+    'expected_outcomes': '15% better accuracy in long-range forecasts',
+    'researcher_name': 'jane smith',
+    'field_of_study': 'Sciences',
+    'proposal_type': 'Research Project',
+}
+
+OBJECTIVES_REPLY = json.dumps({
+    'primary': 'Improve long-range climate prediction accuracy',
+    'sub_objectives': ['Build ensemble models', 'Benchmark against baselines'],
+    'hypotheses': ['Ensembles outperform single models'],
+})
+
+
+class StubServer:
+    """
+    Minimal keep-alive HTTP server answering OpenAI chat completion and
+    Anthropic message requests after a fixed latency.
+    """
+
+    def __init__(self, latency: float = 0.2):
+        """Initialize with the simulated model latency in seconds."""
+        self.latency = latency
+        self.server = None
+        self.port = None
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._handlers = set()
+
+    async def start(self) -> None:
+        """Listen on a free local port."""
+        self.server = await asyncio.start_server(self._serve, '127.0.0.1', 0, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening and close idle keep-alive connections."""
+        self.server.close()
+        for task, writer in list(self._handlers):
+            writer.close()
+        await asyncio.gather(*(task for task, _ in self._handlers), return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer) -> None:
+        """Answer requests on one connection until the client closes it."""
+        self.connections += 1
+        handler = (asyncio.current_task(), writer)
+        self._handlers.add(handler)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                await asyncio.sleep(self.latency)
+                self.in_flight -= 1
+
+                path = request_line.split()[1].decode('latin-1')
+                payload = json.dumps(self._reply(path, json.loads(body or b'{}'))).encode('utf-8')
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(payload)).encode('ascii') + b'\r\n\r\n' + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _reply(self, path: str, request: dict) -> dict:
+        """Provider-shaped response for a request."""
+        prompts = ' '.join(str(message.get('content', '')) for message in request.get('messages', []))
+        text = OBJECTIVES_REPLY if 'JSON object' in prompts else 'Stub section text.'
+
+        if path.endswith('/messages'):
+            if request['messages'][-1].get('role') == 'assistant':
+                text = text[1:]
+            return {
+                'id': 'msg_stub', 'type': 'message', 'role': 'assistant',
+                'model': request.get('model', ''), 'stop_reason': 'end_turn',
+                'content': [{'type': 'text', 'text': text}],
+                'usage': {'input_tokens': 200, 'output_tokens': 50},
+            }
+        return {
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': request.get('model', ''),
+            'choices': [{
+                'index': 0, 'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': text},
+            }],
+            'usage': {'prompt_tokens': 200, 'completion_tokens': 50, 'total_tokens': 250},
+        }
+
+
+async def generate_proposal(generator: AsyncAIGenerator, inputs: dict) -> dict:
+    """Enhance inputs, then generate the four AI sections concurrently."""
+    enhanced = await generator.enhance_user_input(inputs)
+    generator.set_context(
+        title=enhanced['research_title'], question=enhanced['research_question'],
+        methodology=enhanced['methodology'], outcomes=enhanced['expected_outcomes'],
+        field=enhanced['field_of_study'], proposal_type=enhanced['proposal_type']
+    )
+    summary, literature, methodology, objectives = await asyncio.gather(
+        generator.generate_executive_summary(
+            enhanced['research_title'], enhanced['research_question'], enhanced['methodology'],
+            enhanced['expected_outcomes'], enhanced['field_of_study'], enhanced['proposal_type']
+        ),
+        generator.generate_literature_review(
+            enhanced['field_of_study'], enhanced['research_title'], enhanced['research_question']
+        ),
+        generator.expand_methodology(
+            enhanced['methodology'], enhanced['field_of_study'], enhanced['proposal_type']
+        ),
+        generator.generate_objectives(enhanced['research_question'], enhanced['field_of_study']),
+    )
+    return {
+        'executive_summary': summary,
+        'literature_review': literature,
+        'methodology': methodology,
+        'objectives': objectives,
+    }
+
+
+async def run_load(
+    proposals: int,
+    concurrency: int,
+    latency: float = 0.2,
+    provider: str = 'openai'
+) -> dict:
+    """
+    Generate proposals with at most concurrency in flight, sharing clients
+    of up to DEFAULT_MAX_CONNECTIONS connections each. Returns throughput figures.
+    """
+    server = StubServer(latency)
+    await server.start()
+
+    # Up to four calls of each proposal are in flight at once. The stub never
+    # fails, and SDK retries would hide any error in the measured throughput.
+    connections = concurrency * 4
+    clients = [
+        create_async_client(
+            provider, 'stub-key', base_url=f'http://127.0.0.1:{server.port}/v1',
+            max_connections=min(connections, DEFAULT_MAX_CONNECTIONS), max_retries=0
+        )
+        for _ in range(-(-connections // DEFAULT_MAX_CONNECTIONS))
+    ]
+    limit = asyncio.Semaphore(concurrency)
+    calls = []
+
+    async def one(index: int) -> None:
+        async with limit:
+            generator = AsyncAIGenerator(provider, 'stub-key', client=clients[index % len(clients)])
+            await generate_proposal(generator, SAMPLE_INPUTS)
+            calls.extend(record for record in generator.usage if not record['fallback'])
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(proposals)))
+    finally:
+        for client in clients:
+            await client.close()
+        await server.stop()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'proposals': proposals,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'proposals_per_second': round(proposals / elapsed, 2),
+        'calls': len(calls),
+        'peak_in_flight': server.peak_in_flight,
+        'connections': server.connections,
+    }
+
+
+if __name__ == '__main__':
+    # Usage: python -m tools.load_test [PROPOSALS] [LATENCY_MS] [PROVIDER]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.2
+    name = sys.argv[3] if len(sys.argv) > 3 else 'openai'
+    print(f"{'concurrency':>11} {'seconds':>8} {'proposals/s':>12} {'peak calls':>11} {'connections':>12}")
+    for level in CONCURRENCY_LEVELS:
+        result = asyncio.run(run_load(min(count, level * 4), level, delay, name))
+        print(f"{level:>11} {result['seconds']:>8.2f} {result['proposals_per_second']:>12.2f} "
+              f"{result['peak_in_flight']:>11} {result['connections']:>12}")
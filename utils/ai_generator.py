@@ -4,27 +4,410 @@ AI Content Generator
 Generates academic content for research proposals using AI providers.
 """
 
+import asyncio
 import os
+import re
+import time
+
+from utils.clients import create_async_client, get_client
+from utils.literature_cache import LiteratureCache
+from utils.normalizers import format_name, format_question, format_title
+from utils.parsers import parse_objectives
+from utils.routing import ModelRouter, default_router
+from utils.template_engine import render_objectives, render_section
+from utils.usage import call_cost
+
+
+ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
+
+# Sent after a reply that hit its token limit well short of its target length
+CONTINUE_PROMPT = "Continue exactly where your previous reply stopped. Do not repeat anything."
+
+# Replies longer than this multiple of their target are trimmed
+TRIM_SLACK = 1.25
+
+# Replies cut off below this share of their target are continued rather than trimmed
+CONTINUE_BELOW = 0.8
+
+# Providers only cache prompt prefixes of at least this many tokens
+# (Anthropic for Sonnet-class models, OpenAI for every model)
+MIN_CACHEABLE_TOKENS = 1024
+
+# Proposal inputs each section's prompt prefix carries (all sections get the field)
+SECTION_CONTEXT = {
+    'executive_summary': ('title', 'question', 'methodology', 'outcomes'),
+    'literature_review': ('title', 'question'),
+    'methodology': ('methodology',),
+    'objectives': ('question',),
+}
+
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]*(?=\s|$)')
+
+# Per-call settings for every prompt, keyed by section then provider
+# ('json' requests a JSON object response)
+SECTION_CALLS = {
+    'title': {
+        'openai': {'model': 'gpt-4o-mini', 'max_tokens': 100, 'temperature': 0.3},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 100},
+    },
+    'question': {
+        'openai': {'model': 'gpt-4o-mini', 'max_tokens': 150, 'temperature': 0.3},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 150},
+    },
+    'methodology_input': {
+        'openai': {'model': 'gpt-4o-mini', 'max_tokens': 250, 'temperature': 0.4},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 250},
+    },
+    'outcomes_input': {
+        'openai': {'model': 'gpt-4o-mini', 'max_tokens': 200, 'temperature': 0.4},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 200},
+    },
+    'executive_summary': {
+        'openai': {'model': 'gpt-4o', 'max_tokens': 500, 'temperature': 0.7},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 400},
+    },
+    'literature_review': {
+        'openai': {'model': 'gpt-4o', 'max_tokens': 700, 'temperature': 0.7},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 600},
+    },
+    'methodology': {
+        'openai': {'model': 'gpt-4o', 'max_tokens': 700, 'temperature': 0.7},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 700},
+    },
+    'objectives': {
+        'openai': {'model': 'gpt-4o', 'max_tokens': 400, 'temperature': 0.7, 'json': True},
+        'anthropic': {'model': ANTHROPIC_MODEL, 'max_tokens': 400, 'json': True},
+    },
+}
 
 
 class AIGenerator:
     """Generate AI-enhanced content for research proposals."""
 
-    def __init__(self, provider: str = 'openai', api_key: str = ''):
+    def __init__(
+        self,
+        provider: str = 'openai',
+        api_key: str = '',
+        router: ModelRouter = None,
+        literature_cache: LiteratureCache = None
+    ):
         """Initialize AI generator with provider."""
         self.provider = provider
         self.api_key = api_key
         self.client = None
 
+        # Picks the model per section from latency/cost budgets
+        self.router = router if router is not None else default_router
+
+        # Literature frameworks reused across closely related topics
+        self.literature_cache = literature_cache
+
+        # Proposal inputs that section prompt prefixes are built from
+        self.context = {}
+
+        # Per-call usage records (tokens, cost, latency, cache hit, fallback)
+        self.usage = []
+
+        # Target words and max_tokens per section (see templates.get_length_policy)
+        self.length_policy = {}
+
         if api_key:
             self._init_client()
 
-    def enhance_user_input(self, inputs: dict) -> dict:
+    def set_context(
+        self,
+        title: str = '',
+        question: str = '',
+        methodology: str = '',
+        outcomes: str = '',
+        field: str = '',
+        proposal_type: str = ''
+    ) -> None:
+        """
+        Set the proposal context section prompts draw on. Each section's
+        prefix carries only the inputs it uses (SECTION_CONTEXT).
+        """
+        self.context = {
+            'title': title,
+            'question': question,
+            'methodology': methodology,
+            'outcomes': outcomes,
+            'field': field,
+            'proposal_type': proposal_type,
+        }
+
+    def set_length_policy(self, policy: dict) -> None:
+        """Size section prompts and token limits to target word counts."""
+        self.length_policy = policy or {}
+
+    def _word_target(self, section: str, default: str) -> str:
+        """Length instruction for a section prompt."""
+        policy = self.length_policy.get(section)
+        return f"about {policy['words']} words" if policy else default
+
+    def _min_words(self, section: str) -> int:
+        """Fewest words a section can have without falling short of its target."""
+        policy = self.length_policy.get(section)
+        return round(policy['words'] * CONTINUE_BELOW) if policy else 0
+
+    def _context_field(self) -> str:
+        """Field of study from the shared context."""
+        return self.context.get('field') or 'Sciences'
+
+    def _context_proposal_type(self) -> str:
+        """Proposal type from the shared context."""
+        return self.context.get('proposal_type') or 'Research Project'
+
+    def _context_prefix(self, section: str, **overrides) -> str:
+        """
+        Build a section's prompt prefix from the context, with only the
+        inputs the section uses (SECTION_CONTEXT).
+        """
+        context = dict(self.context)
+        context.update({key: value for key, value in overrides.items() if value})
+        keys = ('field',) + SECTION_CONTEXT[section]
+
+        lines = [
+            "You are an academic writing assistant drafting sections of a "
+            f"{context.get('proposal_type') or 'research proposal'}.",
+            "",
+        ]
+        labels = [
+            ('field', 'Field'),
+            ('title', 'Title'),
+            ('question', 'Research Question'),
+            ('methodology', 'Methodology'),
+            ('outcomes', 'Expected Outcomes'),
+        ]
+        for key, label in labels:
+            if key in keys and context.get(key):
+                lines.append(f"{label}: {context[key]}")
+
+        return '\n'.join(lines)
+
+    def _complete(self, section: str, prompt: str, prefix: str = '') -> str:
+        """
+        Run a single completion for a section.
+        The context prefix goes first (system prompt) and the section
+        instructions last; a prefix long enough to cache is marked for it.
+        """
+        text, truncated = self._call(section, prompt, prefix)
+        if truncated and self._needs_continuation(section, text):
+            more, truncated = self._call(section, prompt, prefix, continuation=text)
+            text = self._join(text, more)
+        return self._fit_length(section, text, truncated)
+
+    def _call(self, section: str, prompt: str, prefix: str = '', continuation: str = '') -> tuple:
+        """Send one request; returns the reply text and whether it hit max_tokens."""
+        model, request = self._request(section, prompt, prefix, continuation)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self._create(request)
+            return self._finish(section, model, response, time.perf_counter() - start, continuation)
+        except Exception:
+            self._record_failure(section, model, response, time.perf_counter() - start)
+            raise
+
+    def _create(self, request: dict):
+        """Send a completion request with the provider's SDK client."""
+        if self.provider == 'openai':
+            return self.client.chat.completions.create(**request)
+        return self.client.messages.create(**request)
+
+    def _request(
+        self,
+        section: str,
+        prompt: str,
+        prefix: str = '',
+        continuation: str = ''
+    ) -> tuple:
+        """
+        Pick the model for a section call and build its request arguments.
+        With continuation (a reply cut off at max_tokens), ask for the rest.
+        """
+        settings = SECTION_CALLS[section][self.provider]
+        policy = self.length_policy.get(section)
+        max_tokens = policy['max_tokens'] if policy else settings['max_tokens']
+        model = self.router.choose(
+            section, self.provider, settings['model'],
+            prefix + prompt, max_tokens
+        )
+
+        if self.provider == 'openai':
+            messages = []
+            if prefix:
+                messages.append({"role": "system", "content": prefix})
+            messages.append({"role": "user", "content": prompt})
+            if continuation:
+                messages.append({"role": "assistant", "content": continuation})
+                messages.append({"role": "user", "content": CONTINUE_PROMPT})
+
+            request = {
+                'model': model,
+                'messages': messages,
+                'max_tokens': max_tokens,
+                'temperature': settings['temperature'],
+            }
+            if settings.get('json'):
+                request['response_format'] = {"type": "json_object"}
+
+        elif self.provider == 'anthropic':
+            messages = [{"role": "user", "content": prompt}]
+            if continuation:
+                # Prefilling the partial reply makes the model carry on from it
+                messages.append({"role": "assistant", "content": continuation.rstrip()})
+            elif settings.get('json'):
+                # Prefill the opening brace so the reply is a bare JSON object
+                messages.append({"role": "assistant", "content": "{"})
+
+            request = {
+                'model': model,
+                'max_tokens': max_tokens,
+                'messages': messages,
+            }
+            if prefix:
+                system = {"type": "text", "text": prefix}
+                if _estimate_tokens(prefix) >= MIN_CACHEABLE_TOKENS:
+                    system["cache_control"] = {"type": "ephemeral"}
+                request['system'] = [system]
+
+        else:
+            raise ValueError(f"Unsupported AI provider: {self.provider}")
+
+        return model, request
+
+    def _finish(
+        self,
+        section: str,
+        model: str,
+        response,
+        latency: float,
+        continuation: str = ''
+    ) -> tuple:
+        """
+        Extract the reply text and whether it was cut off at max_tokens,
+        and record the call's latency and usage.
+        """
+        if self.provider == 'openai':
+            choice = response.choices[0]
+            text = choice.message.content.strip()
+            truncated = getattr(choice, 'finish_reason', None) == 'length'
+        else:
+            # A continuation resumes the prefilled reply, so keep its leading space
+            text = response.content[0].text
+            text = text.rstrip() if continuation else text.strip()
+            truncated = getattr(response, 'stop_reason', None) == 'max_tokens'
+            if SECTION_CALLS[section][self.provider].get('json') and not continuation:
+                text = '{' + text
+
+        self.router.observe(section, model, latency)
+        self._record_usage(section, model, getattr(response, 'usage', None), latency)
+        return text, truncated
+
+    def _record_failure(self, section: str, model: str, response, latency: float) -> None:
+        """
+        Record a failed call as a fallback. Timeouts and API errors (no
+        response) also count against the model's latency budget.
+        """
+        if response is None:
+            self.router.observe(section, model, latency, failed=True)
+        self._record_usage(section, model, None, latency, fallback=True)
+
+    def _needs_continuation(self, section: str, text: str) -> bool:
+        """
+        Whether a reply cut off at max_tokens should be continued: prose
+        well short of its target is worth finishing; anything else is
+        trimmed to whole sentences. JSON is never continued, since a
+        JSON-mode continuation starts a new object; parse_objectives
+        keeps the complete items of the cut-off one instead.
+        """
+        policy = self.length_policy.get(section)
+        if not policy or SECTION_CALLS[section][self.provider].get('json'):
+            return False
+        return len(text.split()) < policy['words'] * CONTINUE_BELOW
+
+    def _join(self, text: str, more: str) -> str:
+        """
+        Append a continuation to a cut-off reply. An Anthropic continuation
+        resumes the prefilled reply where it stopped, possibly mid-word, so
+        it is appended as-is; an OpenAI one is a new message.
+        """
+        if self.provider == 'anthropic':
+            return text.rstrip() + more
+        return f"{text.rstrip()} {more.lstrip()}"
+
+    def _fit_length(self, section: str, text: str, truncated: bool = False) -> str:
+        """
+        Trim prose that overran its target, or ends mid-sentence after a
+        cut-off, back to its last whole sentence within the limit.
+        """
+        policy = self.length_policy.get(section)
+        if not policy or SECTION_CALLS[section][self.provider].get('json'):
+            return text
+
+        limit = round(policy['words'] * TRIM_SLACK)
+        if not truncated and len(text.split()) <= limit:
+            return text
+        return _trim_to_sentences(text, limit)
+
+    def _record_usage(
+        self,
+        section: str,
+        model: str,
+        usage,
+        latency: float,
+        fallback: bool = False
+    ) -> None:
+        """Record tokens, cost, latency and cache use for a call."""
+        if usage is None:
+            prompt_tokens = completion_tokens = cached = cache_write = 0
+        elif self.provider == 'openai':
+            prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+            completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+            cache_write = 0
+        else:
+            # Anthropic reports cache reads/writes separately from input_tokens
+            cached = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            prompt_tokens = (getattr(usage, 'input_tokens', 0) or 0) + cached + cache_write
+            completion_tokens = getattr(usage, 'output_tokens', 0) or 0
+
+        record = {
+            'section': section,
+            'model': model,
+            'field': self.context.get('field', ''),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cached_tokens': cached,
+            'cache_write_tokens': cache_write,
+            'latency_s': round(latency, 3),
+            'cache_hit': cached > 0,
+            'fallback': fallback,
+        }
+        record['cost_usd'] = round(call_cost(self.provider, record), 6)
+        self.usage.append(record)
+
+    def _mark_fallback(self, section: str) -> None:
+        """
+        Mark the latest call for section as a fallback. Sections run
+        concurrently, so it need not be the last record.
+        """
+        for record in reversed(self.usage):
+            if record['section'] == section:
+                record['fallback'] = True
+                break
+
+    def enhance_user_input(self, inputs: dict, reuse: dict = None) -> dict:
         """
         Enhance and clean user input using AI before processing.
         This improves quality by fixing capitalization, grammar, and expanding brief inputs.
+        Fields in reuse (enhanced values from an earlier, matching request) are not sent again.
         """
         enhanced = inputs.copy()
+        reuse = reuse or {}
 
         if not self.client:
             print("⚠️  No API key - using basic text formatting")
@@ -36,18 +419,16 @@ class AIGenerator:
 
         print("✨ Enhancing user input with AI...")
 
-        try:
-            # Enhance research title
-            enhanced['research_title'] = self._enhance_title(inputs['research_title'])
-
-            # Enhance research question
-            enhanced['research_question'] = self._enhance_question(inputs['research_question'])
-
-            # Enhance methodology
-            enhanced['methodology'] = self._enhance_methodology(inputs['methodology'], inputs['field_of_study'])
+        enhancers = {
+            'research_title': lambda: self._enhance_title(inputs['research_title']),
+            'research_question': lambda: self._enhance_question(inputs['research_question']),
+            'methodology': lambda: self._enhance_methodology(inputs['methodology'], inputs['field_of_study']),
+            'expected_outcomes': lambda: self._enhance_outcomes(inputs['expected_outcomes']),
+        }
 
-            # Enhance expected outcomes
-            enhanced['expected_outcomes'] = self._enhance_outcomes(inputs['expected_outcomes'])
+        try:
+            for field, enhance in enhancers.items():
+                enhanced[field] = reuse[field] if field in reuse else enhance()
 
             # Fix researcher name
             enhanced['researcher_name'] = self._basic_name_format(inputs['researcher_name'])
@@ -65,80 +446,19 @@ class AIGenerator:
 
     def _basic_title_format(self, title: str) -> str:
         """Basic title formatting without AI."""
-        if not title or len(title.strip()) < 2:
-            return title
-
-        # Convert to Title Case
-        title = title.strip()
-
-        # Simple title case with proper handling of common words
-        words = title.split()
-        formatted_words = []
-
-        # Words that should stay lowercase (unless first word)
-        lowercase_words = {'a', 'an', 'and', 'as', 'at', 'but', 'by', 'for', 'in', 'nor', 'of', 'on', 'or', 'so', 'the', 'to', 'up', 'yet'}
-
-        for i, word in enumerate(words):
-            if i == 0 or word.lower() not in lowercase_words:
-                # Capitalize first letter, keep rest as is (for acronyms like ML, AI)
-                if word.isupper() and len(word) <= 3:  # Likely an acronym
-                    formatted_words.append(word.upper())
-                else:
-                    formatted_words.append(word.capitalize())
-            else:
-                formatted_words.append(word.lower())
-
-        return ' '.join(formatted_words)
+        return format_title(title)
 
     def _basic_question_format(self, question: str) -> str:
         """Basic question formatting without AI."""
-        if not question or len(question.strip()) < 2:
-            return question
-
-        question = question.strip()
-
-        # Capitalize first letter
-        if question[0].islower():
-            question = question[0].upper() + question[1:]
-
-        # Ensure it ends with a question mark if it looks like a question
-        question_words = ['how', 'what', 'why', 'when', 'where', 'who', 'can', 'does', 'is', 'will']
-        if any(question.lower().startswith(word) for word in question_words):
-            if not question.endswith('?'):
-                question = question.rstrip('.') + '?'
-
-        return question
+        return format_question(question)
 
     def _basic_name_format(self, name: str) -> str:
         """Basic name formatting without AI."""
-        if not name or len(name.strip()) < 2:
-            return name
-
-        # Title case for names
-        name = name.strip()
-
-        # Handle special cases like "dr.", "prof.", etc.
-        prefixes = {'dr.': 'Dr.', 'dr': 'Dr.', 'prof.': 'Prof.', 'prof': 'Prof.', 'mr.': 'Mr.', 'ms.': 'Ms.', 'mrs.': 'Mrs.'}
-
-        words = name.split()
-        formatted_words = []
-
-        for word in words:
-            word_lower = word.lower().rstrip('.')
-            if word_lower in prefixes:
-                formatted_words.append(prefixes[word_lower])
-            else:
-                formatted_words.append(word.capitalize())
-
-        return ' '.join(formatted_words)
-
+        return format_name(name)
 
-    def _enhance_title(self, title: str) -> str:
-        """Clean and enhance research title."""
-        if not title or len(title.strip()) < 3:
-            return title
-
-        prompt = f"""Improve this research title to be professional and academic:
+    def _title_prompt(self, title: str) -> str:
+        """Prompt to clean up a research title."""
+        return f"""Improve this research title to be professional and academic:
 
 Input: "{title}"
 
@@ -152,35 +472,24 @@ Requirements:
 
 Return ONLY the improved title, nothing else."""
 
+    def _enhance_title(self, title: str) -> str:
+        """Clean and enhance research title."""
+        if not title or len(title.strip()) < 3:
+            return title
+
+        prompt = self._title_prompt(title)
+
         try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=100,
-                    temperature=0.3
-                )
-                result = response.choices[0].message.content.strip().strip('"').strip("'")
-                return result if result else title
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=100,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = response.content[0].text.strip().strip('"').strip("'")
-                return result if result else title
+            result = self._complete('title', prompt).strip('"').strip("'")
+            return result if result else title
         except Exception as e:
             print(f"   Title enhancement failed: {e}")
             # Fallback to basic formatting
             return self._basic_title_format(title)
 
-    def _enhance_question(self, question: str) -> str:
-        """Clean and enhance research question."""
-        if not question or len(question.strip()) < 5:
-            return question
-
-        prompt = f"""Improve this research question to be clear and well-structured:
+    def _question_prompt(self, question: str) -> str:
+        """Prompt to clean up a research question."""
+        return f"""Improve this research question to be clear and well-structured:
 
 Input: "{question}"
 
@@ -194,35 +503,24 @@ Requirements:
 
 Return ONLY the improved question, nothing else."""
 
+    def _enhance_question(self, question: str) -> str:
+        """Clean and enhance research question."""
+        if not question or len(question.strip()) < 5:
+            return question
+
+        prompt = self._question_prompt(question)
+
         try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=150,
-                    temperature=0.3
-                )
-                result = response.choices[0].message.content.strip().strip('"').strip("'")
-                return result if result else question
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=150,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = response.content[0].text.strip().strip('"').strip("'")
-                return result if result else question
+            result = self._complete('question', prompt).strip('"').strip("'")
+            return result if result else question
         except Exception as e:
             print(f"   Question enhancement failed: {e}")
             # Fallback to basic formatting
             return self._basic_question_format(question)
 
-    def _enhance_methodology(self, methodology: str, field: str) -> str:
-        """Expand and enhance methodology description."""
-        if not methodology or len(methodology.strip()) < 10:
-            return methodology
-
-        prompt = f"""Expand this brief methodology into a clear, detailed description for a {field} research proposal:
+    def _methodology_input_prompt(self, methodology: str, field: str) -> str:
+        """Prompt to expand a brief methodology."""
+        return f"""Expand this brief methodology into a clear, detailed description for a {field} research proposal:
 
 Input: "{methodology}"
 
@@ -236,34 +534,23 @@ Requirements:
 
 Return ONLY the enhanced methodology, nothing else."""
 
+    def _enhance_methodology(self, methodology: str, field: str) -> str:
+        """Expand and enhance methodology description."""
+        if not methodology or len(methodology.strip()) < 10:
+            return methodology
+
+        prompt = self._methodology_input_prompt(methodology, field)
+
         try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=250,
-                    temperature=0.4
-                )
-                result = response.choices[0].message.content.strip().strip('"').strip("'")
-                return result if result else methodology
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=250,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = response.content[0].text.strip().strip('"').strip("'")
-                return result if result else methodology
+            result = self._complete('methodology_input', prompt).strip('"').strip("'")
+            return result if result else methodology
         except Exception as e:
             print(f"   Methodology enhancement failed: {e}")
             return methodology
 
-    def _enhance_outcomes(self, outcomes: str) -> str:
-        """Enhance expected outcomes description."""
-        if not outcomes or len(outcomes.strip()) < 5:
-            return outcomes
-
-        prompt = f"""Improve this expected outcomes description to be professional and compelling:
+    def _outcomes_prompt(self, outcomes: str) -> str:
+        """Prompt to polish expected outcomes."""
+        return f"""Improve this expected outcomes description to be professional and compelling:
 
 Input: "{outcomes}"
 
@@ -277,37 +564,24 @@ Requirements:
 
 Return ONLY the improved outcomes, nothing else."""
 
+    def _enhance_outcomes(self, outcomes: str) -> str:
+        """Enhance expected outcomes description."""
+        if not outcomes or len(outcomes.strip()) < 5:
+            return outcomes
+
+        prompt = self._outcomes_prompt(outcomes)
+
         try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=200,
-                    temperature=0.4
-                )
-                result = response.choices[0].message.content.strip().strip('"').strip("'")
-                return result if result else outcomes
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=200,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = response.content[0].text.strip().strip('"').strip("'")
-                return result if result else outcomes
+            result = self._complete('outcomes_input', prompt).strip('"').strip("'")
+            return result if result else outcomes
         except Exception as e:
             print(f"   Outcomes enhancement failed: {e}")
             return outcomes
 
     def _init_client(self):
-        """Initialize AI client."""
+        """Initialize AI client (shared with other generators using the same key)."""
         try:
-            if self.provider == 'openai':
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-            elif self.provider == 'anthropic':
-                import anthropic
-                self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = get_client(self.provider, self.api_key)
         except Exception as e:
             print(f"⚠️  Warning: Could not initialize AI client: {e}")
             print("   Falling back to template-based generation")
@@ -332,6 +606,17 @@ Return ONLY the improved outcomes, nothing else."""
                 title, question, methodology, outcomes
             )
 
+    def _summary_prompt(self, proposal_type: str) -> str:
+        """Section instructions for the executive summary."""
+        return f"""Generate a professional executive summary ({self._word_target('executive_summary', '200-250 words')}) for the research proposal described above.
+
+Requirements:
+- Academic tone appropriate for {proposal_type}
+- Highlight significance and innovation
+- Include expected impact
+- Follow {proposal_type} formatting standards
+- Be concise but comprehensive"""
+
     def _ai_generate_summary(
         self,
         title: str,
@@ -342,39 +627,15 @@ Return ONLY the improved outcomes, nothing else."""
         proposal_type: str
     ) -> str:
         """Generate summary using AI."""
-        prompt = f"""Generate a professional research proposal executive summary (200-250 words) for:
-
-Field: {field}
-Title: {title}
-Research Question: {question}
-Methodology: {methodology}
-Expected Outcomes: {outcomes}
-
-Requirements:
-- Academic tone appropriate for {proposal_type}
-- Highlight significance and innovation
-- Include expected impact
-- Follow {proposal_type} formatting standards
-- Be concise but comprehensive"""
+        prefix = self._context_prefix(
+            'executive_summary',
+            title=title, question=question, methodology=methodology,
+            outcomes=outcomes, field=field, proposal_type=proposal_type
+        )
+        prompt = self._summary_prompt(proposal_type)
 
         try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=500,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content.strip()
-
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=400,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text.strip()
-
+            return self._complete('executive_summary', prompt, prefix)
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}. Using template.")
             return self._template_summary(title, question, methodology, outcomes)
@@ -387,13 +648,10 @@ Requirements:
         outcomes: str
     ) -> str:
         """Generate summary using template."""
-        return f"""This research proposal, titled "{title}", addresses a critical gap in current understanding by investigating: {question}
-
-The proposed study will employ {methodology} to systematically examine this research question. This approach has been selected for its robustness and applicability to the research context.
-
-The expected outcomes of this research include: {outcomes} These findings will contribute significantly to the field by providing new insights and practical applications.
-
-This research is timely and significant, as it addresses current challenges and has the potential to inform both theory and practice. The proposed methodology is rigorous and appropriate for addressing the research objectives, ensuring reliable and valid results."""
+        return render_section(
+            'executive_summary', self._context_field(), self._context_proposal_type(),
+            title=title, question=question, methodology=methodology, outcomes=outcomes
+        )
 
     def generate_literature_review(
         self,
@@ -407,16 +665,9 @@ This research is timely and significant, as it addresses current challenges and
         else:
             return self._template_literature(field, topic)
 
-    def _ai_generate_literature(
-        self,
-        field: str,
-        topic: str,
-        question: str
-    ) -> str:
-        """Generate literature review using AI."""
-        prompt = f"""Create a literature review framework for a research proposal in {field} on the topic: {topic}
-
-Research Question: {question}
+    def _literature_prompt(self, field: str, topic: str) -> str:
+        """Section instructions for the literature review framework."""
+        return f"""Create a literature review framework for the research proposal described above, in {field} on the topic: {topic}
 
 Provide:
 1. Overview of current research landscape
@@ -424,39 +675,41 @@ Provide:
 3. Research gaps this study addresses
 4. How this study builds on existing work
 
-Keep it academic but concise (300-400 words)."""
+Keep it academic but concise ({self._word_target('literature_review', '300-400 words')})."""
 
-        try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=700,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content.strip()
-
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=600,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text.strip()
+    def _ai_generate_literature(
+        self,
+        field: str,
+        topic: str,
+        question: str
+    ) -> str:
+        """Generate literature review using AI, reusing a cached framework for a close topic."""
+        if self.literature_cache is not None:
+            cached = self.literature_cache.lookup(
+                field, topic, question, min_words=self._min_words('literature_review')
+            )
+            if cached:
+                print("♻️  Reusing literature framework from a closely related topic")
+                return self._fit_length('literature_review', cached)
 
+        prefix = self._context_prefix('literature_review', title=topic, question=question, field=field)
+        prompt = self._literature_prompt(field, topic)
+
+        try:
+            literature = self._complete('literature_review', prompt, prefix)
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}. Using template.")
             return self._template_literature(field, topic)
 
+        if self.literature_cache is not None:
+            self.literature_cache.add(field, topic, question, literature)
+        return literature
+
     def _template_literature(self, field: str, topic: str) -> str:
         """Generate literature review using template."""
-        return f"""The field of {field} has seen significant developments in recent years, particularly in areas related to {topic}. Current research has established foundational understanding of key concepts and methodologies, yet several gaps remain.
-
-Existing studies have primarily focused on traditional approaches, with limited exploration of innovative methodologies and contemporary applications. This research builds upon this foundation while addressing identified limitations in current literature.
-
-Key theoretical frameworks relevant to this study include established models within {field}, which provide a solid conceptual basis for investigation. However, these frameworks require extension and adaptation to address emerging challenges and opportunities in the field.
-
-This proposal addresses these gaps by integrating multiple perspectives and employing rigorous methodological approaches. The research will contribute to ongoing scholarly discourse while providing practical insights for practitioners and policymakers."""
+        return render_section(
+            'literature_review', field, self._context_proposal_type(), topic=topic
+        )
 
     def expand_methodology(
         self,
@@ -470,16 +723,9 @@ This proposal addresses these gaps by integrating multiple perspectives and empl
         else:
             return self._template_methodology(methodology, field)
 
-    def _ai_expand_methodology(
-        self,
-        methodology: str,
-        field: str,
-        research_type: str
-    ) -> str:
-        """Expand methodology using AI."""
-        prompt = f"""Expand this research methodology for a {research_type} in {field}:
-
-Brief methodology: {methodology}
+    def _methodology_prompt(self, field: str, research_type: str) -> str:
+        """Section instructions for the expanded methodology."""
+        return f"""Expand the brief methodology above for a {research_type} in {field}.
 
 Provide a detailed methodology section including:
 1. Research design and approach
@@ -488,41 +734,31 @@ Provide a detailed methodology section including:
 4. Analysis techniques
 5. Validity and reliability considerations
 
-Make it specific and academically rigorous (300-400 words)."""
+Make it specific and academically rigorous ({self._word_target('methodology', '300-400 words')})."""
 
-        try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=700,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content.strip()
-
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=700,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text.strip()
+    def _ai_expand_methodology(
+        self,
+        methodology: str,
+        field: str,
+        research_type: str
+    ) -> str:
+        """Expand methodology using AI."""
+        prefix = self._context_prefix(
+            'methodology', methodology=methodology, field=field, proposal_type=research_type
+        )
+        prompt = self._methodology_prompt(field, research_type)
 
+        try:
+            return self._complete('methodology', prompt, prefix)
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}. Using template.")
             return self._template_methodology(methodology, field)
 
     def _template_methodology(self, methodology: str, field: str) -> str:
         """Generate methodology using template."""
-        return f"""This research will employ {methodology} to address the research objectives systematically and rigorously.
-
-Research Design: The study follows a structured approach appropriate for {field}, ensuring methodological rigor and validity of findings. The design has been selected based on the nature of the research question and available resources.
-
-Data Collection: Multiple data collection methods will be employed to ensure comprehensive coverage of the research topic. These methods have been selected for their reliability and appropriateness to the research context.
-
-Analysis Approach: Data will be analyzed using established analytical techniques appropriate for {field}. This includes both descriptive and inferential methods to draw meaningful conclusions from the collected data.
-
-Validity and Reliability: Several measures will be implemented to ensure the validity and reliability of findings, including triangulation of data sources, peer debriefing, and systematic documentation of research procedures."""
+        return render_section(
+            'methodology', field, self._context_proposal_type(), methodology=methodology
+        )
 
     def generate_objectives(self, question: str, field: str) -> dict:
         """Generate research objectives."""
@@ -531,67 +767,289 @@ Validity and Reliability: Several measures will be implemented to ensure the val
         else:
             return self._template_objectives(question)
 
-    def _ai_generate_objectives(self, question: str, field: str) -> dict:
-        """Generate objectives using AI."""
-        prompt = f"""Based on this research question in {field}:
-"{question}"
-
-Generate:
+    def _objectives_prompt(self, field: str) -> str:
+        """Section instructions for the objectives (JSON reply)."""
+        return f"""Based on the research question above in {field}, generate:
 1. One primary research objective
 2. 3-4 specific sub-objectives
 3. 1-2 testable hypotheses (if applicable)
 
-Format as structured items, concise and clear."""
+Respond with a JSON object only, in this shape:
+{{"primary": "...", "sub_objectives": ["...", "..."], "hypotheses": ["..."]}}
 
-        try:
-            if self.provider == 'openai':
-                response = self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=400,
-                    temperature=0.7
-                )
-                content = response.choices[0].message.content.strip()
-
-            elif self.provider == 'anthropic':
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=400,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                content = response.content[0].text.strip()
-
-            # Parse the response (simplified - assumes structured format)
-            return {
-                'primary': f"To investigate and address: {question}",
-                'sub_objectives': [
-                    "Systematically examine key variables and relationships",
-                    "Collect and analyze relevant data",
-                    "Draw evidence-based conclusions",
-                    "Provide practical recommendations"
-                ],
-                'hypotheses': [
-                    "The research will reveal significant patterns and relationships",
-                    "Findings will contribute to theoretical and practical understanding"
-                ]
-            }
+Keep each item concise and clear{self._objectives_length()}."""
+
+    def _objectives_length(self) -> str:
+        """Length instruction for the objectives, if a target is set."""
+        policy = self.length_policy.get('objectives')
+        return f", about {policy['words']} words in total" if policy else ''
+
+    def _ai_generate_objectives(self, question: str, field: str) -> dict:
+        """Generate objectives using AI."""
+        prefix = self._context_prefix('objectives', question=question, field=field)
+        prompt = self._objectives_prompt(field)
 
+        try:
+            content = self._complete('objectives', prompt, prefix)
         except Exception as e:
             print(f"⚠️  AI generation failed: {e}. Using template.")
             return self._template_objectives(question)
 
+        objectives = parse_objectives(content)
+        if not objectives:
+            print("⚠️  Could not parse AI objectives. Using template.")
+            self._mark_fallback('objectives')
+            return self._template_objectives(question)
+
+        return objectives
+
     def _template_objectives(self, question: str) -> dict:
         """Generate objectives using template."""
-        return {
-            'primary': f"To investigate and address: {question}",
-            'sub_objectives': [
-                "Systematically examine key variables and relationships within the research context",
-                "Collect and analyze relevant data using rigorous methodological approaches",
-                "Draw evidence-based conclusions that contribute to the field",
-                "Provide practical recommendations for practitioners and policymakers"
-            ],
-            'hypotheses': [
-                "The research will reveal significant patterns and relationships relevant to the research question",
-                "Findings will contribute to both theoretical understanding and practical applications"
-            ]
+        return render_objectives(
+            question, self._context_field(), self._context_proposal_type()
+        )
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt (about 4 characters per token)."""
+    return len(text) // 4
+
+
+def _trim_to_sentences(text: str, max_words: int) -> str:
+    """Text up to its last sentence end within max_words words (unchanged if there is none)."""
+    cut = None
+    words = 0
+    position = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        words += len(text[position:match.end()].split())
+        position = match.end()
+        if words > max_words:
+            break
+        cut = position
+    return text[:cut].rstrip() if cut else text
+
+
+class AsyncAIGenerator(AIGenerator):
+    """
+    AIGenerator driven by an event loop: the same prompts, fallbacks and
+    usage records, with coroutine methods on an async SDK client so one
+    loop can keep many proposals in flight.
+    """
+
+    def __init__(
+        self,
+        provider: str = 'openai',
+        api_key: str = '',
+        router: ModelRouter = None,
+        literature_cache: LiteratureCache = None,
+        client=None
+    ):
+        """Initialize with provider; pass client to share its connection pool."""
+        self._shared_client = client
+        super().__init__(provider, api_key, router, literature_cache)
+
+    def _init_client(self):
+        """Initialize async AI client, unless a shared one was given."""
+        if self._shared_client is not None:
+            self.client = self._shared_client
+            return
+        try:
+            self.client = create_async_client(self.provider, self.api_key)
+        except Exception as e:
+            print(f"⚠️  Warning: Could not initialize AI client: {e}")
+            print("   Falling back to template-based generation")
+            self.client = None
+
+    async def aclose(self) -> None:
+        """Close the client's connections if this generator created it."""
+        if self.client is not None and self._shared_client is None:
+            await self.client.close()
+
+    async def _complete(self, section: str, prompt: str, prefix: str = '') -> str:
+        """Run a single completion for a section without blocking the event loop."""
+        text, truncated = await self._call(section, prompt, prefix)
+        if truncated and self._needs_continuation(section, text):
+            more, truncated = await self._call(section, prompt, prefix, continuation=text)
+            text = self._join(text, more)
+        return self._fit_length(section, text, truncated)
+
+    async def _call(self, section: str, prompt: str, prefix: str = '', continuation: str = '') -> tuple:
+        """Send one request; returns the reply text and whether it hit max_tokens."""
+        model, request = self._request(section, prompt, prefix, continuation)
+        start = time.perf_counter()
+        response = None
+        try:
+            if self.provider == 'openai':
+                response = await self.client.chat.completions.create(**request)
+            else:
+                response = await self.client.messages.create(**request)
+            return self._finish(section, model, response, time.perf_counter() - start, continuation)
+        except Exception:
+            self._record_failure(section, model, response, time.perf_counter() - start)
+            raise
+
+    async def enhance_user_input(self, inputs: dict, reuse: dict = None) -> dict:
+        """Enhance user input, with the field enhancements in flight concurrently."""
+        enhanced = inputs.copy()
+        reuse = reuse or {}
+
+        if not self.client:
+            print("⚠️  No API key - using basic text formatting")
+            enhanced['research_title'] = self._basic_title_format(inputs['research_title'])
+            enhanced['research_question'] = self._basic_question_format(inputs['research_question'])
+            enhanced['researcher_name'] = self._basic_name_format(inputs['researcher_name'])
+            return enhanced
+
+        print("✨ Enhancing user input with AI...")
+
+        enhancers = {
+            'research_title': lambda: self._enhance_title(inputs['research_title']),
+            'research_question': lambda: self._enhance_question(inputs['research_question']),
+            'methodology': lambda: self._enhance_methodology(inputs['methodology'], inputs['field_of_study']),
+            'expected_outcomes': lambda: self._enhance_outcomes(inputs['expected_outcomes']),
         }
+
+        try:
+            pending = {field: enhance() for field, enhance in enhancers.items() if field not in reuse}
+            results = await asyncio.gather(*pending.values())
+            enhanced.update(zip(pending, results))
+            enhanced.update({field: reuse[field] for field in enhancers if field in reuse})
+            enhanced['researcher_name'] = self._basic_name_format(inputs['researcher_name'])
+
+            print("✅ Input enhancement complete")
+            return enhanced
+
+        except Exception as e:
+            print(f"⚠️  AI enhancement failed: {e}. Using basic formatting.")
+            enhanced['research_title'] = self._basic_title_format(inputs['research_title'])
+            enhanced['research_question'] = self._basic_question_format(inputs['research_question'])
+            enhanced['researcher_name'] = self._basic_name_format(inputs['researcher_name'])
+            return enhanced
+
+    async def _enhance_text(self, section: str, prompt: str, text: str, fallback) -> str:
+        """Run one input enhancement, falling back to fallback(text) on failure."""
+        try:
+            result = (await self._complete(section, prompt)).strip('"').strip("'")
+            return result if result else text
+        except Exception as e:
+            print(f"   {section.replace('_', ' ').capitalize()} enhancement failed: {e}")
+            return fallback(text)
+
+    async def _enhance_title(self, title: str) -> str:
+        """Clean and enhance research title."""
+        if not title or len(title.strip()) < 3:
+            return title
+        return await self._enhance_text(
+            'title', self._title_prompt(title), title, self._basic_title_format
+        )
+
+    async def _enhance_question(self, question: str) -> str:
+        """Clean and enhance research question."""
+        if not question or len(question.strip()) < 5:
+            return question
+        return await self._enhance_text(
+            'question', self._question_prompt(question), question, self._basic_question_format
+        )
+
+    async def _enhance_methodology(self, methodology: str, field: str) -> str:
+        """Expand and enhance methodology description."""
+        if not methodology or len(methodology.strip()) < 10:
+            return methodology
+        return await self._enhance_text(
+            'methodology_input', self._methodology_input_prompt(methodology, field),
+            methodology, lambda text: text
+        )
+
+    async def _enhance_outcomes(self, outcomes: str) -> str:
+        """Enhance expected outcomes description."""
+        if not outcomes or len(outcomes.strip()) < 5:
+            return outcomes
+        return await self._enhance_text(
+            'outcomes_input', self._outcomes_prompt(outcomes), outcomes, lambda text: text
+        )
+
+    async def generate_executive_summary(
+        self,
+        title: str,
+        question: str,
+        methodology: str,
+        outcomes: str,
+        field: str,
+        proposal_type: str
+    ) -> str:
+        """Generate executive summary."""
+        if not self.client:
+            return self._template_summary(title, question, methodology, outcomes)
+
+        prefix = self._context_prefix(
+            'executive_summary',
+            title=title, question=question, methodology=methodology,
+            outcomes=outcomes, field=field, proposal_type=proposal_type
+        )
+        try:
+            return await self._complete('executive_summary', self._summary_prompt(proposal_type), prefix)
+        except Exception as e:
+            print(f"⚠️  AI generation failed: {e}. Using template.")
+            return self._template_summary(title, question, methodology, outcomes)
+
+    async def generate_literature_review(self, field: str, topic: str, question: str) -> str:
+        """Generate literature review framework, reusing a cached framework for a close topic."""
+        if not self.client:
+            return self._template_literature(field, topic)
+
+        if self.literature_cache is not None:
+            cached = self.literature_cache.lookup(
+                field, topic, question, min_words=self._min_words('literature_review')
+            )
+            if cached:
+                print("♻️  Reusing literature framework from a closely related topic")
+                return self._fit_length('literature_review', cached)
+
+        prefix = self._context_prefix('literature_review', title=topic, question=question, field=field)
+        try:
+            literature = await self._complete(
+                'literature_review', self._literature_prompt(field, topic), prefix
+            )
+        except Exception as e:
+            print(f"⚠️  AI generation failed: {e}. Using template.")
+            return self._template_literature(field, topic)
+
+        if self.literature_cache is not None:
+            self.literature_cache.add(field, topic, question, literature)
+        return literature
+
+    async def expand_methodology(self, methodology: str, field: str, research_type: str) -> str:
+        """Expand methodology section."""
+        if not self.client:
+            return self._template_methodology(methodology, field)
+
+        prefix = self._context_prefix(
+            'methodology', methodology=methodology, field=field, proposal_type=research_type
+        )
+        try:
+            return await self._complete(
+                'methodology', self._methodology_prompt(field, research_type), prefix
+            )
+        except Exception as e:
+            print(f"⚠️  AI generation failed: {e}. Using template.")
+            return self._template_methodology(methodology, field)
+
+    async def generate_objectives(self, question: str, field: str) -> dict:
+        """Generate research objectives."""
+        if not self.client:
+            return self._template_objectives(question)
+
+        prefix = self._context_prefix('objectives', question=question, field=field)
+        try:
+            content = await self._complete('objectives', self._objectives_prompt(field), prefix)
+        except Exception as e:
+            print(f"⚠️  AI generation failed: {e}. Using template.")
+            return self._template_objectives(question)
+
+        objectives = parse_objectives(content)
+        if not objectives:
+            print("⚠️  Could not parse AI objectives. Using template.")
+            self._mark_fallback('objectives')
+            return self._template_objectives(question)
+
+        return objectives
@@ -0,0 +1,290 @@
+"""
+Artifact Storage
+
+Per-request output directories, atomic file writes, a content-addressed
+artifact store and retention-based garbage collection.
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+REQUESTS_DIR = 'requests'
+OBJECTS_DIR = 'objects'
+MANIFEST_NAME = 'manifest.json'
+
+# Present in a request directory until its request has finished
+PENDING_MARKER = '.pending'
+
+# Unfinished requests untouched for this long are treated as abandoned
+PENDING_EXPIRY_SECONDS = 86400
+
+# Requests changed more recently than this are never collected
+MIN_AGE_SECONDS = 600
+
+_REQUEST_ID_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def new_request_id() -> str:
+    """Sortable, collision-resistant id for an output namespace."""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    return f"{stamp}-{secrets.token_hex(4)}"
+
+
+def request_directory(root: Path, request_id: str) -> Path:
+    """
+    Create and return the output directory of one request under
+    root/requests, marked pending until finish_request is called.
+    """
+    safe_id = _REQUEST_ID_RE.sub('-', request_id).strip('.-') or new_request_id()
+    path = Path(root) / REQUESTS_DIR / safe_id
+    path.mkdir(parents=True, exist_ok=True)
+    (path / PENDING_MARKER).touch()
+    return path
+
+
+def finish_request(directory: Path) -> None:
+    """Mark a request directory finished, so garbage collection may remove it later."""
+    (Path(directory) / PENDING_MARKER).unlink(missing_ok=True)
+
+
+def _temporary_path(path: Path) -> Path:
+    """Unique hidden temporary file next to path (same filesystem, so rename is atomic)."""
+    return path.with_name(f".{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+
+
+@contextmanager
+def atomic_path(path: Path):
+    """
+    Yield a temporary path to write to; on success it replaces path in one
+    rename, so readers see the old file or the complete new one.
+    """
+    path = Path(path)
+    tmp_path = _temporary_path(path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = 'w', encoding: str = 'utf-8'):
+    """Open a file for writing that appears at path only once fully written."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Hold an exclusive lock on path + '.lock' across processes, for
+    read-merge-write updates of shared files (no-op where fcntl is missing).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_json(path: Path, data, indent: int = None) -> None:
+    """Atomically write data as JSON."""
+    with atomic_open(path) as f:
+        json.dump(data, f, indent=indent)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store: each distinct file is kept once under
+    objects/<sha256[:2]>/<sha256>, and request directories hard-link to it
+    (or hold a copy where hard links are unsupported).
+    """
+
+    def __init__(self, root: Path):
+        """Initialize store rooted at root."""
+        self.root = Path(root)
+        self.objects = self.root / OBJECTS_DIR
+
+    def put(self, path: Path) -> str:
+        """
+        Move a file's content into the store and replace the file with a
+        link to the stored object. Returns the content digest.
+        """
+        path = Path(path)
+        digest = _file_digest(path)
+        target = self.objects / digest[:2] / digest
+
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_path(target) as tmp_path:
+                shutil.copyfile(path, tmp_path)
+
+        link_path = _temporary_path(path)
+        try:
+            os.link(target, link_path)
+        except OSError:
+            shutil.copyfile(target, link_path)
+        os.replace(link_path, path)
+        return digest
+
+    def put_directory(self, directory: Path) -> dict:
+        """Store every file under a request directory and write its manifest."""
+        directory = Path(directory)
+        manifest = {
+            path.relative_to(directory).as_posix(): {
+                'sha256': self.put(path), 'bytes': path.stat().st_size
+            }
+            for path in sorted(directory.rglob('*'))
+            if path.is_file() and path.name != MANIFEST_NAME and not path.name.startswith('.')
+        }
+        write_json(directory / MANIFEST_NAME, manifest, indent=2)
+        return manifest
+
+
+def collect_garbage(
+    root: Path,
+    max_age_days: float = None,
+    max_total_bytes: int = None,
+    keep=(),
+    min_age_seconds: float = MIN_AGE_SECONDS
+) -> dict:
+    """
+    Delete request directories older than max_age_days, then the oldest
+    ones until the output tree fits in max_total_bytes, then stored
+    objects no remaining request references. Hard-linked files are counted
+    once. Requests named in keep, still pending or changed within
+    min_age_seconds are never deleted; if the tree cannot be brought under
+    max_total_bytes without them, over_budget is set. Returns what was removed.
+    """
+    root = Path(root)
+    requests_dir = root / REQUESTS_DIR
+    requests = sorted(
+        (path for path in requests_dir.iterdir() if path.is_dir()),
+        key=lambda path: path.stat().st_mtime
+    ) if requests_dir.is_dir() else []
+
+    now = time.time()
+    removable = [path for path in requests if not _protected(path, keep, now, min_age_seconds)]
+    removed = []
+    if max_age_days is not None:
+        cutoff = now - max_age_days * 86400
+        for path in [path for path in removable if path.stat().st_mtime < cutoff]:
+            removable.remove(path)
+            requests.remove(path)
+            removed.append(path)
+            shutil.rmtree(path, ignore_errors=True)
+
+    objects_removed = _collect_objects(root, requests)
+
+    if max_total_bytes is not None:
+        while removable and _tree_bytes(root) > max_total_bytes:
+            path = removable.pop(0)
+            requests.remove(path)
+            removed.append(path)
+            shutil.rmtree(path, ignore_errors=True)
+            objects_removed += _collect_objects(root, requests)
+
+    total_bytes = _tree_bytes(root)
+    return {
+        'requests_removed': [path.name for path in removed],
+        'objects_removed': objects_removed,
+        'requests_kept': len(requests),
+        'bytes': total_bytes,
+        'over_budget': max_total_bytes is not None and total_bytes > max_total_bytes,
+    }
+
+
+def _protected(path: Path, keep, now: float, min_age_seconds: float) -> bool:
+    """Whether a request directory is kept regardless of retention limits."""
+    if path.name in keep or now - path.stat().st_mtime < min_age_seconds:
+        return True
+    marker = path / PENDING_MARKER
+    return marker.exists() and now - marker.stat().st_mtime < PENDING_EXPIRY_SECONDS
+
+
+def _collect_objects(root: Path, requests: list) -> int:
+    """
+    Delete stored objects that no remaining request manifest references
+    and that no file links to (a request still being written).
+    """
+    objects_dir = root / OBJECTS_DIR
+    if not objects_dir.is_dir():
+        return 0
+
+    referenced = set()
+    for request in requests:
+        manifest_path = request / MANIFEST_NAME
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, encoding='utf-8') as f:
+                    referenced.update(entry['sha256'] for entry in json.load(f).values())
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+
+    removed = 0
+    for path in objects_dir.glob('*/*'):
+        if path.name in referenced or path.name.startswith('.'):
+            continue
+        if path.stat().st_nlink == 1:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def _tree_bytes(root: Path) -> int:
+    """Disk usage of a tree, counting each hard-linked file once."""
+    seen = set()
+    total = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            stat = os.stat(os.path.join(directory, name))
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+    return total
+
+
+def _file_digest(path: Path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+if __name__ == '__main__':
+    # Usage: python -m utils.artifacts OUTPUT_ROOT MAX_AGE_DAYS [MAX_TOTAL_MB]
+    if len(sys.argv) < 3:
+        print("Usage: python -m utils.artifacts OUTPUT_ROOT MAX_AGE_DAYS [MAX_TOTAL_MB]")
+        sys.exit(1)
+    max_bytes = int(float(sys.argv[3]) * 1024 * 1024) if len(sys.argv) > 3 else None
+    result = collect_garbage(Path(sys.argv[1]), float(sys.argv[2]), max_bytes)
+    print(f"🧹 Removed {len(result['requests_removed'])} requests and "
+          f"{result['objects_removed']} objects; {result['requests_kept']} requests "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) kept")
+    if result['over_budget']:
+        print("⚠️  Still over the size limit: the rest are pending or recent requests")
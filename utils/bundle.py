@@ -0,0 +1,272 @@
+"""
+Proposal Bundles
+
+Merges many generated proposals into one bookmarked PDF and a ZIP archive.
+"""
+
+import json
+import re
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject,
+    NumberObject, StreamObject, create_string_object
+)
+
+from utils.artifacts import atomic_path
+
+
+# Fixed object numbers in the combined PDF; content objects start after these
+CATALOG_ID = 1
+PAGES_ID = 2
+OUTLINES_ID = 3
+
+# Page attributes a page may inherit from its source page tree
+INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+PDF_NAME = 'research_proposal.pdf'
+JSON_NAME = 'proposal_data.json'
+
+
+class StreamingPDFMerger:
+    """
+    Concatenates PDFs into one file, writing each source's objects as soon
+    as they are read. Only xref offsets, page object numbers and bookmark
+    titles are kept in memory, so memory use does not grow with the size
+    of the sources.
+    """
+
+    def __init__(self, stream):
+        """Initialize merger writing to a binary stream."""
+        self.stream = stream
+        self.offsets = [0, 0, 0, 0]  # object 0 and the reserved objects
+        self.page_ids = []
+        self.bookmarks = []
+
+        stream.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def append(self, pdf_path: Path, title: str) -> int:
+        """Append every page of a PDF under one bookmark; returns pages added."""
+        with open(pdf_path, 'rb') as f:
+            reader = PdfReader(f)
+            ids = {}
+            pending = []
+
+            first_page = len(self.page_ids)
+            for page in reader.pages:
+                ref = page.indirect_reference
+                ids[(ref.idnum, ref.generation)] = self._reserve()
+                self.page_ids.append(ids[(ref.idnum, ref.generation)])
+                pending.append((ref, page))
+
+            while pending:
+                ref, obj = pending.pop()
+                obj_id = ids[(ref.idnum, ref.generation)]
+                if obj is None:
+                    obj = ref.get_object()
+
+                if isinstance(obj, DictionaryObject) and obj.get('/Type') == '/Page':
+                    copy = self._copy_page(obj, ids, pending)
+                else:
+                    copy = self._copy(obj, ids, pending)
+                self._write_object(obj_id, copy)
+
+        added = len(self.page_ids) - first_page
+        if added:
+            self.bookmarks.append((title, self.page_ids[first_page]))
+        return added
+
+    def close(self) -> None:
+        """Write the page tree, bookmarks, catalog and cross-reference table."""
+        self._write_object(PAGES_ID, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(IndirectObject(i, 0, None) for i in self.page_ids),
+            NameObject('/Count'): NumberObject(len(self.page_ids)),
+        }))
+
+        item_ids = [self._reserve() for _ in self.bookmarks]
+        for index, (title, page_id) in enumerate(self.bookmarks):
+            item = DictionaryObject({
+                NameObject('/Title'): create_string_object(title),
+                NameObject('/Parent'): IndirectObject(OUTLINES_ID, 0, None),
+                NameObject('/Dest'): ArrayObject([IndirectObject(page_id, 0, None), NameObject('/Fit')]),
+            })
+            if index:
+                item[NameObject('/Prev')] = IndirectObject(item_ids[index - 1], 0, None)
+            if index + 1 < len(item_ids):
+                item[NameObject('/Next')] = IndirectObject(item_ids[index + 1], 0, None)
+            self._write_object(item_ids[index], item)
+
+        outlines = DictionaryObject({
+            NameObject('/Type'): NameObject('/Outlines'),
+            NameObject('/Count'): NumberObject(len(item_ids)),
+        })
+        if item_ids:
+            outlines[NameObject('/First')] = IndirectObject(item_ids[0], 0, None)
+            outlines[NameObject('/Last')] = IndirectObject(item_ids[-1], 0, None)
+        self._write_object(OUTLINES_ID, outlines)
+
+        self._write_object(CATALOG_ID, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(PAGES_ID, 0, None),
+            NameObject('/Outlines'): IndirectObject(OUTLINES_ID, 0, None),
+            NameObject('/PageMode'): NameObject('/UseOutlines'),
+        }))
+
+        xref_offset = self.stream.tell()
+        lines = [f'xref\n0 {len(self.offsets)}\n', '0000000000 65535 f \n']
+        lines.extend(f'{offset:010d} 00000 n \n' for offset in self.offsets[1:])
+        lines.append(
+            f'trailer\n<< /Size {len(self.offsets)} /Root {CATALOG_ID} 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        )
+        self.stream.write(''.join(lines).encode('ascii'))
+
+    def _reserve(self) -> int:
+        """Allocate the next object number."""
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def _write_object(self, obj_id: int, obj) -> None:
+        """Write one indirect object and record its offset."""
+        self.offsets[obj_id] = self.stream.tell()
+        self.stream.write(f'{obj_id} 0 obj\n'.encode('ascii'))
+        obj.write_to_stream(self.stream, None)
+        self.stream.write(b'\nendobj\n')
+
+    def _copy_page(self, page: DictionaryObject, ids: dict, pending: list) -> DictionaryObject:
+        """Copy a page with its inherited attributes, reparented to the combined page tree."""
+        page = DictionaryObject(page)
+        parent = page.pop('/Parent', None)
+        while parent is not None:
+            parent = parent.get_object()
+            for key in INHERITED_PAGE_KEYS:
+                if key not in page and key in parent:
+                    page[NameObject(key)] = parent.raw_get(key)
+            parent = parent.get('/Parent')
+
+        copy = self._copy(page, ids, pending)
+        copy[NameObject('/Parent')] = IndirectObject(PAGES_ID, 0, None)
+        return copy
+
+    def _copy(self, obj, ids: dict, pending: list):
+        """Copy an object with references renumbered, queueing unseen targets."""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in ids:
+                ids[key] = self._reserve()
+                pending.append((obj, None))
+            return IndirectObject(ids[key], 0, None)
+
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+            for key, value in obj.items():
+                if key != '/Length':
+                    copy[key] = self._copy(value, ids, pending)
+            return copy
+
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject(
+                (key, self._copy(value, ids, pending)) for key, value in obj.items()
+            )
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(value, ids, pending) for value in obj)
+
+        return obj
+
+
+def bundle_proposals(proposal_dirs: list, output_dir: Path, name: str = 'proposals') -> dict:
+    """
+    Merge generated proposals into {name}.pdf with one bookmark per
+    proposal, and archive their PDFs and JSON sidecars in {name}.zip.
+    Each directory is an output folder of run.py.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = output_dir / f'{name}.pdf'
+    zip_path = output_dir / f'{name}.zip'
+
+    start = time.perf_counter()
+    manifest = []
+    used_names = set()
+
+    with atomic_path(pdf_path) as pdf_tmp, atomic_path(zip_path) as zip_tmp, \
+            open(pdf_tmp, 'wb') as pdf_file, \
+            zipfile.ZipFile(zip_tmp, 'w', zipfile.ZIP_DEFLATED) as archive:
+        merger = StreamingPDFMerger(pdf_file)
+
+        for proposal_dir in proposal_dirs:
+            proposal_dir = Path(proposal_dir)
+            source_pdf = proposal_dir / PDF_NAME
+            source_json = proposal_dir / JSON_NAME
+            if not source_pdf.exists():
+                print(f"⚠️  No {PDF_NAME} in {proposal_dir}, skipping")
+                continue
+
+            metadata = {}
+            if source_json.exists():
+                with open(source_json, encoding='utf-8') as f:
+                    metadata = json.load(f).get('metadata', {})
+            title = metadata.get('title') or proposal_dir.name
+            label = f"{metadata['researcher']}: {title}" if metadata.get('researcher') else title
+
+            start_page = len(merger.page_ids) + 1
+            pages = merger.append(source_pdf, label)
+
+            # PDFs are already compressed; only the JSON sidecar is deflated
+            folder = _unique_name(_slugify(title), used_names)
+            archive.write(source_pdf, f'{folder}/{PDF_NAME}', compress_type=zipfile.ZIP_STORED)
+            if source_json.exists():
+                archive.write(source_json, f'{folder}/{JSON_NAME}')
+
+            manifest.append({
+                'folder': folder,
+                'title': title,
+                'researcher': metadata.get('researcher', ''),
+                'start_page': start_page,
+                'pages': pages,
+            })
+
+        merger.close()
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+    return {
+        'pdf_path': str(pdf_path),
+        'zip_path': str(zip_path),
+        'proposals': len(manifest),
+        'pages': sum(entry['pages'] for entry in manifest),
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+
+
+def _slugify(text: str) -> str:
+    """File-system safe folder name for a proposal."""
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', text).strip('-').lower()
+    return slug[:60] or 'proposal'
+
+
+def _unique_name(name: str, used: set) -> str:
+    """Suffix name with a counter until it is unused."""
+    candidate = name
+    counter = 2
+    while candidate in used:
+        candidate = f'{name}-{counter}'
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+if __name__ == '__main__':
+    # Usage: python -m utils.bundle OUTPUT_DIR PROPOSAL_DIR [PROPOSAL_DIR ...]
+    if len(sys.argv) < 3:
+        print("Usage: python -m utils.bundle OUTPUT_DIR PROPOSAL_DIR [PROPOSAL_DIR ...]")
+        sys.exit(1)
+    result = bundle_proposals(sys.argv[2:], Path(sys.argv[1]))
+    print(f"📦 Bundled {result['proposals']} proposals ({result['pages']} pages) "
+          f"in {result['seconds']:.2f}s → {result['pdf_path']}, {result['zip_path']}")
@@ -0,0 +1,147 @@
+"""
+Client Registry
+
+Process-wide AI SDK clients, reused across generators so proposals share pooled connections.
+"""
+
+import hashlib
+import threading
+
+
+# Connections kept per client and the timeout of each HTTP request
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT_SECONDS = 60.0
+CONNECT_TIMEOUT_SECONDS = 10.0
+KEEPALIVE_SECONDS = 30.0
+
+# Connection pool of an async client, shared by every proposal it serves.
+# The HTTP pool scans all its connections for every request, so a larger
+# pool costs more CPU per call; shard beyond this across several clients.
+DEFAULT_MAX_CONNECTIONS = 50
+
+_settings = {'pool_size': DEFAULT_POOL_SIZE, 'timeout': DEFAULT_TIMEOUT_SECONDS}
+_clients = {}
+_counts = {'created': 0, 'reused': 0}
+_lock = threading.Lock()
+
+
+def configure(pool_size: int = None, timeout: float = None) -> None:
+    """Set the pool size and per-request timeout of clients created from now on."""
+    with _lock:
+        if pool_size is not None:
+            _settings['pool_size'] = int(pool_size)
+        if timeout is not None:
+            _settings['timeout'] = float(timeout)
+
+
+def get_client(provider: str, api_key: str, base_url: str = None):
+    """
+    Shared SDK client for a provider and API key. SDK clients are
+    thread-safe, so every thread and proposal uses the same instance and
+    its keep-alive connections instead of a new pool and TLS handshake.
+    """
+    with _lock:
+        key = (
+            provider, _fingerprint(api_key), base_url,
+            _settings['pool_size'], _settings['timeout']
+        )
+        client = _clients.get(key)
+        if client is None:
+            client = _create_client(provider, api_key, base_url, **_settings)
+            _clients[key] = client
+            _counts['created'] += 1
+        else:
+            _counts['reused'] += 1
+        return client
+
+
+def create_async_client(
+    provider: str,
+    api_key: str,
+    base_url: str = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    max_retries: int = None
+):
+    """
+    Build an async SDK client with a keep-alive connection pool of
+    max_connections. Async clients belong to one event loop, so they are
+    not registered; share one between AsyncAIGenerator instances instead.
+    max_retries None keeps the SDK's retries of 429 and 5xx responses.
+    """
+    http = _http_library()
+    options = {
+        'limits': _limits(http, max_connections),
+        'timeout': _timeout(http, timeout),
+    }
+    retries = {} if max_retries is None else {'max_retries': max_retries}
+    if provider == 'openai':
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        return AsyncOpenAI(
+            api_key=api_key, base_url=base_url,
+            http_client=DefaultAsyncHttpxClient(**options), **retries
+        )
+    if provider == 'anthropic':
+        import anthropic
+        return anthropic.AsyncAnthropic(
+            api_key=api_key, base_url=base_url,
+            http_client=anthropic.DefaultAsyncHttpxClient(**options), **retries
+        )
+    raise ValueError(f"Unsupported AI provider: {provider}")
+
+
+def stats() -> dict:
+    """Clients held, and how often one was created or reused."""
+    with _lock:
+        return {'clients': len(_clients), **_counts}
+
+
+def close_all() -> None:
+    """Close every registered client and its connections."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _create_client(provider: str, api_key: str, base_url: str, pool_size: int, timeout: float):
+    """Build a synchronous SDK client with its own connection pool."""
+    http = _http_library()
+    options = {'limits': _limits(http, pool_size), 'timeout': _timeout(http, timeout)}
+    if provider == 'openai':
+        from openai import DefaultHttpxClient, OpenAI
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=DefaultHttpxClient(**options))
+    if provider == 'anthropic':
+        import anthropic
+        return anthropic.Anthropic(
+            api_key=api_key, base_url=base_url,
+            http_client=anthropic.DefaultHttpxClient(**options)
+        )
+    raise ValueError(f"Unsupported AI provider: {provider}")
+
+
+def _http_library():
+    """HTTP library of the installed SDKs (httpx2 in newer releases, httpx before)."""
+    try:
+        import httpx2
+        return httpx2
+    except ImportError:
+        import httpx
+        return httpx
+
+
+def _limits(http, size: int):
+    """Connection limits keeping size connections alive."""
+    return http.Limits(
+        max_connections=size, max_keepalive_connections=size, keepalive_expiry=KEEPALIVE_SECONDS
+    )
+
+
+def _timeout(http, seconds: float):
+    """Per-request timeout with a shorter connect phase."""
+    return http.Timeout(seconds, connect=min(seconds, CONNECT_TIMEOUT_SECONDS))
+
+
+def _fingerprint(api_key: str) -> str:
+    """Credential part of a registry key; the raw API key is not stored in it."""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()
@@ -0,0 +1,266 @@
+"""
+Request Deduplication
+
+Finds earlier requests with identical or near-identical inputs so their
+enhanced inputs and generated sections can be reused.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from utils.artifacts import file_lock, write_json
+
+
+# Free-text inputs compared by MinHash similarity
+TEXT_FIELDS = ('research_title', 'research_question', 'methodology', 'expected_outcomes')
+
+# Inputs that must match exactly before anything is reused
+CONTEXT_FIELDS = ('field_of_study', 'proposal_type', 'ai_provider')
+
+# Inputs each generated section depends on
+SECTION_INPUTS = {
+    'executive_summary': TEXT_FIELDS + ('field_of_study', 'proposal_type'),
+    'literature_review': ('research_title', 'research_question', 'field_of_study'),
+    'methodology': ('methodology', 'field_of_study', 'proposal_type'),
+    'objectives': ('research_question', 'field_of_study'),
+}
+
+# Usage section of the AI call that enhances each text input
+ENHANCEMENT_SECTIONS = {
+    'research_title': 'title',
+    'research_question': 'question',
+    'methodology': 'methodology_input',
+    'expected_outcomes': 'outcomes_input',
+}
+
+DEFAULT_THRESHOLD = 0.8
+
+SHINGLE_SIZE = 4   # characters per shingle
+NUM_BINS = 32      # MinHash values per field
+BAND_SIZE = 4      # MinHash values per LSH band
+
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text with punctuation and repeated whitespace collapsed to single spaces."""
+    return _NON_WORD_RE.sub(' ', str(text or '').lower()).strip()
+
+
+def minhash(text: str) -> str:
+    """
+    One-permutation MinHash of a text's character shingles: each shingle is
+    hashed once and the minimum is kept per bin, so the cost is linear in
+    the text length. Empty bins borrow from the next filled bin. The
+    signature is NUM_BINS fixed-width hex values in one string.
+    """
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+
+    bins = [None] * NUM_BINS
+    for shingle in {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}:
+        value = zlib.crc32(shingle.encode('utf-8'))
+        slot = value % NUM_BINS
+        value //= NUM_BINS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+
+    # Rotation densification keeps signatures of short texts comparable
+    for slot in range(NUM_BINS):
+        if bins[slot] is None:
+            for offset in range(1, NUM_BINS):
+                borrowed = bins[(slot + offset) % NUM_BINS]
+                if borrowed is not None:
+                    bins[slot] = borrowed + offset * (1 << 27)
+                    break
+    return ''.join(f'{value:08x}' for value in bins)
+
+
+def similarity(a: str, b: str) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(a[i:i + 8] == b[i:i + 8] for i in range(0, NUM_BINS * 8, 8)) / NUM_BINS
+
+
+class DedupIndex:
+    """
+    Index of earlier requests by exact input hash and by LSH bands over
+    per-field MinHash signatures. Lookups touch only the buckets of the
+    query's bands, so their cost does not grow with the size of the index.
+    On disk it is a directory: index.json holds hashes and signatures, and
+    the enhanced inputs and sections of each entry are in their own file,
+    read only when that entry is matched. One instance can be shared by
+    worker threads; saving merges entries other processes wrote meanwhile.
+    """
+
+    def __init__(self, path: Path = None, threshold: float = DEFAULT_THRESHOLD):
+        """Initialize an empty index, persisted to the path directory if given."""
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.entries = {}
+        self.payloads = {}
+        self.exact = {}
+        self.buckets = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: Path, threshold: float = DEFAULT_THRESHOLD) -> 'DedupIndex':
+        """Load an index from disk, or start a new one if the file does not exist."""
+        index = cls(path, threshold)
+        for entry_id, entry in index._read_entries().items():
+            index._insert(entry_id, entry)
+        return index
+
+    def save(self) -> None:
+        """
+        Write new entry payloads, then merge the index file with entries
+        other processes saved since it was loaded and write it atomically.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            (self.path / 'entries').mkdir(parents=True, exist_ok=True)
+            for entry_id, payload in self.payloads.items():
+                write_json(self.path / 'entries' / f'{entry_id}.json', payload)
+            self.payloads.clear()
+
+            index_file = self.path / 'index.json'
+            with file_lock(index_file):
+                for entry_id, entry in self._read_entries().items():
+                    if entry_id not in self.entries:
+                        self._insert(entry_id, entry)
+                write_json(index_file, {'entries': self.entries})
+
+    def _read_entries(self) -> dict:
+        """Entries of the index file on disk ({} if it is missing or unreadable)."""
+        index_file = self.path / 'index.json'
+        if not index_file.exists():
+            return {}
+        try:
+            with open(index_file, encoding='utf-8') as f:
+                return json.load(f).get('entries', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read dedup index {index_file}: {e}")
+            return {}
+
+    def lookup(self, inputs: dict) -> dict:
+        """
+        Find the most similar earlier request with the same context. Fields
+        at or above the threshold count as unchanged; their enhanced values
+        and the sections that depend only on unchanged inputs are reused.
+        Returns None, or a match with the mean similarity, the reusable
+        enhanced inputs and sections, and the fields that changed.
+        """
+        with self._lock:
+            return self._lookup(inputs)
+
+    def _lookup(self, inputs: dict) -> dict:
+        """Find the best match for inputs (caller holds the lock)."""
+        texts = {field: normalize_text(inputs.get(field)) for field in TEXT_FIELDS}
+        context = {field: inputs.get(field, '') for field in CONTEXT_FIELDS}
+
+        entry_id = self.exact.get(_exact_hash(texts, context))
+        if entry_id:
+            return self._match(entry_id, 1.0, set(TEXT_FIELDS))
+
+        signatures = {field: minhash(texts[field]) for field in TEXT_FIELDS}
+        candidates = set()
+        for key in _band_keys(signatures):
+            candidates.update(self.buckets.get(key, ()))
+
+        best = None
+        for candidate_id in candidates:
+            entry = self.entries[candidate_id]
+            if entry['context'] != context:
+                continue
+            scores = {
+                field: similarity(signatures[field], entry['signatures'][field])
+                for field in TEXT_FIELDS
+            }
+            score = sum(scores.values()) / len(scores)
+            if max(scores.values()) >= self.threshold and (best is None or score > best[1]):
+                best = (candidate_id, score, scores)
+
+        if best is None:
+            return None
+        candidate_id, score, scores = best
+        same = {field for field, value in scores.items() if value >= self.threshold}
+        return self._match(candidate_id, score, same)
+
+    def add(self, inputs: dict, enhanced: dict, sections: dict) -> str:
+        """Record a generated request; returns its entry id."""
+        texts = {field: normalize_text(inputs.get(field)) for field in TEXT_FIELDS}
+        context = {field: inputs.get(field, '') for field in CONTEXT_FIELDS}
+        entry_hash = _exact_hash(texts, context)
+
+        entry_id = entry_hash[:16]
+        signatures = {field: minhash(texts[field]) for field in TEXT_FIELDS}
+        with self._lock:
+            self._insert(entry_id, {
+                'hash': entry_hash,
+                'context': context,
+                'signatures': signatures,
+                'created': time.time(),
+            })
+            self.payloads[entry_id] = {
+                'enhanced': {field: enhanced.get(field, '') for field in TEXT_FIELDS},
+                'sections': {name: sections[name] for name in SECTION_INPUTS if sections.get(name)},
+            }
+        return entry_id
+
+    def _insert(self, entry_id: str, entry: dict) -> None:
+        """Add an entry to the exact map and LSH buckets."""
+        self.entries[entry_id] = entry
+        self.exact[entry['hash']] = entry_id
+        for key in _band_keys(entry['signatures']):
+            self.buckets.setdefault(key, set()).add(entry_id)
+
+    def _payload(self, entry_id: str) -> dict:
+        """Enhanced inputs and sections of an entry, from memory or disk."""
+        if entry_id in self.payloads:
+            return self.payloads[entry_id]
+        try:
+            with open(self.path / 'entries' / f'{entry_id}.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, TypeError, ValueError):
+            return {'enhanced': {}, 'sections': {}}
+
+    def _match(self, entry_id: str, score: float, same_fields: set) -> dict:
+        """Build a lookup result, keeping only sections whose inputs all match."""
+        payload = self._payload(entry_id)
+
+        # Context fields already match exactly
+        reusable = same_fields | set(CONTEXT_FIELDS)
+        sections = {
+            name: content for name, content in payload['sections'].items()
+            if set(SECTION_INPUTS[name]) <= reusable
+        }
+        return {
+            'entry_id': entry_id,
+            'similarity': round(score, 3),
+            'enhanced': {
+                field: payload['enhanced'][field]
+                for field in same_fields if payload['enhanced'].get(field)
+            },
+            'sections': sections,
+            'changed_fields': [field for field in TEXT_FIELDS if field not in same_fields],
+        }
+
+
+def _exact_hash(texts: dict, context: dict) -> str:
+    """Hash of the normalised inputs."""
+    payload = json.dumps([texts, context], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _band_keys(signatures: dict):
+    """LSH bucket keys: one per band of each field's signature."""
+    width = BAND_SIZE * 8
+    for field, signature in signatures.items():
+        for start in range(0, NUM_BINS * 8, width):
+            yield (field, start, signature[start:start + width])
+
@@ -0,0 +1,193 @@
+"""
+Custom Flowables
+
+Lightweight ReportLab flowables for content that Paragraph handles slowly.
+"""
+
+import re
+from xml.sax.saxutils import unescape
+
+from reportlab.lib.fonts import ps2tt, tt2ps
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable
+
+from utils.fonts import font_runs
+
+
+_ITALIC_TAG_RE = re.compile(r'(</?i>)')
+_SPACE_RE = re.compile(r'(\s+)')
+
+
+class ReferenceList(Flowable):
+    """
+    A bibliography laid out as one splittable block.
+    Entries are measured once into lines with a hanging indent; splitting
+    across pages slices the measured lines instead of re-wrapping text.
+    Entry markup may only use <i> and XML entities, as produced by
+    utils.references.format_bibliography; glyphs missing from the style's
+    font are drawn with a fallback font.
+    """
+
+    def __init__(self, entries: list, style: ParagraphStyle, hanging_indent: float = 24):
+        """Initialize reference list from formatted entries."""
+        super().__init__()
+        self.entries = entries
+        self.style = style
+        self.hanging_indent = hanging_indent
+
+        family, bold, _ = ps2tt(style.fontName)
+        self.fonts = (style.fontName, tt2ps(family, bold, 1))
+
+        self._measured_width = None
+        self._lines = []
+        self._word_widths = {}
+
+    def wrap(self, availWidth, availHeight):
+        """Measure lines for the width and return the full block height."""
+        self._measure(availWidth)
+        self.width = availWidth
+        self.height = self._height(self._lines)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        """Split between measured lines so the first part fits availHeight."""
+        self._measure(availWidth)
+
+        count = 0
+        used = 0.0
+        for line in self._lines:
+            line_height = self.style.leading + (self.style.spaceAfter if line[0] and count else 0)
+            if used + line_height > availHeight:
+                break
+            used += line_height
+            count += 1
+
+        if count == 0:
+            return []
+        if count == len(self._lines):
+            return [self]
+
+        return [self._from_lines(self._lines[:count]), self._from_lines(self._lines[count:])]
+
+    def draw(self):
+        """Draw measured lines top-down."""
+        style = self.style
+        text = self.canv.beginText()
+        text.setFillColor(style.textColor)
+
+        y = self.height
+        current_font = None
+        for index, (starts_entry, indent, runs) in enumerate(self._lines):
+            if starts_entry and index:
+                y -= style.spaceAfter
+            y -= style.leading
+            text.setTextOrigin(indent, y + (style.leading - style.fontSize))
+            for run_text, font in runs:
+                if font != current_font:
+                    text.setFont(font, style.fontSize, style.leading)
+                    current_font = font
+                text.textOut(run_text)
+
+        self.canv.drawText(text)
+
+    def _from_lines(self, lines: list) -> 'ReferenceList':
+        """Create a part sharing this list's measured lines."""
+        part = ReferenceList([], self.style, self.hanging_indent)
+        part._measured_width = self._measured_width
+        part._lines = lines
+        part._word_widths = self._word_widths
+        return part
+
+    def _height(self, lines: list) -> float:
+        """Total height of a run of lines."""
+        entries_after_first = sum(1 for starts_entry, _, _ in lines[1:] if starts_entry)
+        return len(lines) * self.style.leading + entries_after_first * self.style.spaceAfter
+
+    def _measure(self, width: float) -> None:
+        """Break every entry into lines for the given width (cached per width)."""
+        if self._measured_width == width:
+            return
+
+        self._lines = []
+        for entry in self.entries:
+            self._lines.extend(self._break_entry(entry, width))
+        self._measured_width = width
+
+    def _break_entry(self, entry: str, width: float) -> list:
+        """Greedy line breaking of one entry into (starts_entry, indent, runs) lines."""
+        lines = []
+        indent = 0
+        line_runs = []
+        line_width = 0.0
+
+        for word, word_width in self._words(entry):
+            space = self._space_width(word[0][1]) if line_runs else 0.0
+            if line_runs and line_width + space + word_width > width - indent:
+                lines.append((not lines, indent, line_runs))
+                indent = self.hanging_indent
+                line_runs = []
+                line_width = 0.0
+                space = 0.0
+
+            if space:
+                self._append_run(line_runs, ' ', word[0][1])
+            for run_text, font in word:
+                self._append_run(line_runs, run_text, font)
+            line_width += space + word_width
+
+        if line_runs:
+            lines.append((not lines, indent, line_runs))
+
+        return lines
+
+    def _words(self, entry: str):
+        """Yield words as lists of (text, font) runs with their widths."""
+        font = self.fonts[0]
+        word = []
+        word_width = 0.0
+
+        for part in _ITALIC_TAG_RE.split(entry):
+            if part == '<i>':
+                font = self.fonts[1]
+                continue
+            if part == '</i>':
+                font = self.fonts[0]
+                continue
+
+            for piece in _SPACE_RE.split(unescape(part, {'&quot;': '"'})):
+                if not piece:
+                    continue
+                if piece.isspace():
+                    if word:
+                        yield word, word_width
+                    word = []
+                    word_width = 0.0
+                    continue
+                for run_text, run_font in font_runs(piece, font):
+                    word.append((run_text, run_font))
+                    word_width += self._string_width(run_text, run_font)
+
+        if word:
+            yield word, word_width
+
+    def _string_width(self, text: str, font: str) -> float:
+        """Measure text, memoised per (text, font)."""
+        key = (text, font)
+        width = self._word_widths.get(key)
+        if width is None:
+            width = stringWidth(text, font, self.style.fontSize)
+            self._word_widths[key] = width
+        return width
+
+    def _space_width(self, font: str) -> float:
+        """Width of a space in font."""
+        return self._string_width(' ', font)
+
+    @staticmethod
+    def _append_run(runs: list, text: str, font: str) -> None:
+        """Append text to the last run when the font matches."""
+        if runs and runs[-1][1] == font:
+            runs[-1] = (runs[-1][0] + text, font)
+        else:
+            runs.append((text, font))
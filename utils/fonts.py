@@ -0,0 +1,164 @@
+"""
+Unicode Fonts
+
+Per-glyph fallback from the standard PDF fonts to embedded TrueType fonts.
+"""
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import reportlab
+from reportlab.lib.fonts import addMapping, ps2tt, tt2ps
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+
+
+# Directories searched for TrueType fonts, in order
+FONT_DIRS = [
+    Path(reportlab.__file__).parent / 'fonts',
+    Path('/usr/share/fonts'),
+    Path('/usr/local/share/fonts'),
+    Path.home() / '.fonts',
+    Path.home() / '.local/share/fonts',
+    Path('/Library/Fonts'),
+    Path('/System/Library/Fonts'),
+    Path('C:/Windows/Fonts'),
+]
+
+# Fallback chain tried for glyphs the standard fonts cannot encode:
+# (family name, (regular, bold, italic, bold italic) file names, subfont index)
+FALLBACK_FONTS = [
+    ('DejaVuSans', ('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf',
+                    'DejaVuSans-Oblique.ttf', 'DejaVuSans-BoldOblique.ttf'), 0),
+    ('NotoSans', ('NotoSans-Regular.ttf', 'NotoSans-Bold.ttf',
+                  'NotoSans-Italic.ttf', 'NotoSans-BoldItalic.ttf'), 0),
+    ('ArialUnicode', ('Arial Unicode.ttf', None, None, None), 0),
+    ('NotoSansCJK', ('NotoSansCJK-Regular.ttc', 'NotoSansCJK-Bold.ttc', None, None), 0),
+    ('DroidSansFallback', ('DroidSansFallbackFull.ttf', None, None, None), 0),
+    ('WenQuanYiZenHei', ('wqy-zenhei.ttc', None, None, None), 0),
+    ('Vera', ('Vera.ttf', 'VeraBd.ttf', 'VeraIt.ttf', 'VeraBI.ttf'), 0),
+]
+
+_FONT_TAG_RE = re.compile(r'(<[^>]*>)')
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]+')
+
+
+@lru_cache(maxsize=1)
+def _font_files() -> dict:
+    """Index font files by lower-case file name (scanned once per process)."""
+    files = {}
+    for directory in FONT_DIRS:
+        if not directory.is_dir():
+            continue
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.lower().endswith(('.ttf', '.ttc')):
+                    files.setdefault(name.lower(), os.path.join(root, name))
+    return files
+
+
+@lru_cache(maxsize=1)
+def fallback_chain() -> tuple:
+    """
+    Register the available fallback families and return them as
+    (family, covered code points) tuples. Font files are parsed once per
+    process; ReportLab embeds only the glyphs a document uses.
+    """
+    files = _font_files()
+    chain = []
+
+    for family, file_names, subfont_index in FALLBACK_FONTS:
+        regular = files.get(file_names[0].lower())
+        if not regular:
+            continue
+
+        try:
+            font = TTFont(family, regular, subfontIndex=subfont_index)
+            pdfmetrics.registerFont(font)
+
+            # Missing styles fall back to the regular face
+            variants = {(0, 0): family}
+            for (bold, italic), file_name in zip(((1, 0), (0, 1), (1, 1)), file_names[1:]):
+                path = files.get(file_name.lower()) if file_name else None
+                if path:
+                    name = f"{family}-{'Bold' if bold else ''}{'Italic' if italic else ''}"
+                    pdfmetrics.registerFont(TTFont(name, path, subfontIndex=subfont_index))
+                    variants[(bold, italic)] = name
+            for bold in (0, 1):
+                for italic in (0, 1):
+                    addMapping(family, bold, italic, variants.get((bold, italic), family))
+        except (TTFError, OSError) as e:
+            print(f"⚠️  Could not load font {family}: {e}")
+            continue
+
+        chain.append((family, frozenset(font.face.charToGlyph)))
+
+    return tuple(chain)
+
+
+@lru_cache(maxsize=4096)
+def fallback_family(char: str):
+    """Return the fallback family for a character, or None if the standard fonts cover it."""
+    try:
+        char.encode('cp1252')
+        return None
+    except UnicodeEncodeError:
+        pass
+
+    code = ord(char)
+    for family, covered in fallback_chain():
+        if code in covered:
+            return family
+    return None
+
+
+def font_runs(text: str, font_name: str) -> list:
+    """
+    Split text into (text, font name) runs, moving characters the standard
+    font cannot encode to the first fallback font with the glyph.
+    """
+    if text.isascii():
+        return [(text, font_name)]
+
+    _, bold, italic = ps2tt(font_name)
+    runs = []
+    for char in text:
+        family = fallback_family(char)
+        name = tt2ps(family, bold, italic) if family else font_name
+        if runs and runs[-1][1] == name:
+            runs[-1] = (runs[-1][0] + char, name)
+        else:
+            runs.append((char, name))
+    return runs
+
+
+def apply_font_fallback(markup: str) -> str:
+    """Wrap characters in paragraph markup that need a fallback font in <font> tags."""
+    if markup.isascii():
+        return markup
+
+    parts = _FONT_TAG_RE.split(markup)
+    for i in range(0, len(parts), 2):
+        if not parts[i].isascii():
+            parts[i] = _NON_ASCII_RE.sub(_wrap_fallback_run, parts[i])
+    return ''.join(parts)
+
+
+def _wrap_fallback_run(match) -> str:
+    """Wrap one run of non-ASCII characters."""
+    out = []
+    current = None
+    for char in match.group(0):
+        family = fallback_family(char)
+        if family != current:
+            if current:
+                out.append('</font>')
+            if family:
+                out.append(f'<font name="{family}">')
+            current = family
+        out.append(char)
+    if current:
+        out.append('</font>')
+    return ''.join(out)
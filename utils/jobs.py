@@ -0,0 +1,331 @@
+"""
+Job Store
+
+Durable SQLite queue of proposal jobs with leased workers and per-stage checkpoints.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Retry delay is RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+RETRY_BACKOFF_SECONDS = 5
+
+# A running job's lease is renewed this many times per lease period
+HEARTBEATS_PER_LEASE = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    inputs TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    generated TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    completed REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+
+class LeaseLost(Exception):
+    """Raised when a worker's lease on a job expired and another worker took it."""
+
+
+def worker_name() -> str:
+    """Identifier for the current worker thread."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class JobStore:
+    """
+    Queue of proposal jobs in a SQLite file. Workers lease the oldest ready
+    job; a job whose lease expires (crashed worker) is leased again and
+    resumes from its last checkpoint. Use one JobStore per thread.
+    """
+
+    def __init__(self, path: Path):
+        """Open or create the store at path."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.db.close()
+
+    def enqueue(
+        self,
+        inputs: dict,
+        output_dir: Path,
+        generated: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> int:
+        """Add a job; generated pins the proposal's timestamp across retries. Returns the job id."""
+        now = time.time()
+        cursor = self.db.execute(
+            "INSERT INTO jobs (inputs, output_dir, generated, max_attempts, available_at, created) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (json.dumps(inputs), str(output_dir), generated, max_attempts, now, now)
+        )
+        return cursor.lastrowid
+
+    def lease(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> dict:
+        """
+        Claim the oldest ready job: queued and due, or running with an
+        expired lease. Returns the job, or None if nothing is ready.
+        """
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            # Jobs whose workers keep dying are given up once out of attempts
+            self.db.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = COALESCE(error, ?), "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, 'Lease expired', now)
+            )
+            row = self.db.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                self.db.execute('COMMIT')
+                return None
+            self.db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, started = COALESCE(started, ?) WHERE id = ?",
+                (worker, now + lease_seconds, now, row['id'])
+            )
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+
+        job = dict(row)
+        job['inputs'] = json.loads(job['inputs'])
+        job['attempts'] += 1
+        return job
+
+    def renew(self, job_id: int, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> None:
+        """Extend a lease; raises LeaseLost if the worker no longer holds it."""
+        cursor = self.db.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker)
+        )
+        if cursor.rowcount == 0:
+            raise LeaseLost(f"Lease on job {job_id} was lost")
+
+    def checkpoints(self, job_id: int) -> dict:
+        """Completed stages of a job, mapped to their saved data."""
+        rows = self.db.execute(
+            "SELECT stage, data FROM checkpoints WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {row['stage']: json.loads(row['data']) for row in rows}
+
+    def checkpoint(
+        self,
+        job_id: int,
+        worker: str,
+        stage: str,
+        data,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> None:
+        """Save a completed stage and renew the lease in one transaction."""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self.renew(job_id, worker, lease_seconds)
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, stage, data, completed) VALUES (?, ?, ?, ?)",
+                (job_id, stage, json.dumps(data), time.time())
+            )
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+
+    def complete(self, job_id: int, worker: str, result: dict) -> None:
+        """Mark a leased job done with its result."""
+        self.db.execute(
+            "UPDATE jobs SET status = 'done', finished = ?, result = ?, error = NULL, "
+            "lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?",
+            (time.time(), json.dumps(result), job_id, worker)
+        )
+
+    def fail(self, job_id: int, worker: str, error: str) -> bool:
+        """
+        Record a failed attempt. The job is queued again after a backoff
+        until it runs out of attempts. Returns True if it will be retried.
+        """
+        row = self.db.execute(
+            "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ?",
+            (job_id, worker)
+        ).fetchone()
+        if row is None:
+            return False
+
+        retry = row['attempts'] < row['max_attempts']
+        now = time.time()
+        self.db.execute(
+            "UPDATE jobs SET status = ?, available_at = ?, finished = ?, error = ?, "
+            "lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+            (
+                'queued' if retry else 'failed',
+                now + RETRY_BACKOFF_SECONDS * 2 ** (row['attempts'] - 1),
+                None if retry else now,
+                error,
+                job_id,
+            )
+        )
+        return retry
+
+    def job(self, job_id: int) -> dict:
+        """Current state of a job, or None."""
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['inputs'] = json.loads(job['inputs'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def pending(self) -> int:
+        """Number of jobs not yet done or failed."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+
+    def stats(self) -> dict:
+        """Job counts by status, attempts, retries, checkpoints and throughput."""
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for row in self.db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row['status']] = row['n']
+
+        totals = self.db.execute(
+            "SELECT COUNT(*) AS jobs, COALESCE(SUM(attempts), 0) AS attempts, "
+            "COALESCE(SUM(MAX(attempts - 1, 0)), 0) AS retries, "
+            "MIN(started) AS first_started, MAX(finished) AS last_finished, "
+            "AVG(CASE WHEN status = 'done' THEN finished - started END) AS mean_seconds "
+            "FROM jobs"
+        ).fetchone()
+        checkpoints = self.db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+        elapsed = None
+        if totals['first_started'] and totals['last_finished']:
+            elapsed = totals['last_finished'] - totals['first_started']
+
+        return {
+            **counts,
+            'attempts': totals['attempts'],
+            'retries': totals['retries'],
+            'checkpoints': checkpoints,
+            'mean_job_seconds': round(totals['mean_seconds'] or 0.0, 3),
+            'jobs_per_minute': round(counts['done'] / elapsed * 60, 2) if elapsed else 0.0,
+        }
+
+
+class LeaseHeartbeat:
+    """
+    Renews a job's lease from a background thread while its worker runs,
+    so a stage longer than the lease (generation, rendering) does not let
+    another worker take the job over. Use as a context manager.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        job_id: int,
+        worker: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ):
+        """Initialize for one leased job of the store at path."""
+        self.path = path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'lease-{job_id}', daemon=True)
+
+    def __enter__(self) -> 'LeaseHeartbeat':
+        """Start renewing the lease."""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop renewing and wait for the heartbeat thread."""
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Renew the lease until stopped or lost (own connection: SQLite connections are per thread)."""
+        store = JobStore(self.path)
+        try:
+            while not self._stopped.wait(self.lease_seconds / HEARTBEATS_PER_LEASE):
+                try:
+                    store.renew(self.job_id, self.worker, self.lease_seconds)
+                except LeaseLost:
+                    self.lost = True
+                    return
+                except sqlite3.Error as e:
+                    print(f"⚠️  Could not renew lease on job {self.job_id}: {e}")
+        finally:
+            store.close()
+
+
+class JobCheckpoints:
+    """Stage checkpoints of one leased job, as used by run.process_proposal."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        job: dict,
+        worker: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ):
+        """Load the job's completed stages."""
+        self.store = store
+        self.job_id = job['id']
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.completed = store.checkpoints(job['id'])
+        self.resumed = []
+
+    def get(self, stage: str):
+        """Saved data of a completed stage, or None."""
+        if stage in self.completed:
+            self.resumed.append(stage)
+            return self.completed[stage]
+        return None
+
+    def save(self, stage: str, data) -> None:
+        """Checkpoint a completed stage (also renews the lease)."""
+        self.store.checkpoint(self.job_id, self.worker, stage, data, self.lease_seconds)
+        self.completed[stage] = data
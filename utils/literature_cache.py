@@ -0,0 +1,206 @@
+"""
+Literature Cache
+
+Reuses literature-review frameworks generated for closely related topics in the same field.
+"""
+
+import json
+import math
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+from utils.artifacts import file_lock, write_json
+
+
+DEFAULT_THRESHOLD = 0.8
+
+# Query terms (highest IDF first) whose postings supply nearest-neighbour candidates
+PROBE_TERMS = 8
+
+# Function words and research boilerplate that say nothing about the topic
+STOPWORDS = frozenset({
+    'about', 'across', 'after', 'also', 'among', 'and', 'are', 'based', 'between',
+    'can', 'does', 'for', 'from', 'has', 'have', 'how', 'into', 'its', 'more',
+    'our', 'over', 'such', 'than', 'that', 'the', 'their', 'this', 'through',
+    'using', 'what', 'when', 'which', 'while', 'who', 'why', 'will', 'with',
+    'within', 'without',
+    'analysis', 'approach', 'approaches', 'effect', 'effects', 'impact', 'improve',
+    'improving', 'new', 'research', 'role', 'study', 'toward', 'towards',
+    'understand', 'understanding'
+})
+
+_WORD_RE = re.compile(r'[a-z0-9]{3,}')
+
+
+def topic_terms(text: str) -> dict:
+    """Term frequencies of a topic, with stopwords dropped and plurals folded."""
+    terms = {}
+    for word in _WORD_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if word.endswith('ies') and len(word) > 4:
+            word = word[:-3] + 'y'
+        elif word.endswith('s') and not word.endswith('ss') and len(word) > 4:
+            word = word[:-1]
+        terms[word] = terms.get(word, 0) + 1
+    return terms
+
+
+class LiteratureCache:
+    """
+    TF-IDF index of generated literature frameworks, partitioned by field
+    of study. A lookup scores only entries sharing one of the query's
+    rarest terms (an inverted-index nearest-neighbour search) and returns
+    the best cached framework at or above the cosine threshold. One
+    instance can be shared by worker threads; saving merges entries other
+    processes wrote meanwhile.
+    """
+
+    def __init__(self, path: Path = None, threshold: float = DEFAULT_THRESHOLD):
+        """Initialize an empty cache, persisted to path if given."""
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.entries = []
+        self.postings = {}
+        self.document_frequency = {}
+        self.lookups = 0
+        self.hits = 0
+        self.latencies = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: Path, threshold: float = DEFAULT_THRESHOLD) -> 'LiteratureCache':
+        """Load a cache from disk, or start a new one if the file does not exist."""
+        cache = cls(path, threshold)
+        for entry in cache._read_entries():
+            cache._insert(entry)
+        return cache
+
+    def save(self) -> None:
+        """Merge in entries other processes saved since loading, then write the cache atomically."""
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.path):
+                known = {_entry_key(entry) for entry in self.entries}
+                for entry in self._read_entries():
+                    if _entry_key(entry) not in known:
+                        self._insert(entry)
+                write_json(self.path, {'entries': self.entries})
+
+    def _read_entries(self) -> list:
+        """Entries of the cache file on disk ([] if it is missing or unreadable)."""
+        if not self.path.exists():
+            return []
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('entries', [])
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read literature cache {self.path}: {e}")
+            return []
+
+    def lookup(self, field: str, topic: str, question: str = '', min_words: int = 0) -> str:
+        """
+        Return a cached framework for a close enough topic in the same
+        field, or None. Frameworks shorter than min_words are not reused,
+        since a longer proposal type cannot be served from them.
+        """
+        with self._lock:
+            return self._lookup(field, topic, question, min_words)
+
+    def _lookup(self, field: str, topic: str, question: str, min_words: int) -> str:
+        """Nearest cached framework (caller holds the lock)."""
+        start = time.perf_counter()
+        self.lookups += 1
+
+        query = self._weights(topic_terms(f"{topic} {question}"))
+        best_text = None
+        best_score = self.threshold
+
+        probes = sorted(query, key=query.get, reverse=True)[:PROBE_TERMS]
+        candidates = set()
+        for term in probes:
+            candidates.update(self.postings.get((field, term), ()))
+
+        query_norm = _norm(query)
+        for index in candidates:
+            entry = self.entries[index]
+            if min_words and entry.get('words', len(entry['text'].split())) < min_words:
+                continue
+            weights = self._weights(entry['terms'])
+            dot = sum(weight * weights.get(term, 0.0) for term, weight in query.items())
+            score = dot / (query_norm * _norm(weights)) if dot else 0.0
+            if score >= best_score:
+                best_text, best_score = entry['text'], score
+
+        if best_text is not None:
+            self.hits += 1
+        self.latencies.append(time.perf_counter() - start)
+        return best_text
+
+    def add(self, field: str, topic: str, question: str, text: str) -> None:
+        """Cache a generated framework under its field and topic."""
+        entry = {
+            'field': field,
+            'topic': topic,
+            'terms': topic_terms(f"{topic} {question}"),
+            'text': text,
+            'words': len(text.split()),
+            'created': time.time(),
+        }
+        with self._lock:
+            self._insert(entry)
+
+    def stats(self) -> dict:
+        """Hit rate, lookup latency and approximate index memory."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                'entries': len(self.entries),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                'mean_lookup_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+                'p95_lookup_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 3) if latencies else 0.0,
+                'memory_bytes': self._memory_bytes(),
+            }
+
+    def _insert(self, entry: dict) -> None:
+        """Add an entry to the postings and document frequencies."""
+        index = len(self.entries)
+        self.entries.append(entry)
+        for term in entry['terms']:
+            self.postings.setdefault((entry['field'], term), []).append(index)
+            self.document_frequency[term] = self.document_frequency.get(term, 0) + 1
+
+    def _weights(self, terms: dict) -> dict:
+        """TF-IDF weights of a term-frequency vector under the current corpus."""
+        total = len(self.entries) + 1
+        return {
+            term: (1 + math.log(count)) * math.log(total / (1 + self.document_frequency.get(term, 0)) + 1)
+            for term, count in terms.items()
+        }
+
+    def _memory_bytes(self) -> int:
+        """Approximate size of the in-memory index."""
+        size = sys.getsizeof(self.entries) + sys.getsizeof(self.postings)
+        size += sys.getsizeof(self.document_frequency)
+        for entry in self.entries:
+            size += sys.getsizeof(entry) + sys.getsizeof(entry['text']) + sys.getsizeof(entry['terms'])
+        for key, indexes in self.postings.items():
+            size += sys.getsizeof(key) + sys.getsizeof(indexes)
+        return size
+
+
+def _entry_key(entry: dict) -> tuple:
+    """Identity of a cache entry across processes."""
+    return (entry['field'], entry['topic'], entry['created'])
+
+
+def _norm(weights: dict) -> float:
+    """Euclidean norm of a sparse vector."""
+    return math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
@@ -0,0 +1,150 @@
+"""
+Markup Conversion
+
+Converts user and AI text (plain text or light markdown) into blocks of
+ReportLab-safe paragraph markup.
+"""
+
+import re
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from utils.fonts import apply_font_fallback
+
+
+# Inline markdown, matched in a single left-to-right pass over escaped text
+_INLINE_RE = re.compile(
+    r'(?P<code>`[^`\n]+`)'
+    r'|(?P<link>\[(?P<link_text>[^\]\n]+)\]\((?P<link_url>(?:[^()\s]|\([^()\s]*\))+)\))'
+    r'|\*\*(?P<bold>(?!\s).+?(?<!\s))\*\*'
+    r'|(?<!\w)__(?P<bold_u>(?!\s).+?(?<!\s))__(?!\w)'
+    r'|(?<![*\w])\*(?P<italic>(?![\s*]).+?(?<![\s*]))\*(?![*\w])'
+    r'|(?<!\w)_(?P<italic_u>(?![\s_]).+?(?<![\s_]))_(?!\w)'
+)
+
+# Link targets emitted as <link>; anchors, document: and script links become text
+_LINK_SCHEMES = ('http://', 'https://', 'mailto:')
+
+# Control characters ReportLab cannot render (keeps tab and newline)
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+_HEADING_RE = re.compile(r'^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+_BOLD_HEADING_RE = re.compile(r'^\s*\*\*([^*\n]{1,100})\*\*\s*:?\s*$')
+_BULLET_RE = re.compile(r'^(\s*)[-*+•]\s+(.*)$')
+_NUMBERED_RE = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+_RULE_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_BLANK_LINE_RE = re.compile(r'\n[ \t]*\n')
+
+
+def clean_text(text) -> str:
+    """Normalise arbitrary input to a string without unrenderable control characters."""
+    if text is None:
+        return ''
+    return _CONTROL_RE.sub('', str(text).replace('\r\n', '\n').replace('\r', '\n'))
+
+
+def inline_markup(text) -> str:
+    """
+    Escape text for ReportLab and convert inline markdown
+    (bold, italic, code, links) to paragraph tags in one pass.
+    Characters outside the standard fonts are tagged with a fallback font.
+    """
+    return apply_font_fallback(_convert_inline(escape(clean_text(text))))
+
+
+def _convert_inline(text: str) -> str:
+    """Replace inline markdown in already-escaped text."""
+    return _INLINE_RE.sub(_inline_replacement, text)
+
+
+def _inline_replacement(match) -> str:
+    """Render a single inline markdown match."""
+    if match.group('code'):
+        return f'<font face="Courier">{match.group("code")[1:-1]}</font>'
+    if match.group('link'):
+        text = _convert_inline(match.group('link_text'))
+        url = match.group('link_url')
+        if not url.lower().startswith(_LINK_SCHEMES):
+            return text
+        url = url.replace('"', '&quot;')
+        return f'<link href="{url}" color="blue">{text}</link>'
+    bold = match.group('bold') or match.group('bold_u')
+    if bold:
+        return f'<b>{_convert_inline(bold)}</b>'
+    italic = match.group('italic') or match.group('italic_u')
+    return f'<i>{_convert_inline(italic)}</i>'
+
+
+def markdown_blocks(text) -> list:
+    """
+    Split light markdown into blocks of safe markup.
+    Returns a list of (kind, payload) tuples:
+    ('heading', markup), ('paragraph', markup),
+    ('bullets', (markup, ...)) and ('numbered', (markup, ...)).
+    Blank lines always end a block, so each blank-line separated chunk is
+    parsed independently and memoised; regenerating a section only
+    re-parses the chunks whose text changed.
+    """
+    blocks = []
+    for chunk in _BLANK_LINE_RE.split(clean_text(text)):
+        blocks.extend(_chunk_blocks(chunk))
+    return blocks
+
+
+@lru_cache(maxsize=1024)
+def _chunk_blocks(chunk: str) -> tuple:
+    """Parse one chunk of text without blank lines into markup blocks."""
+    blocks = []
+    paragraph = []
+    list_kind = None
+    items = []
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(('paragraph', inline_markup(' '.join(paragraph))))
+            paragraph.clear()
+
+    def flush_list():
+        nonlocal list_kind
+        if list_kind:
+            blocks.append((list_kind, tuple(inline_markup(item) for item in items)))
+            items.clear()
+            list_kind = None
+
+    for line in chunk.split('\n'):
+        stripped = line.strip()
+
+        if not stripped or _RULE_RE.match(stripped):
+            flush_paragraph()
+            flush_list()
+            continue
+
+        heading = _HEADING_RE.match(line) or _BOLD_HEADING_RE.match(line)
+        if heading:
+            flush_paragraph()
+            flush_list()
+            blocks.append(('heading', inline_markup(heading.groups()[-1].rstrip(':'))))
+            continue
+
+        bullet = _BULLET_RE.match(line)
+        numbered = _NUMBERED_RE.match(line)
+        if bullet or numbered:
+            kind = 'bullets' if bullet else 'numbered'
+            flush_paragraph()
+            if list_kind != kind:
+                flush_list()
+                list_kind = kind
+            items.append(bullet.group(2) if bullet else numbered.group(3))
+            continue
+
+        if list_kind and line[:1].isspace():
+            # Indented continuation of the previous list item
+            items[-1] += ' ' + stripped
+            continue
+
+        flush_list()
+        paragraph.append(stripped)
+
+    flush_paragraph()
+    flush_list()
+    return tuple(blocks)
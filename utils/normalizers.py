@@ -0,0 +1,178 @@
+"""
+Text Normalizers
+
+Compiled, memoised formatting of titles, questions and names for the
+no-API-key enhancement path and batch cleanup.
+"""
+
+import re
+from functools import lru_cache
+
+
+# Words that stay lowercase in titles (unless they start the title or a subtitle)
+TITLE_SMALL_WORDS = frozenset({
+    'a', 'an', 'and', 'as', 'at', 'but', 'by', 'for', 'in', 'nor', 'of',
+    'on', 'or', 'so', 'the', 'to', 'up', 'yet', 'vs', 'via'
+})
+
+# Acronyms commonly typed in lowercase, mapped to their canonical form
+KNOWN_ACRONYMS = {
+    'ai': 'AI', 'ml': 'ML', 'nlp': 'NLP', 'llm': 'LLM', 'llms': 'LLMs',
+    'dna': 'DNA', 'rna': 'RNA', 'mrna': 'mRNA', 'crispr': 'CRISPR',
+    'covid': 'COVID', 'hiv': 'HIV', 'mri': 'MRI', 'fmri': 'fMRI',
+    'gis': 'GIS', 'iot': 'IoT', 'gdp': 'GDP', 'sme': 'SME', 'smes': 'SMEs',
+    'ngo': 'NGO', 'ngos': 'NGOs', 'uk': 'UK', 'eu': 'EU', 'usa': 'USA',
+}
+
+# Question openers that get a trailing question mark
+QUESTION_OPENERS = (
+    'how', 'what', 'why', 'when', 'where', 'who', 'which', 'can', 'could',
+    'does', 'do', 'is', 'are', 'will', 'should', 'to what extent'
+)
+
+NAME_PREFIXES = {
+    'dr': 'Dr.', 'prof': 'Prof.', 'mr': 'Mr.', 'ms': 'Ms.', 'mrs': 'Mrs.', 'mx': 'Mx.'
+}
+
+NAME_SUFFIXES = {
+    'jr': 'Jr.', 'sr': 'Sr.', 'ii': 'II', 'iii': 'III', 'iv': 'IV',
+    'phd': 'PhD', 'md': 'MD', 'msc': 'MSc'
+}
+
+# Lowercase surname particles (kept lowercase unless first)
+NAME_PARTICLES = frozenset({
+    'van', 'von', 'de', 'der', 'den', 'da', 'di', 'del', 'della', 'du', 'la', 'le', 'dos', 'das'
+})
+
+_LETTERS_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+_SUBTITLE_BREAKS = frozenset(':—–?!')
+_QUESTION_RE = re.compile(r'(?:' + '|'.join(QUESTION_OPENERS) + r')\b', re.IGNORECASE)
+_NAME_PART_RE = re.compile(r"[^\W\d_]+")
+
+
+@lru_cache(maxsize=8192)
+def format_title(title: str) -> str:
+    """
+    Title Case with lowercase small words, preserved acronyms (any length,
+    or known lowercase ones such as "ml"), mixed-case words like "fMRI"
+    left alone, and each part of hyphenated words capitalised.
+    """
+    if not title or len(title.strip()) < 2:
+        return title
+
+    words = title.split()
+
+    # An all-caps title is shouting, not a run of acronyms
+    if len(words) > 1 and title.isupper():
+        words = title.lower().split()
+
+    formatted = []
+    starts_phrase = True
+    for word in words:
+        if word.isalpha():
+            formatted.append(_title_word(word, starts_phrase))
+        else:
+            formatted.append(_title_parts(word, starts_phrase))
+        starts_phrase = word[-1] in _SUBTITLE_BREAKS
+
+    return ' '.join(formatted)
+
+
+@lru_cache(maxsize=8192)
+def _title_word(word: str, starts_phrase: bool) -> str:
+    """Case one run of letters in a title."""
+    lower = word.lower()
+    if lower in KNOWN_ACRONYMS:
+        return KNOWN_ACRONYMS[lower]
+    if len(word) > 1 and (word.isupper() or not word[1:].islower()):
+        return word  # acronym or deliberate mixed case (e.g. fMRI, iPhone)
+    if not starts_phrase and lower in TITLE_SMALL_WORDS:
+        return lower
+    return word[0].upper() + word[1:]
+
+
+def _title_parts(word: str, starts_phrase: bool) -> str:
+    """Case a title word containing hyphens, apostrophes or punctuation."""
+    first = _LETTERS_RE.search(word)
+    if not first:
+        return word
+
+    def case(match):
+        return _title_word(match.group(0), starts_phrase and match.start() == first.start())
+
+    return _LETTERS_RE.sub(case, word)
+
+
+@lru_cache(maxsize=8192)
+def format_question(question: str) -> str:
+    """Capitalise the first letter and end question-like text with '?'."""
+    if not question or len(question.strip()) < 2:
+        return question
+
+    question = question.strip()
+
+    if question[0].islower():
+        question = question[0].upper() + question[1:]
+
+    if _QUESTION_RE.match(question) and not question.endswith('?'):
+        question = question.rstrip('.') + '?'
+
+    return question
+
+
+@lru_cache(maxsize=8192)
+def format_name(name: str) -> str:
+    """
+    Capitalise a personal name, normalising honorifics and suffixes,
+    keeping particles such as "van" lowercase and capitalising each part
+    of hyphenated and apostrophe names (O'Neil, Mary-Jane).
+    """
+    if not name or len(name.strip()) < 2:
+        return name
+
+    words = name.split()
+    formatted = []
+    for i, word in enumerate(words):
+        key = word.lower().rstrip('.,')
+        if key in NAME_PREFIXES and i < len(words) - 1:
+            formatted.append(NAME_PREFIXES[key])
+        elif key in NAME_SUFFIXES and i > 0:
+            formatted.append(NAME_SUFFIXES[key] + (',' if word.endswith(',') else ''))
+        elif i > 0 and word in NAME_PARTICLES:
+            formatted.append(word)
+        elif not word.isupper() and not word[1:].islower() and not word.islower():
+            formatted.append(word)  # deliberate mixed case (e.g. McDonald)
+        else:
+            formatted.append(_NAME_PART_RE.sub(_capitalise_part, word))
+
+    return ' '.join(formatted)
+
+
+def _capitalise_part(match) -> str:
+    """Capitalise one alphabetic part of a name."""
+    part = match.group(0)
+    return part[0].upper() + part[1:].lower()
+
+
+# Input fields normalised by the bulk API
+NORMALIZED_FIELDS = (
+    ('research_title', format_title),
+    ('research_question', format_question),
+    ('researcher_name', format_name),
+)
+
+
+def normalize_record(record: dict) -> dict:
+    """Return a copy of one input record with title, question and name normalised."""
+    normalized = record.copy()
+    for field, formatter in NORMALIZED_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            normalized[field] = formatter(value)
+    return normalized
+
+
+def normalize_records(records: list) -> list:
+    """Normalise a batch of input records; identical values are formatted once."""
+    return [normalize_record(record) for record in records]
+
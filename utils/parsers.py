@@ -0,0 +1,207 @@
+"""
+Response Parsers
+
+Tolerant parsers that turn AI responses into structured proposal data.
+"""
+
+import json
+import re
+
+
+PRIMARY_KEYS = ('primary', 'primary_objective', 'primary_research_objective', 'main_objective', 'objective')
+SUB_OBJECTIVE_KEYS = ('sub_objectives', 'subobjectives', 'specific_objectives', 'secondary_objectives', 'objectives')
+HYPOTHESIS_KEYS = ('hypotheses', 'hypothesis', 'testable_hypotheses')
+ITEM_TEXT_KEYS = ('text', 'objective', 'hypothesis', 'statement', 'description')
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
+_MARKUP_RE = re.compile(r'[*_`#]+')
+_BULLET_RE = re.compile(r'^\s*(?:[-*•+]\s*|\d+[.)]\s+|[a-z][.)]\s+|H\d+\s*[:.)-]\s*)', re.IGNORECASE)
+_LABEL_RE = re.compile(r'^\s*(?:H\d+|Hypothesis\s*\d*)\s*[:.)-]\s*', re.IGNORECASE)
+
+
+def parse_objectives(content: str) -> dict:
+    """
+    Parse an objectives response into primary, sub_objectives and hypotheses.
+    Accepts JSON (optionally fenced or wrapped in prose) or headed lists.
+    Returns an empty dict when nothing usable can be recovered.
+    """
+    if not content or not content.strip():
+        return {}
+
+    objectives = _parse_json_objectives(content)
+    if not objectives:
+        objectives = _parse_list_objectives(content)
+
+    if not objectives.get('primary') or not objectives.get('sub_objectives'):
+        return {}
+
+    return objectives
+
+
+def _parse_json_objectives(content: str) -> dict:
+    """Parse objectives from a JSON object anywhere in the response."""
+    candidates = _FENCE_RE.findall(content) + [content]
+
+    for candidate in candidates:
+        data = _load_json_object(candidate)
+        if not data:
+            continue
+
+        data = {_normalise_key(key): value for key, value in data.items()}
+        primary = _first_value(data, PRIMARY_KEYS)
+        if isinstance(primary, list):
+            primary = primary[0] if primary else ''
+
+        return {
+            'primary': _item_text(primary),
+            'sub_objectives': _item_list(_first_value(data, SUB_OBJECTIVE_KEYS)),
+            'hypotheses': _item_list(_first_value(data, HYPOTHESIS_KEYS)),
+        }
+
+    return {}
+
+
+def _load_json_object(text: str) -> dict:
+    """Load the first JSON object in text, repairing simple truncation."""
+    start = text.find('{')
+    if start == -1:
+        return {}
+
+    for candidate in _json_object_candidates(text[start:].rstrip().rstrip(',')):
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+
+    return {}
+
+
+def _json_object_candidates(body: str) -> list:
+    """
+    Candidate texts for the JSON object at the start of body: the object
+    itself if it closes, else repairs of a reply cut off by the max_tokens
+    limit. A cut-off reply is closed as it stands, unless it ends inside a
+    string; then it is cut back to its last complete item, so an unfinished
+    item is dropped rather than kept as a fragment.
+    """
+    closers = []
+    in_string = escaped = False
+    last_item = None
+
+    for index, char in enumerate(body):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            closers.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if closers:
+                closers.pop()
+            if not closers:
+                return [body[:index + 1]]
+        elif char == ',':
+            last_item = (index, ''.join(reversed(closers)))
+
+    candidates = []
+    if not in_string:
+        candidates.append(body + ''.join(reversed(closers)))
+    if last_item:
+        index, closing = last_item
+        candidates.append(body[:index] + closing)
+    return candidates
+
+
+def _parse_list_objectives(content: str) -> dict:
+    """Parse objectives from headed bullet or numbered lists."""
+    objectives = {'primary': '', 'sub_objectives': [], 'hypotheses': []}
+    current = None
+
+    for raw_line in content.splitlines():
+        line = _MARKUP_RE.sub('', raw_line).strip()
+        if not line:
+            continue
+
+        heading, _, rest = line.partition(':')
+        section = _heading_section(_BULLET_RE.sub('', heading))
+        if section and len(heading) < 60:
+            current = section
+            line = rest.strip()
+            if not line:
+                continue
+        elif current == 'hypotheses' or _LABEL_RE.match(line):
+            line = _LABEL_RE.sub('', line)
+
+        text = _clean_item(line)
+        if not text or current is None:
+            continue
+
+        if current == 'primary':
+            if not objectives['primary']:
+                objectives['primary'] = text
+        else:
+            objectives[current].append(text)
+
+    return objectives
+
+
+def _heading_section(heading: str) -> str:
+    """Map a heading line to an objectives key, or '' if it is not a heading."""
+    heading = heading.strip().lower()
+    if not heading or len(heading.split()) > 6:
+        return ''
+    if 'hypothes' in heading:
+        return 'hypotheses'
+    if 'sub' in heading or 'specific' in heading or 'secondary' in heading:
+        return 'sub_objectives'
+    if 'primary' in heading or 'main' in heading or 'overall' in heading:
+        return 'primary'
+    return ''
+
+
+def _normalise_key(key) -> str:
+    """Normalise a JSON key to snake case."""
+    return re.sub(r'[^a-z0-9]+', '_', str(key).lower()).strip('_')
+
+
+def _first_value(data: dict, keys: tuple):
+    """Return the value of the first key present in data."""
+    for key in keys:
+        if key in data:
+            return data[key]
+    return None
+
+
+def _item_text(item) -> str:
+    """Extract display text from a string or dict item."""
+    if isinstance(item, dict):
+        item = _first_value({_normalise_key(k): v for k, v in item.items()}, ITEM_TEXT_KEYS)
+    if item is None:
+        return ''
+    return _clean_item(str(item))
+
+
+def _item_list(value) -> list:
+    """Normalise a string or list value into a list of item strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [line for line in value.splitlines() if line.strip()]
+    if not isinstance(value, list):
+        value = [value]
+    return [text for text in (_item_text(item) for item in value) if text]
+
+
+def _clean_item(text: str) -> str:
+    """Strip bullets, labels and markup from a single item."""
+    text = _MARKUP_RE.sub('', text)
+    text = _BULLET_RE.sub('', text)
+    text = _LABEL_RE.sub('', text)
+    return text.strip().strip('"').strip()
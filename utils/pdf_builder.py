@@ -10,22 +10,233 @@ from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, PageBreak,
-    Table, TableStyle, Image
+    Table, TableStyle, Image, Flowable
 )
+from reportlab.pdfgen import canvas
 from reportlab.lib import colors
+from reportlab.pdfbase.pdfdoc import TimeStamp
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from datetime import datetime
+from functools import lru_cache, partial
 from pathlib import Path
+import calendar
+import hashlib
+import json
+import time
+
+from utils.flowables import ReferenceList
+from utils.fonts import font_runs
+from utils.markup import inline_markup, markdown_blocks
+from utils.references import format_bibliography, normalise_style
+from utils.validation import format_budget
+
+
+TOC_FORM_NAME = 'proposalTableOfContents'
+
+
+class ProposalDocTemplate(SimpleDocTemplate):
+    """Document template that records section headings as they are laid out."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize template with an empty heading log."""
+        super().__init__(*args, **kwargs)
+        self.toc = None
+        self.toc_entries = []
+        self.page_count = 0
+
+    def afterFlowable(self, flowable):
+        """Bookmark section headings and cache their page numbers."""
+        self.page_count = self.page
+
+        title = getattr(flowable, '_toc_title', None)
+        if not title:
+            return
+
+        key = f"section-{len(self.toc_entries)}"
+        self.canv.bookmarkPage(key)
+        self.canv.addOutlineEntry(getattr(flowable, '_outline_title', title), key, level=0)
+        self.toc_entries.append((title, self.page))
+
+    def draw_toc(self, canv):
+        """Draw the table of contents form once every heading has a page number."""
+        if self.toc is None or self.toc.layout is None:
+            return
+
+        canv.beginForm(TOC_FORM_NAME)
+        self.toc.layout.draw(canv, [page for _, page in self.toc_entries])
+        canv.endForm()
+
+
+class FixedTimeStamp(TimeStamp):
+    """PDF creation timestamp pinned to a given (UTC) datetime."""
+
+    def __init__(self, when: datetime):
+        """Initialize timestamp from a naive UTC datetime."""
+        super().__init__(invariant=True)
+        self.t = calendar.timegm(when.timetuple())
+        self.lt = time.gmtime(self.t)
+        self.YMDhms = tuple(self.lt)[:6]
+
+
+class ProposalCanvas(canvas.Canvas):
+    """Canvas that fills in deferred forms before saving."""
+
+    def __init__(self, *args, on_save=None, timestamp=None, document_id=None, **kwargs):
+        """
+        Initialize canvas with an optional pre-save callback. A timestamp
+        and document ID (hex) replace the wall-clock date and random PDF ID.
+        """
+        super().__init__(*args, **kwargs)
+        self._on_save = on_save
+
+        if timestamp is not None:
+            self._doc._timeStamp = FixedTimeStamp(timestamp)
+        if document_id is not None:
+            self._doc._ID = f"\n[<{document_id}><{document_id}>]\n".encode('ascii')
+
+    def save(self):
+        """Run the pre-save callback, then write the PDF."""
+        if self._on_save:
+            self._on_save(self)
+        super().save()
+
+
+class TOCLayout:
+    """
+    Table of contents rows measured once per set of titles, width and style.
+    Only the dot leaders and page numbers are laid out per document.
+    """
+
+    ROW_PADDING = 3
+
+    def __init__(self, titles: tuple, width: float, style: ParagraphStyle):
+        """Measure one single-line row per title."""
+        self.width = width
+        self.style = style
+        self.dot_width = stringWidth(' . ', style.fontName, style.fontSize)
+
+        row_height = style.leading + 2 * self.ROW_PADDING
+        self.height = row_height * len(titles)
+
+        self.rows = []
+        for index, title in enumerate(titles):
+            runs = font_runs(title, style.fontName)
+            title_width = sum(stringWidth(text, font, style.fontSize) for text, font in runs)
+            baseline = self.height - index * row_height - self.ROW_PADDING - style.fontSize
+            self.rows.append((baseline, runs, title_width))
+
+    def draw(self, canv, pages: list) -> None:
+        """Draw titles, dot leaders and right-aligned page numbers."""
+        style = self.style
+        text = canv.beginText()
+        text.setFillColor(style.textColor)
+
+        for (baseline, runs, title_width), page in zip(self.rows, pages):
+            text.setTextOrigin(0, baseline)
+            for run_text, font in runs:
+                text.setFont(font, style.fontSize, style.leading)
+                text.textOut(run_text)
+
+            page_text = str(page)
+            page_width = stringWidth(page_text, style.fontName, style.fontSize)
+            dots = max(int((self.width - title_width - page_width) / self.dot_width), 0)
+            text.setTextOrigin(self.width - dots * self.dot_width - page_width, baseline)
+            text.setFont(style.fontName, style.fontSize, style.leading)
+            text.textOut(' . ' * dots + page_text)
+
+        canv.drawText(text)
+
+
+@lru_cache(maxsize=64)
+def toc_layout(titles: tuple, width: float, style: ParagraphStyle) -> TOCLayout:
+    """Shared table of contents layout (styles come from the process-wide stylesheet)."""
+    return TOCLayout(titles, width, style)
+
+
+class TOCPlaceholder(Flowable):
+    """
+    Reserves space for the table of contents and references its form.
+    The form is drawn after layout, so the document is laid out only once.
+    """
+
+    def __init__(self, titles: list, style: ParagraphStyle):
+        """Initialize placeholder for the known section titles."""
+        super().__init__()
+        self.titles = tuple(titles)
+        self.style = style
+        self.layout = None
+
+    def wrap(self, availWidth, availHeight):
+        """Look up the cached layout for the titles at this width."""
+        self.layout = toc_layout(self.titles, availWidth, self.style)
+        self.width, self.height = availWidth, self.layout.height
+        return self.width, self.height
+
+    def draw(self):
+        """Reference the table of contents form."""
+        self.canv.doForm(TOC_FORM_NAME)
+
+
+def proposal_content_hash(data: dict) -> str:
+    """SHA-256 of proposal data; identical data renders identical PDFs in deterministic mode."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _generated_at(metadata: dict) -> datetime:
+    """Generation time recorded in the metadata, or now."""
+    if metadata.get('generated'):
+        return datetime.fromisoformat(metadata['generated'])
+    return datetime.now()
+
+
+@lru_cache(maxsize=256)
+def _cover_markup(proposal_type: str, institution: str, field: str) -> tuple:
+    """Escaped cover page markup shared across builds: (type, institution, field)."""
+    return (
+        f"<i>{inline_markup(proposal_type)}</i>",
+        inline_markup(institution or 'Research Institution'),
+        f"Field: {inline_markup(field)}",
+    )
+
+
+def _cover_fragments(styles, proposal_type: str, institution: str, field: str, month: str) -> tuple:
+    """
+    Cover page flowables built from the cached markup: (type block,
+    institution/field/date block). Flowables are new for every document,
+    since layout sets attributes such as canv on them.
+    """
+    type_markup, institution_markup, field_markup = _cover_markup(proposal_type, institution, field)
+    type_block = (
+        Paragraph(type_markup, styles['Metadata']),
+        Spacer(1, 1*inch),
+    )
+    details_block = (
+        Paragraph(institution_markup, styles['Metadata']),
+        Paragraph(field_markup, styles['Metadata']),
+        Spacer(1, 0.5*inch),
+        Paragraph(month, styles['Metadata']),
+    )
+    return type_block, details_block
 
 
 class PDFBuilder:
     """Build professional research proposal PDFs."""
 
+    _shared_styles = None
+
     def __init__(self, template: dict):
         """Initialize PDF builder with template."""
         self.template = template
         self.page_count = 0
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.content_hash = None
+
+        # Styles are identical for every builder, so one stylesheet is shared
+        if PDFBuilder._shared_styles is None:
+            self.styles = getSampleStyleSheet()
+            self._setup_custom_styles()
+            PDFBuilder._shared_styles = self.styles
+        self.styles = PDFBuilder._shared_styles
 
     def _setup_custom_styles(self):
         """Setup custom paragraph styles."""
@@ -46,9 +257,10 @@ class PDFBuilder:
             parent=self.styles['Heading2'],
             fontSize=14,
             textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
+            spaceAfter=12 + 0.1*inch,
             spaceBefore=12,
-            fontName='Helvetica-Bold'
+            fontName='Helvetica-Bold',
+            keepWithNext=1
         ))
 
         # Subsection heading
@@ -59,7 +271,8 @@ class PDFBuilder:
             textColor=colors.HexColor('#34495e'),
             spaceAfter=8,
             spaceBefore=8,
-            fontName='Helvetica-Bold'
+            fontName='Helvetica-Bold',
+            keepWithNext=1
         ))
 
         # Body text
@@ -81,27 +294,71 @@ class PDFBuilder:
             spaceAfter=6
         ))
 
-    def create_proposal(self, data: dict, output_path: Path):
-        """Create complete research proposal PDF."""
-        # Create document
-        doc = SimpleDocTemplate(
+        # Reference list entry (hanging indent applied by ReferenceList)
+        self.styles.add(ParagraphStyle(
+            name='Reference',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            leading=13,
+            spaceAfter=4
+        ))
+
+        # List item (bullet or number hangs in the left indent)
+        self.styles.add(ParagraphStyle(
+            name='ListItem',
+            parent=self.styles['CustomBody'],
+            alignment=TA_LEFT,
+            leftIndent=18,
+            bulletIndent=4,
+            spaceAfter=6
+        ))
+
+        # Table of contents entry
+        self.styles.add(ParagraphStyle(
+            name='TOCEntry',
+            parent=self.styles['Normal'],
+            fontSize=11,
+            leading=16,
+            spaceAfter=4
+        ))
+
+    def create_proposal(self, data: dict, output_path: Path, deterministic: bool = False):
+        """
+        Create complete research proposal PDF. In deterministic mode the
+        creation date comes from the metadata and the PDF ID from the content
+        hash, so the same data always produces the same bytes.
+        """
+        metadata = data['metadata']
+        if deterministic and not metadata.get('generated'):
+            raise ValueError("Deterministic rendering needs the generation time in metadata['generated']")
+        self.content_hash = proposal_content_hash(data)
+
+        # Create document (metadata is written to the PDF info dictionary)
+        doc = ProposalDocTemplate(
             str(output_path),
             pagesize=letter,
             rightMargin=1*inch,
             leftMargin=1*inch,
             topMargin=1*inch,
-            bottomMargin=1*inch
+            bottomMargin=1*inch,
+            title=metadata['title'],
+            author=metadata['researcher'],
+            subject=f"{metadata['proposal_type']} - {metadata['field']}",
+            keywords=[metadata['field'], metadata['proposal_type']],
+            creator='Research Proposal Generator',
+            pageCompression=1,
+            invariant=1 if deterministic else None
         )
 
         # Build content
         story = []
 
         # Cover page
-        story.extend(self._create_cover_page(data['metadata']))
+        story.extend(self._create_cover_page(metadata))
         story.append(PageBreak())
 
-        # Table of contents
-        story.extend(self._create_toc())
+        # Table of contents (filled in once section pages are known)
+        toc_index = len(story)
         story.append(PageBreak())
 
         # Executive summary
@@ -161,66 +418,63 @@ class PDFBuilder:
         if data['sections'].get('references'):
             story.extend(self._create_references_section(
                 data['sections']['references'],
-                data['metadata']['citation_format']
+                metadata['citation_format']
             ))
 
+        # Table of contents lists only the sections actually present
+        titles = [f._outline_title for f in story if getattr(f, '_toc_title', None)]
+        doc.toc = TOCPlaceholder(titles, self.styles['TOCEntry'])
+        story[toc_index:toc_index] = self._create_toc(doc.toc)
+
         # Build PDF
-        doc.build(story)
-        self.page_count = len(story) // 10  # Rough estimate
+        canvasmaker = partial(ProposalCanvas, on_save=doc.draw_toc)
+        if deterministic:
+            canvasmaker = partial(
+                canvasmaker,
+                timestamp=_generated_at(metadata),
+                document_id=self.content_hash[:32]
+            )
+        doc.build(story, canvasmaker=canvasmaker)
+        self.page_count = doc.page_count
 
     def _create_cover_page(self, metadata: dict) -> list:
         """Create cover page."""
         story = []
 
+        # Blocks built from markup cached per proposal type, institution and field
+        type_block, details_block = _cover_fragments(
+            self.styles,
+            metadata['proposal_type'],
+            metadata['institution'],
+            metadata['field'],
+            _generated_at(metadata).strftime("%B %Y")
+        )
+
         # Add spacing from top
         story.append(Spacer(1, 1.5*inch))
 
         # Title
         title = Paragraph(
-            metadata['title'],
+            inline_markup(metadata['title']),
             self.styles['CustomTitle']
         )
         story.append(title)
         story.append(Spacer(1, 0.5*inch))
 
         # Proposal type
-        proposal_type = Paragraph(
-            f"<i>{metadata['proposal_type']}</i>",
-            self.styles['Metadata']
-        )
-        story.append(proposal_type)
-        story.append(Spacer(1, 1*inch))
+        story.extend(type_block)
 
-        # Researcher info
+        # Researcher info, institution, field and date
         researcher = Paragraph(
-            f"<b>{metadata['researcher']}</b>",
+            f"<b>{inline_markup(metadata['researcher'])}</b>",
             self.styles['Metadata']
         )
         story.append(researcher)
-
-        institution = Paragraph(
-            metadata['institution'] if metadata['institution'] else 'Research Institution',
-            self.styles['Metadata']
-        )
-        story.append(institution)
-
-        field = Paragraph(
-            f"Field: {metadata['field']}",
-            self.styles['Metadata']
-        )
-        story.append(field)
-        story.append(Spacer(1, 0.5*inch))
-
-        # Date
-        date = Paragraph(
-            datetime.now().strftime("%B %Y"),
-            self.styles['Metadata']
-        )
-        story.append(date)
+        story.extend(details_block)
 
         return story
 
-    def _create_toc(self) -> list:
+    def _create_toc(self, toc: TOCPlaceholder) -> list:
         """Create table of contents."""
         story = []
 
@@ -228,23 +482,31 @@ class PDFBuilder:
             "Table of Contents",
             self.styles['SectionHeading']
         ))
-        story.append(Spacer(1, 0.2*inch))
-
-        toc_items = [
-            "1. Executive Summary",
-            "2. Introduction & Background",
-            "3. Literature Review",
-            "4. Research Questions and Objectives",
-            "5. Methodology",
-            "6. Expected Outcomes and Impact",
-            "7. Timeline",
-            "8. Budget Breakdown",
-            "9. References"
-        ]
-
-        for item in toc_items:
-            story.append(Paragraph(item, self.styles['CustomBody']))
-            story.append(Spacer(1, 0.1*inch))
+        story.append(Spacer(1, 0.1*inch))
+        story.append(toc)
+
+        return story
+
+    def _section_heading(self, title: str) -> Paragraph:
+        """Create a section heading that is listed in the table of contents."""
+        heading = Paragraph(inline_markup(title), self.styles['SectionHeading'])
+        heading._toc_title = inline_markup(title)
+        heading._outline_title = title
+        return heading
+
+    def _create_text_flowables(self, content: str) -> list:
+        """Convert plain or markdown text into safe body flowables."""
+        story = []
+
+        for kind, payload in markdown_blocks(content):
+            if kind == 'heading':
+                story.append(Paragraph(payload, self.styles['SubsectionHeading']))
+            elif kind == 'paragraph':
+                story.append(Paragraph(payload, self.styles['CustomBody']))
+            else:
+                for i, item in enumerate(payload, 1):
+                    bullet = f"{i}." if kind == 'numbered' else '•'
+                    story.append(Paragraph(item, self.styles['ListItem'], bulletText=bullet))
 
         return story
 
@@ -253,14 +515,10 @@ class PDFBuilder:
         story = []
 
         # Section title
-        story.append(Paragraph(title, self.styles['SectionHeading']))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading(title))
 
-        # Content - split into paragraphs
-        paragraphs = content.split('\n\n')
-        for para in paragraphs:
-            if para.strip():
-                story.append(Paragraph(para.strip(), self.styles['CustomBody']))
+        # Content - paragraphs, sub-headings and lists
+        story.extend(self._create_text_flowables(content))
 
         return story
 
@@ -268,21 +526,14 @@ class PDFBuilder:
         """Create introduction section."""
         story = []
 
-        story.append(Paragraph(
-            "Introduction & Background",
-            self.styles['SectionHeading']
-        ))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading("Introduction & Background"))
 
         # Problem Statement
         story.append(Paragraph(
             "Problem Statement",
             self.styles['SubsectionHeading']
         ))
-        story.append(Paragraph(
-            intro_data['problem_statement'],
-            self.styles['CustomBody']
-        ))
+        story.extend(self._create_text_flowables(intro_data['problem_statement']))
 
         # Research Gap
         story.append(Paragraph(
@@ -299,10 +550,7 @@ class PDFBuilder:
             "Significance",
             self.styles['SubsectionHeading']
         ))
-        story.append(Paragraph(
-            intro_data['significance'],
-            self.styles['CustomBody']
-        ))
+        story.extend(self._create_text_flowables(intro_data['significance']))
 
         return story
 
@@ -310,11 +558,7 @@ class PDFBuilder:
         """Create research objectives section."""
         story = []
 
-        story.append(Paragraph(
-            "Research Questions and Objectives",
-            self.styles['SectionHeading']
-        ))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading("Research Questions and Objectives"))
 
         # Primary objective
         story.append(Paragraph(
@@ -322,7 +566,7 @@ class PDFBuilder:
             self.styles['SubsectionHeading']
         ))
         story.append(Paragraph(
-            objectives['primary'],
+            inline_markup(objectives['primary']),
             self.styles['CustomBody']
         ))
 
@@ -334,7 +578,7 @@ class PDFBuilder:
 
         for i, obj in enumerate(objectives['sub_objectives'], 1):
             story.append(Paragraph(
-                f"{i}. {obj}",
+                f"{i}. {inline_markup(obj)}",
                 self.styles['CustomBody']
             ))
 
@@ -346,7 +590,7 @@ class PDFBuilder:
             ))
             for i, hyp in enumerate(objectives['hypotheses'], 1):
                 story.append(Paragraph(
-                    f"H{i}: {hyp}",
+                    f"H{i}: {inline_markup(hyp)}",
                     self.styles['CustomBody']
                 ))
 
@@ -356,11 +600,7 @@ class PDFBuilder:
         """Create timeline section with table."""
         story = []
 
-        story.append(Paragraph(
-            "Project Timeline",
-            self.styles['SectionHeading']
-        ))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading("Project Timeline"))
 
         # Create timeline table with Paragraph objects for proper wrapping
         table_data = [['Phase', 'Activities', 'Duration']]
@@ -405,14 +645,11 @@ class PDFBuilder:
         """Create budget breakdown section."""
         story = []
 
-        story.append(Paragraph(
-            "Budget Breakdown",
-            self.styles['SectionHeading']
-        ))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading("Budget Breakdown"))
 
+        currency = budget_data.get('currency', 'USD')
         story.append(Paragraph(
-            f"<b>Total Budget:</b> ${budget_data['total']:,.2f}",
+            f"<b>Total Budget:</b> {format_budget(budget_data['total'], currency)}",
             self.styles['CustomBody']
         ))
         story.append(Spacer(1, 0.15*inch))
@@ -430,7 +667,7 @@ class PDFBuilder:
         for item in budget_data['categories']:
             table_data.append([
                 Paragraph(item['name'], cell_style),
-                Paragraph(f"${item['amount']:,.2f}", cell_style),
+                Paragraph(format_budget(item['amount'], currency), cell_style),
                 Paragraph(f"{item['percentage']}%", cell_style)
             ])
 
@@ -459,22 +696,25 @@ class PDFBuilder:
         """Create references section."""
         story = []
 
-        story.append(Paragraph(
-            "References",
-            self.styles['SectionHeading']
-        ))
-        story.append(Spacer(1, 0.1*inch))
+        story.append(self._section_heading("References"))
+
+        # Fall back to the field's citation style when no format is given
+        style = normalise_style(
+            format or self.template.get('formatting', {}).get('citation_style', 'APA')
+        )
 
         story.append(Paragraph(
-            f"<i>Citation Format: {format}</i>",
+            f"<i>Citation Format: {style}</i>",
             self.styles['CustomBody']
         ))
         story.append(Spacer(1, 0.1*inch))
 
-        # Split references by lines
-        ref_lines = references.split('\n')
-        for ref in ref_lines:
-            if ref.strip():
-                story.append(Paragraph(ref.strip(), self.styles['CustomBody']))
+        # Parse (BibTeX, RIS or plain text), deduplicate and format, then lay
+        # the whole list out as one splittable block
+        story.append(ReferenceList(
+            format_bibliography(references, style),
+            self.styles['Reference'],
+            hanging_indent=0.35*inch
+        ))
 
         return story
@@ -0,0 +1,60 @@
+"""
+PDF Optimizer
+
+Optional post-processing of generated PDFs for web delivery.
+"""
+
+import os
+import time
+from pathlib import Path
+
+
+def optimize_pdf(pdf_path: Path, linearize: bool = True) -> dict:
+    """
+    Pack objects into compressed object streams, drop unreferenced
+    resources and optionally linearise the PDF in place so browsers can show
+    the first page before the whole file arrives. Requires pikepdf; without
+    it the file is left untouched.
+    Returns a report with size before/after and stage latency.
+    """
+    pdf_path = Path(pdf_path)
+    report = {
+        'size_before': pdf_path.stat().st_size,
+        'size_after': pdf_path.stat().st_size,
+        'seconds': 0.0,
+        'linearized': False,
+        'optimized': False,
+    }
+
+    try:
+        import pikepdf
+    except ImportError:
+        print("⚠️  pikepdf not installed, skipping PDF optimisation")
+        return report
+
+    start = time.perf_counter()
+    tmp_path = pdf_path.with_name(pdf_path.name + '.tmp')
+    try:
+        with pikepdf.open(pdf_path) as pdf:
+            pdf.remove_unreferenced_resources()
+            pdf.save(
+                tmp_path,
+                linearize=linearize,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                compress_streams=True,
+                recompress_flate=True,
+                deterministic_id=True
+            )
+        os.replace(tmp_path, pdf_path)
+    except Exception as e:
+        print(f"⚠️  PDF optimisation failed: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return report
+
+    report.update({
+        'size_after': pdf_path.stat().st_size,
+        'seconds': round(time.perf_counter() - start, 4),
+        'linearized': linearize,
+        'optimized': True,
+    })
+    return report
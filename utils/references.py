@@ -0,0 +1,531 @@
+"""
+Reference Engine
+
+Streams BibTeX, RIS and plain-text bibliographies, deduplicates them and
+formats entries in APA, MLA, IEEE or Vancouver style.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+
+SUPPORTED_STYLES = ('APA', 'MLA', 'IEEE', 'Vancouver')
+
+# Styles that number entries in order of appearance instead of sorting by author
+NUMBERED_STYLES = ('IEEE', 'Vancouver')
+
+REFERENCE_FILE_SUFFIXES = ('.bib', '.ris', '.txt')
+
+RIS_TAGS = {
+    'TY': 'type',
+    'AU': 'author', 'A1': 'author', 'A2': 'author',
+    'TI': 'title', 'T1': 'title',
+    'JO': 'journal', 'JF': 'journal', 'JA': 'journal', 'T2': 'journal',
+    'PY': 'year', 'Y1': 'year', 'DA': 'year',
+    'VL': 'volume',
+    'IS': 'number',
+    'SP': 'start_page',
+    'EP': 'end_page',
+    'DO': 'doi',
+    'PB': 'publisher',
+    'UR': 'url',
+}
+
+BIBTEX_FIELDS = {
+    'author': 'author',
+    'editor': 'editor',
+    'title': 'title',
+    'journal': 'journal',
+    'journaltitle': 'journal',
+    'booktitle': 'journal',
+    'year': 'year',
+    'date': 'year',
+    'volume': 'volume',
+    'number': 'number',
+    'issue': 'number',
+    'pages': 'pages',
+    'doi': 'doi',
+    'publisher': 'publisher',
+    'url': 'url',
+}
+
+_RIS_LINE_RE = re.compile(r'^([A-Z][A-Z0-9])  -\s?(.*)$')
+_BIBTEX_START_RE = re.compile(r'^\s*@(\w+)\s*[{(]')
+_BIBTEX_FIELD_RE = re.compile(r'(\w+)\s*=\s*')
+_YEAR_RE = re.compile(r'\d{4}')
+_SPACE_RE = re.compile(r'\s+')
+_TITLE_KEY_RE = re.compile(r'[^a-z0-9]+')
+_LATEX_RE = re.compile(r'[{}]|\\[a-zA-Z]+\s*')
+
+
+def load_references(value: str, allowed_dirs=()) -> str:
+    """
+    Return reference text, reading it from disk when value is the path of a
+    reference file inside one of allowed_dirs (relative paths resolve
+    against the first). Raises ValueError for a path outside them.
+    """
+    value = value or ''
+    candidate = value.strip()
+    if '\n' in candidate or not candidate.lower().endswith(REFERENCE_FILE_SUFFIXES):
+        return value
+
+    roots = [Path(directory).resolve() for directory in allowed_dirs if directory]
+    path = Path(candidate).expanduser()
+    if not path.is_absolute():
+        if not roots:
+            return value
+        path = roots[0] / path
+
+    # Resolving follows symlinks and '..', so neither can leave the allowed directories
+    path = path.resolve()
+    if not any(path.is_relative_to(root) for root in roots):
+        raise ValueError(f"Reference file {candidate!r} is outside the allowed reference directories")
+    if not path.is_file():
+        return value
+
+    return path.read_text(encoding='utf-8', errors='replace')
+
+
+def iter_references(lines):
+    """
+    Stream reference entries from text or an iterable of lines.
+    The format (BibTeX, RIS or one reference per line) is detected from
+    the first non-blank line.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+
+    lines = iter(lines)
+    for first in lines:
+        if first.strip():
+            break
+    else:
+        return
+
+    if _BIBTEX_START_RE.match(first) or first.lstrip().startswith('%'):
+        parser = _iter_bibtex
+    elif _RIS_LINE_RE.match(first.rstrip()):
+        parser = _iter_ris
+    else:
+        parser = _iter_plain
+
+    yield from parser(_chain_first(first, lines))
+
+
+def unique_references(entries):
+    """Drop entries whose DOI or normalised title has already been seen."""
+    seen = set()
+    for entry in entries:
+        key = reference_key(entry)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield entry
+
+
+def reference_key(entry: dict) -> str:
+    """Deduplication key: DOI when present, otherwise a hash of the title."""
+    doi = entry.get('doi', '').strip().lower()
+    if doi:
+        return 'doi:' + doi.removeprefix('https://doi.org/')
+
+    text = entry.get('title') or entry.get('raw', '')
+    normalised = _TITLE_KEY_RE.sub(' ', text.lower()).strip()
+    return 'title:' + hashlib.sha1(normalised.encode('utf-8')).hexdigest()
+
+
+def format_bibliography(references, style: str = 'APA') -> list:
+    """
+    Parse, deduplicate and format a bibliography.
+    Returns reportlab-safe markup strings, numbered for IEEE/Vancouver and
+    sorted by author for APA/MLA. Plain-text references are already
+    formatted, so they keep their given order and are not numbered.
+    """
+    style = normalise_style(style)
+    entries = list(unique_references(iter_references(references)))
+    plain = any('raw' in entry for entry in entries)
+
+    if style not in NUMBERED_STYLES and not plain:
+        entries.sort(key=_sort_key)
+
+    formatted = []
+    for number, entry in enumerate(entries, 1):
+        text = format_reference(entry, style)
+        if plain:
+            formatted.append(text)
+            continue
+        if style == 'IEEE':
+            text = f"[{number}] {text}"
+        elif style == 'Vancouver':
+            text = f"{number}. {text}"
+        formatted.append(text)
+
+    return formatted
+
+
+def normalise_style(style: str) -> str:
+    """Map a citation format name onto a supported style (default APA)."""
+    for supported in SUPPORTED_STYLES:
+        if (style or '').strip().lower() == supported.lower():
+            return supported
+    return 'APA'
+
+
+def format_reference(entry: dict, style: str) -> str:
+    """Format a single entry, caching the result per entry and style."""
+    return _format_cached(tuple(sorted(entry.items())), style)
+
+
+@lru_cache(maxsize=16384)
+def _format_cached(fields: tuple, style: str) -> str:
+    """Format a frozen entry in the given style."""
+    entry = dict(fields)
+    if 'raw' in entry:
+        return escape(entry['raw'])
+
+    authors = _split_authors(entry.get('author') or entry.get('editor', ''))
+    title = escape(_clean(entry.get('title', '')))
+    journal = escape(_clean(entry.get('journal', '')))
+    publisher = escape(_clean(entry.get('publisher', '')))
+    year = entry.get('year', '')
+    volume = escape(entry.get('volume', ''))
+    number = escape(entry.get('number', ''))
+    pages = escape(_pages(entry))
+    doi = escape(entry.get('doi', ''))
+
+    if style == 'MLA':
+        text = f"{_mla_authors(authors)}. " if authors else ''
+        if journal:
+            text += f'"{_terminate(title, "")}." <i>{journal}</i>'
+            if volume:
+                text += f", vol. {volume}"
+            if number:
+                text += f", no. {number}"
+            if year:
+                text += f", {year}"
+            if pages:
+                text += f", pp. {pages}"
+        else:
+            text += f"<i>{title}</i>"
+            if publisher:
+                text += f". {publisher}"
+            if year:
+                text += f", {year}"
+        return text + '.'
+
+    if style == 'IEEE':
+        text = f"{_ieee_authors(authors)}, " if authors else ''
+        if journal:
+            text += f'"{title}," <i>{journal}</i>'
+            if volume:
+                text += f", vol. {volume}"
+            if number:
+                text += f", no. {number}"
+            if pages:
+                text += f", pp. {pages}"
+        else:
+            text += f"<i>{title}</i>"
+            if publisher:
+                text += f". {publisher}"
+        if year:
+            text += f", {year}"
+        if doi:
+            text += f", doi: {doi}"
+        return text + '.'
+
+    if style == 'Vancouver':
+        text = f"{_vancouver_authors(authors)}. " if authors else ''
+        text += _terminate(title, '.')
+        if journal:
+            text += f" {journal}. {year}"
+            if volume:
+                text += f";{volume}"
+            if number:
+                text += f"({number})"
+            if pages:
+                text += f":{pages}"
+            text += '.'
+        else:
+            if publisher:
+                text += f" {publisher};"
+            if year:
+                text += f" {year}."
+        if doi:
+            text += f" doi:{doi}"
+        return text
+
+    # APA
+    text = f"{_apa_authors(authors)} " if authors else ''
+    text += f"({year or 'n.d.'}). "
+    if journal:
+        text += f"{_terminate(title, '.')} <i>{journal}</i>"
+        if volume:
+            text += f", <i>{volume}</i>"
+        if number:
+            text += f"({number})"
+        if pages:
+            text += f", {pages}"
+        text += '.'
+    else:
+        text += f"<i>{title}</i>" + ('' if title[-1:] in '.?!' else '.')
+        if publisher:
+            text += f" {publisher}."
+    if doi:
+        text += f" https://doi.org/{doi.removeprefix('https://doi.org/')}"
+    return text
+
+
+def _iter_bibtex(lines):
+    """Stream entries from BibTeX, one @entry at a time."""
+    buffer = []
+    depth = 0
+    in_entry = False
+    opener = closer = '{'
+
+    for line in lines:
+        if not in_entry:
+            match = _BIBTEX_START_RE.match(line)
+            if not match:
+                continue
+            in_entry = True
+            buffer = []
+            depth = 0
+            opener = line[match.end() - 1]
+            closer = '}' if opener == '{' else ')'
+
+        buffer.append(line)
+        depth += line.count(opener) - line.count(closer)
+        if depth <= 0:
+            in_entry = False
+            entry = _parse_bibtex_entry(' '.join(buffer))
+            if entry:
+                yield entry
+
+    if in_entry and buffer:
+        entry = _parse_bibtex_entry(' '.join(buffer))
+        if entry:
+            yield entry
+
+
+def _parse_bibtex_entry(text: str) -> dict:
+    """Parse the fields of a single BibTeX entry."""
+    match = _BIBTEX_START_RE.match(text)
+    entry_type = match.group(1).lower()
+    if entry_type in ('comment', 'preamble', 'string'):
+        return {}
+
+    # Skip the citation key
+    position = text.find(',', match.end())
+    if position == -1:
+        return {}
+
+    entry = {'type': entry_type}
+    length = len(text)
+    position += 1
+
+    while position < length:
+        field = _BIBTEX_FIELD_RE.search(text, position)
+        if not field:
+            break
+        position = field.end()
+        value, position = _read_bibtex_value(text, position)
+
+        key = BIBTEX_FIELDS.get(field.group(1).lower())
+        if key and value:
+            entry[key] = _SPACE_RE.sub(' ', value).strip()
+
+    if 'year' in entry:
+        year = _YEAR_RE.search(entry['year'])
+        entry['year'] = year.group(0) if year else entry['year']
+
+    return entry if entry.get('title') else {}
+
+
+def _read_bibtex_value(text: str, position: int) -> tuple:
+    """Read a braced, quoted or bare BibTeX value starting at position."""
+    length = len(text)
+    if position >= length:
+        return '', position
+
+    opener = text[position]
+    if opener == '{':
+        depth = 0
+        for end in range(position, length):
+            char = text[end]
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[position + 1:end], end + 1
+        return text[position + 1:], length
+
+    if opener == '"':
+        end = text.find('"', position + 1)
+        end = length if end == -1 else end
+        return text[position + 1:end], end + 1
+
+    end = position
+    while end < length and text[end] not in ',})':
+        end += 1
+    return text[position:end].strip(), end
+
+
+def _iter_ris(lines):
+    """Stream entries from RIS, one TY...ER record at a time."""
+    entry = {}
+    authors = []
+
+    for line in lines:
+        match = _RIS_LINE_RE.match(line.rstrip())
+        if not match:
+            continue
+        tag, value = match.group(1), match.group(2).strip()
+
+        if tag == 'ER':
+            if authors:
+                entry['author'] = ' and '.join(authors)
+            if entry.get('title'):
+                yield _finish_ris(entry)
+            entry, authors = {}, []
+            continue
+
+        key = RIS_TAGS.get(tag)
+        if not key or not value:
+            continue
+        if key == 'author':
+            authors.append(value)
+        elif key == 'year':
+            year = _YEAR_RE.search(value)
+            entry.setdefault('year', year.group(0) if year else value)
+        else:
+            entry.setdefault(key, value)
+
+    if entry.get('title'):
+        if authors:
+            entry['author'] = ' and '.join(authors)
+        yield _finish_ris(entry)
+
+
+def _finish_ris(entry: dict) -> dict:
+    """Combine RIS start/end pages into a single pages field."""
+    start = entry.pop('start_page', '')
+    end = entry.pop('end_page', '')
+    if start:
+        entry['pages'] = f"{start}-{end}" if end else start
+    entry['type'] = entry.get('type', '').lower()
+    return entry
+
+
+def _iter_plain(lines):
+    """Stream plain-text references, one per non-blank line."""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield {'raw': line}
+
+
+def _chain_first(first: str, lines):
+    """Yield first, then the rest of lines."""
+    yield first
+    yield from lines
+
+
+def _clean(text: str) -> str:
+    """Strip BibTeX braces and simple LaTeX commands."""
+    return _SPACE_RE.sub(' ', _LATEX_RE.sub('', text)).strip()
+
+
+def _terminate(text: str, mark: str) -> str:
+    """Append mark unless text already ends in punctuation."""
+    if not text or text[-1] in '.?!':
+        return text
+    return text + mark
+
+
+def _pages(entry: dict) -> str:
+    """Return the page range with an en dash."""
+    return re.sub(r'\s*-+\s*', '–', entry.get('pages', ''))
+
+
+def _split_authors(authors: str) -> list:
+    """Split an author list into (last, given names) tuples."""
+    names = []
+    for name in re.split(r'\s+and\s+', authors):
+        name = name.strip()
+        if not name:
+            continue
+        if name.startswith('{') and name.endswith('}'):
+            # Braced corporate author, e.g. {World Health Organization}
+            names.append((_clean(name), ''))
+            continue
+        name = _clean(name)
+        if name.lower() == 'others':
+            names.append(('et al.', ''))
+        elif ',' in name:
+            last, _, given = name.partition(',')
+            names.append((last.strip(), given.strip()))
+        else:
+            parts = name.split()
+            names.append((parts[-1], ' '.join(parts[:-1])))
+    return names
+
+
+def _initials(given: str, separator: str = '. ', trailing: str = '.') -> str:
+    """Initials of given names, e.g. 'John Ronald' -> 'J. R.'"""
+    initials = [part[0].upper() for part in re.split(r'[\s.-]+', given) if part]
+    if not initials:
+        return ''
+    return separator.join(initials) + trailing
+
+
+def _apa_authors(authors: list) -> str:
+    """APA author list: Smith, J., Doe, A., & Roe, B."""
+    names = [escape(f"{last}, {_initials(given)}" if given else last) for last, given in authors]
+    if len(names) > 20:
+        names = names[:19] + ['...', names[-1]]
+    if len(names) == 1:
+        return names[0]
+    return ', '.join(names[:-1]) + ', &amp; ' + names[-1]
+
+
+def _mla_authors(authors: list) -> str:
+    """MLA author list: Smith, John, and Jane Doe / Smith, John, et al."""
+    last, given = authors[0]
+    first = escape(f"{last}, {given}" if given else last)
+    if len(authors) == 1:
+        return first.rstrip('.')
+    if len(authors) == 2:
+        other_last, other_given = authors[1]
+        return f"{first}, and {escape(f'{other_given} {other_last}'.strip())}"
+    return f"{first}, et al"
+
+
+def _ieee_authors(authors: list) -> str:
+    """IEEE author list: J. Smith, A. Doe, and B. Roe"""
+    names = [escape(f"{_initials(given)} {last}".strip()) for last, given in authors]
+    if len(names) > 6:
+        return names[0] + ' et al.'
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]} and {names[1]}"
+    return ', '.join(names[:-1]) + ', and ' + names[-1]
+
+
+def _vancouver_authors(authors: list) -> str:
+    """Vancouver author list: Smith J, Doe A, et al."""
+    names = [escape(f"{last} {_initials(given, '', '')}".strip()) for last, given in authors]
+    if len(names) > 6:
+        return ', '.join(names[:6]) + ', et al'
+    return ', '.join(names)
+
+
+def _sort_key(entry: dict) -> tuple:
+    """Sort by first author surname, then year, then title."""
+    authors = _split_authors(entry.get('author', ''))
+    first = authors[0][0].lower() if authors else (entry.get('title') or entry.get('raw', '')).lower()
+    return (first, entry.get('year', ''), entry.get('title', '').lower())
@@ -0,0 +1,119 @@
+"""
+Model Routing
+
+Picks a model per section from latency/cost budgets and observed latency.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+
+# Model tiers per provider, fastest first
+MODEL_TIERS = {
+    'openai': ['gpt-4o-mini', 'gpt-4o'],
+    'anthropic': ['claude-3-5-haiku-20241022', 'claude-3-5-sonnet-20241022'],
+}
+
+# USD per million tokens (input, output)
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4': (30.00, 60.00),
+    'claude-3-5-haiku-20241022': (0.80, 4.00),
+    'claude-3-5-sonnet-20241022': (3.00, 15.00),
+}
+
+# Per-section budgets: p95 latency in seconds, max cost per call in USD
+SECTION_BUDGETS = {
+    'title': {'p95_latency': 4.0, 'max_cost': 0.005},
+    'question': {'p95_latency': 4.0, 'max_cost': 0.005},
+    'methodology_input': {'p95_latency': 6.0, 'max_cost': 0.01},
+    'outcomes_input': {'p95_latency': 6.0, 'max_cost': 0.01},
+    'executive_summary': {'p95_latency': 15.0, 'max_cost': 0.02},
+    'literature_review': {'p95_latency': 20.0, 'max_cost': 0.03},
+    'methodology': {'p95_latency': 20.0, 'max_cost': 0.03},
+    'objectives': {'p95_latency': 12.0, 'max_cost': 0.02},
+}
+
+# A failed call (timeout or error) counts as at least this multiple of the
+# section's p95 budget, so a model that keeps failing is downgraded
+FAILURE_PENALTY = 2.0
+
+
+class ModelRouter:
+    """Route section calls to a model tier, downgrading when budgets are exceeded."""
+
+    def __init__(
+        self,
+        budgets: dict = None,
+        window_seconds: float = 600.0,
+        min_samples: int = 5
+    ):
+        """Initialize router with section budgets and latency window."""
+        self.budgets = budgets if budgets is not None else SECTION_BUDGETS
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+
+        # (section, model) -> deque of (timestamp, latency_s)
+        self._latencies = defaultdict(lambda: deque(maxlen=200))
+
+        # One router serves every worker and speculation thread
+        self._lock = threading.Lock()
+
+    def choose(self, section: str, provider: str, model: str, prompt: str, max_tokens: int) -> str:
+        """Return the model to use for a section call."""
+        budget = self.budgets.get(section)
+        tiers = MODEL_TIERS.get(provider, [])
+        if not budget or model not in tiers:
+            return model
+
+        # Walk down from the configured model towards the fastest tier
+        for candidate in reversed(tiers[:tiers.index(model) + 1]):
+            if self.estimate_cost(candidate, prompt, max_tokens) > budget['max_cost']:
+                continue
+            p95 = self.p95_latency(section, candidate)
+            if p95 is not None and p95 > budget['p95_latency']:
+                continue
+            return candidate
+
+        return tiers[0]
+
+    def observe(self, section: str, model: str, latency_s: float, failed: bool = False) -> None:
+        """Record the latency of a call; failed calls get the failure penalty."""
+        budget = self.budgets.get(section)
+        if failed and budget:
+            latency_s = max(latency_s, budget['p95_latency'] * FAILURE_PENALTY)
+
+        with self._lock:
+            self._latencies[(section, model)].append((time.monotonic(), latency_s))
+
+    def p95_latency(self, section: str, model: str):
+        """Return p95 latency over the recent window, or None if too few samples."""
+        with self._lock:
+            samples = self._latencies.get((section, model))
+            if not samples:
+                return None
+
+            cutoff = time.monotonic() - self.window_seconds
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            latencies = [latency for _, latency in samples]
+
+        if len(latencies) < self.min_samples:
+            return None
+
+        latencies.sort()
+        index = min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))
+        return latencies[index]
+
+    @staticmethod
+    def estimate_cost(model: str, prompt: str, max_tokens: int) -> float:
+        """Estimate worst-case call cost (about 4 characters per input token)."""
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        input_tokens = len(prompt) / 4
+        return (input_tokens * input_price + max_tokens * output_price) / 1_000_000
+
+
+# Shared across generators so observed latency spans proposals in a batch
+default_router = ModelRouter()
@@ -0,0 +1,90 @@
+"""
+Speculative Sections
+
+Generates sections from raw inputs while input enhancement is still running.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.dedup import DEFAULT_THRESHOLD, minhash, normalize_text, similarity
+
+
+class Speculation:
+    """
+    Sections started on the raw inputs in background threads. Once the
+    enhanced inputs are known, a section is kept if every input it depends
+    on is at least threshold-similar to its enhanced value (MinHash over
+    normalised text, so case and punctuation fixes count as unchanged);
+    otherwise the caller generates it again.
+    """
+
+    def __init__(self, raw_inputs: dict, threshold: float = DEFAULT_THRESHOLD):
+        """Initialize for one proposal's raw inputs."""
+        self.raw_inputs = raw_inputs
+        self.threshold = threshold
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='speculation')
+        self.pending = {}
+        self.kept = []
+        self.reissued = []
+        self.saved_seconds = 0.0
+
+    def start(self, name: str, fields: tuple, compute) -> None:
+        """Run compute() in the background for a section depending on fields."""
+        def timed():
+            start = time.perf_counter()
+            value = compute()
+            return value, start, time.perf_counter()
+
+        self.pending[name] = (fields, self.executor.submit(timed))
+
+    def take(self, name: str, enhanced_inputs: dict):
+        """
+        Speculative result of a section if its inputs did not change
+        materially, else None (also if it was not started or failed).
+        """
+        if name not in self.pending:
+            return None
+        fields, future = self.pending.pop(name)
+
+        changed = [
+            field for field in fields
+            if self._similarity(self.raw_inputs.get(field), enhanced_inputs.get(field)) < self.threshold
+        ]
+        if changed:
+            self.reissued.append(name)
+            return None
+
+        waited_from = time.perf_counter()
+        try:
+            value, started, finished = future.result()
+        except Exception as e:
+            print(f"⚠️  Speculative {name} failed: {e}")
+            self.reissued.append(name)
+            return None
+
+        # A sequential run would have spent the whole call here; only the wait was paid
+        self.kept.append(name)
+        self.saved_seconds += (finished - started) - max(0.0, finished - waited_from)
+        return value
+
+    def close(self) -> None:
+        """Wait for abandoned speculative calls so their usage is complete."""
+        self.executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Sections kept and re-issued, hit rate and latency saved."""
+        decided = len(self.kept) + len(self.reissued)
+        return {
+            'kept': sorted(self.kept),
+            'reissued': sorted(self.reissued),
+            'hit_rate': round(len(self.kept) / decided, 3) if decided else 0.0,
+            'saved_seconds': round(self.saved_seconds, 3),
+        }
+
+    def _similarity(self, raw, enhanced) -> float:
+        """Similarity of a raw and an enhanced input value."""
+        raw, enhanced = normalize_text(raw), normalize_text(enhanced)
+        if raw == enhanced:
+            return 1.0
+        return similarity(minhash(raw), minhash(enhanced))
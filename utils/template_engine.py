@@ -0,0 +1,163 @@
+"""
+Offline Template Engine
+
+Precompiled section text for the non-AI path, with per-field and
+per-proposal-type variants.
+"""
+
+import re
+from functools import lru_cache
+from string import Formatter
+
+from utils.templates import get_section_guidance
+
+
+SECTION_TEMPLATES = {
+    'executive_summary': """This research proposal, titled "{title}", addresses a critical gap in current understanding by investigating: {question}
+
+The proposed study will employ {methodology} to systematically examine this research question. This approach has been selected for its robustness and applicability to the research context.
+
+The expected outcomes of this research include: {outcomes} These findings will contribute significantly to the field by providing new insights and practical applications.
+
+[closing]""",
+
+    'literature_review': """The field of {field} has seen significant developments in recent years, particularly in areas related to {topic}. Current research has established foundational understanding of key concepts and methodologies, yet several gaps remain.
+
+Existing studies have primarily focused on traditional approaches, with limited exploration of innovative methodologies and contemporary applications. This research builds upon this foundation while addressing identified limitations in current literature.
+
+Key theoretical frameworks relevant to this study include established models within {field}, which provide a solid conceptual basis for investigation. However, these frameworks require extension and adaptation to address emerging challenges and opportunities in the field.[guidance]
+
+This proposal addresses these gaps by integrating multiple perspectives and employing rigorous methodological approaches. The research will contribute to ongoing scholarly discourse while providing practical insights for practitioners and policymakers.""",
+
+    'methodology': """This research will employ {methodology} to address the research objectives systematically and rigorously.
+
+Research Design: The study follows a structured approach appropriate for {field}, ensuring methodological rigor and validity of findings. The design has been selected based on the nature of the research question and available resources.[guidance]
+
+Data Collection: Multiple data collection methods will be employed to ensure comprehensive coverage of the research topic. These methods have been selected for their reliability and appropriateness to the research context.
+
+Analysis Approach: Data will be analyzed using established analytical techniques appropriate for {field}. This includes both descriptive and inferential methods to draw meaningful conclusions from the collected data.
+
+Validity and Reliability: Several measures will be implemented to ensure the validity and reliability of findings, including triangulation of data sources, peer debriefing, and systematic documentation of research procedures.""",
+
+    'objectives_primary': "To investigate and address: {question}",
+}
+
+# Closing paragraph of the executive summary, per proposal type
+SUMMARY_CLOSINGS = {
+    'Grant Application': "This research is timely and significant, as it addresses current challenges and has the potential to deliver measurable impact for funders, practitioners and the wider community. The proposed methodology is rigorous and appropriate for addressing the research objectives, ensuring reliable and valid results.",
+    'Thesis Proposal': "This research is timely and significant, as it makes an original contribution to scholarship and has the potential to inform both theory and practice. The proposed methodology is rigorous and feasible within the scope of the thesis, ensuring reliable and valid results.",
+    'Conference Abstract': "This work is timely and relevant to current debates in the field, and its findings will be of direct interest to conference participants.",
+    'Research Project': "This research is timely and significant, as it addresses current challenges and has the potential to inform both theory and practice. The proposed methodology is rigorous and appropriate for addressing the research objectives, ensuring reliable and valid results.",
+}
+
+# Sections specialised per field with a sentence from get_section_guidance
+GUIDED_SECTIONS = ('literature_review', 'methodology')
+
+OBJECTIVE_SUB_ITEMS = [
+    "Systematically examine key variables and relationships within the research context",
+    "Collect and analyze relevant data using rigorous methodological approaches",
+    "Draw evidence-based conclusions that contribute to the field",
+    "Provide practical recommendations for practitioners and policymakers"
+]
+
+OBJECTIVE_HYPOTHESES = [
+    "The research will reveal significant patterns and relationships relevant to the research question",
+    "Findings will contribute to both theoretical understanding and practical applications"
+]
+
+# Leading imperative in get_section_guidance text, e.g. "Focus on", "Emphasize"
+_GUIDANCE_VERB_RE = re.compile(r'^\s*\w+(?:\s+on)?\s+')
+
+
+class CompiledTemplate:
+    """A template split once into literal text and field slots."""
+
+    __slots__ = ('parts', 'fields')
+
+    def __init__(self, text: str):
+        """Compile template text with {name} placeholders."""
+        parts = []
+        for literal, field, _, _ in Formatter().parse(text):
+            if literal:
+                parts.append((True, literal))
+            if field is not None:
+                parts.append((False, field))
+
+        self.parts = tuple(parts)
+        self.fields = frozenset(value for is_literal, value in parts if not is_literal)
+
+    def render(self, values: dict) -> str:
+        """Render the template by joining literals with field values."""
+        return ''.join(
+            value if is_literal else str(values.get(value, ''))
+            for is_literal, value in self.parts
+        )
+
+
+@lru_cache(maxsize=256)
+def compile_section(section: str, field: str, proposal_type: str) -> CompiledTemplate:
+    """Compile the variant of a section template for a field and proposal type."""
+    text = SECTION_TEMPLATES[section]
+
+    # Field-specific sentence derived from the section guidance
+    guidance = ''
+    if section in GUIDED_SECTIONS:
+        guidance_text = get_section_guidance(field, section)
+        focus = _GUIDANCE_VERB_RE.sub('', guidance_text).rstrip('.')
+        if focus:
+            guidance = (
+                f" In keeping with conventions in {_escape_braces(field)}, particular "
+                f"attention is given to {_escape_braces(focus[0].lower() + focus[1:])}."
+            )
+    text = text.replace('[guidance]', guidance)
+
+    closing = SUMMARY_CLOSINGS.get(proposal_type, SUMMARY_CLOSINGS['Research Project'])
+    text = text.replace('[closing]', _escape_braces(closing))
+
+    return CompiledTemplate(text)
+
+
+def render_section(section: str, field: str, proposal_type: str, **values) -> str:
+    """Render an offline section for a field and proposal type."""
+    values.setdefault('field', field)
+    return compile_section(section, field, proposal_type).render(values)
+
+
+def render_objectives(question: str, field: str, proposal_type: str) -> dict:
+    """Render offline research objectives."""
+    return {
+        'primary': render_section('objectives_primary', field, proposal_type, question=question),
+        'sub_objectives': list(OBJECTIVE_SUB_ITEMS),
+        'hypotheses': list(OBJECTIVE_HYPOTHESES)
+    }
+
+
+def render_offline_sections(inputs: dict) -> dict:
+    """Render every offline section for one set of proposal inputs."""
+    field = inputs.get('field_of_study', 'Sciences')
+    proposal_type = inputs.get('proposal_type', 'Research Project')
+    values = {
+        'title': inputs['research_title'],
+        'topic': inputs['research_title'],
+        'question': inputs['research_question'],
+        'methodology': inputs['methodology'],
+        'outcomes': inputs['expected_outcomes'],
+        'field': field,
+    }
+
+    return {
+        'executive_summary': compile_section('executive_summary', field, proposal_type).render(values),
+        'literature_review': compile_section('literature_review', field, proposal_type).render(values),
+        'methodology': compile_section('methodology', field, proposal_type).render(values),
+        'objectives': render_objectives(inputs['research_question'], field, proposal_type),
+    }
+
+
+def render_batch(records: list) -> list:
+    """Render offline sections for many proposals."""
+    return [render_offline_sections(record) for record in records]
+
+
+def _escape_braces(text: str) -> str:
+    """Escape format braces in text spliced into a template."""
+    return text.replace('{', '{{').replace('}', '}}')
@@ -171,3 +171,63 @@ def get_timeline_template(proposal_type: str) -> list:
     }
 
     return templates.get(proposal_type, templates['Research Project'])
+
+
+def get_length_policy(template: dict) -> dict:
+    """
+    Target length of each AI-written section for a template's proposal
+    type, lengthened for the sections its emphasis areas stress.
+    Returns {section: {'words': target, 'max_tokens': limit}}.
+    """
+
+    # Target words per section (objectives is a JSON object of short items)
+    lengths = {
+        'Grant Application': {
+            'executive_summary': 250, 'literature_review': 400, 'methodology': 400, 'objectives': 150
+        },
+        'Thesis Proposal': {
+            'executive_summary': 220, 'literature_review': 450, 'methodology': 400, 'objectives': 150
+        },
+        'Research Project': {
+            'executive_summary': 200, 'literature_review': 300, 'methodology': 350, 'objectives': 120
+        },
+        'Conference Abstract': {
+            'executive_summary': 100, 'literature_review': 120, 'methodology': 120, 'objectives': 80
+        }
+    }
+
+    # Emphasis areas that call for a fuller section
+    emphasis_sections = {
+        'significance': 'executive_summary',
+        'impact': 'executive_summary',
+        'originality': 'literature_review',
+        'academic_rigor': 'methodology',
+        'feasibility': 'methodology',
+        'methodology': 'methodology'
+    }
+
+    # English prose averages about 1.35 tokens per word; JSON adds punctuation
+    tokens_per_word = {'objectives': 2.0}
+
+    # Extra tokens over the target; parse_objectives drops the unfinished last
+    # item of a cut-off JSON reply, so objectives get more room than prose
+    # (which is trimmed or continued)
+    headroom = {'objectives': 1.6}
+
+    words = dict(lengths.get(template.get('proposal_type'), lengths['Research Project']))
+    emphasized = {
+        emphasis_sections[area] for area in template.get('emphasis_areas', [])
+        if area in emphasis_sections
+    }
+    for section in emphasized:
+        words[section] = round(words[section] * 1.2)
+
+    return {
+        section: {
+            'words': target,
+            'max_tokens': round(
+                target * tokens_per_word.get(section, 1.35) * headroom.get(section, 1.2)
+            ) + 20
+        }
+        for section, target in words.items()
+    }
@@ -9,15 +9,15 @@ from dateutil.relativedelta import relativedelta
 from utils.templates import get_timeline_template
 
 
-def create_timeline(duration_months: int, proposal_type: str) -> dict:
-    """Create timeline with phases and milestones."""
+def create_timeline(duration_months: int, proposal_type: str, start_date: datetime = None) -> dict:
+    """Create timeline with phases and milestones, starting now unless start_date is given."""
 
     # Get timeline template for proposal type
     phases_template = get_timeline_template(proposal_type)
 
     # Calculate phase durations
     phases = []
-    start_date = datetime.now()
+    start_date = start_date or datetime.now()
     current_date = start_date
 
     for phase_template in phases_template:
@@ -0,0 +1,126 @@
+"""
+Usage Accounting
+
+Token, cost and latency accounting for AI calls, with Prometheus export.
+"""
+
+from utils.routing import MODEL_PRICES
+
+
+# Price multipliers applied to the input price: (cache read, cache write)
+CACHE_PRICE_FACTORS = {
+    'openai': (0.5, 1.0),
+    'anthropic': (0.1, 1.25),
+}
+
+METRIC_PREFIX = 'proposal_ai'
+
+
+def call_cost(provider: str, record: dict) -> float:
+    """Return the USD cost of a single call record."""
+    input_price, output_price = MODEL_PRICES.get(record['model'], (0.0, 0.0))
+    read_factor, write_factor = CACHE_PRICE_FACTORS.get(provider, (1.0, 1.0))
+
+    uncached = record['prompt_tokens'] - record['cached_tokens'] - record['cache_write_tokens']
+    cost = (
+        uncached * input_price
+        + record['cached_tokens'] * input_price * read_factor
+        + record['cache_write_tokens'] * input_price * write_factor
+        + record['completion_tokens'] * output_price
+    )
+    return cost / 1_000_000
+
+
+def summarize_usage(records: list) -> dict:
+    """
+    Aggregate call records into totals plus per-section, per-model and per-field breakdowns.
+    Works for one proposal or a whole batch (concatenate the records).
+    """
+    summary = _empty_totals()
+    summary['by_section'] = {}
+    summary['by_model'] = {}
+    summary['by_field'] = {}
+
+    for record in records:
+        _add_record(summary, record)
+        for key, group in (('section', 'by_section'), ('model', 'by_model'), ('field', 'by_field')):
+            label = record.get(key) or 'unknown'
+            _add_record(summary[group].setdefault(label, _empty_totals()), record)
+
+    _round_totals(summary)
+    for group in ('by_section', 'by_model', 'by_field'):
+        for totals in summary[group].values():
+            _round_totals(totals)
+
+    return summary
+
+
+def render_metrics(records: list) -> str:
+    """Render call records as Prometheus text exposition format."""
+    counters = [
+        ('calls_total', 'AI calls made', lambda record: 1),
+        ('prompt_tokens_total', 'Input tokens sent, including cached', lambda record: record['prompt_tokens']),
+        ('cached_tokens_total', 'Input tokens served from the provider cache', lambda record: record['cached_tokens']),
+        ('completion_tokens_total', 'Output tokens generated', lambda record: record['completion_tokens']),
+        ('cost_usd_total', 'Estimated cost in USD', lambda record: record['cost_usd']),
+        ('latency_seconds_total', 'Total call latency in seconds', lambda record: record['latency_s']),
+        ('fallbacks_total', 'Calls that fell back to templates', lambda record: int(record['fallback'])),
+    ]
+
+    series = {}
+    for record in records:
+        labels = (
+            f'section="{_escape(record["section"])}",'
+            f'model="{_escape(record["model"])}",'
+            f'field="{_escape(record.get("field", ""))}"'
+        )
+        values = series.setdefault(labels, [0] * len(counters))
+        for index, (_, _, value) in enumerate(counters):
+            values[index] += value(record)
+
+    lines = []
+    for index, (name, help_text, _) in enumerate(counters):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for labels, values in sorted(series.items()):
+            lines.append(f"{metric}{{{labels}}} {values[index]:g}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def _empty_totals() -> dict:
+    """Return a zeroed totals dict."""
+    return {
+        'calls': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'cached_tokens': 0,
+        'cost_usd': 0.0,
+        'latency_s': 0.0,
+        'cache_hits': 0,
+        'fallbacks': 0,
+    }
+
+
+def _add_record(totals: dict, record: dict) -> None:
+    """Add one call record into a totals dict."""
+    totals['calls'] += 1
+    totals['prompt_tokens'] += record['prompt_tokens']
+    totals['completion_tokens'] += record['completion_tokens']
+    totals['cached_tokens'] += record['cached_tokens']
+    totals['cost_usd'] += record['cost_usd']
+    totals['latency_s'] += record['latency_s']
+    totals['cache_hits'] += int(record['cache_hit'])
+    totals['fallbacks'] += int(record['fallback'])
+
+
+def _round_totals(totals: dict) -> None:
+    """Round float totals for export."""
+    totals['cost_usd'] = round(totals['cost_usd'], 6)
+    totals['latency_s'] = round(totals['latency_s'], 3)
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
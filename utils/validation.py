@@ -0,0 +1,302 @@
+"""
+Input Validation
+
+Validates and normalises batches of proposal inputs, collecting every error per record.
+"""
+
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from utils.artifacts import write_json
+
+
+REQUIRED_FIELDS = ('research_title', 'research_question', 'methodology', 'expected_outcomes')
+
+TEXT_FIELDS = REQUIRED_FIELDS + (
+    'researcher_name', 'field_of_study', 'institution', 'proposal_type',
+    'references', 'ai_provider', 'citation_format'
+)
+
+# Host settings (where files are read and written, how the batch runs);
+# they come from the environment, never from batch records
+HOST_FIELDS = (
+    'dedup_index', 'dedup_threshold', 'literature_cache', 'job_store',
+    'workers', 'reference_dirs'
+)
+
+FLAG_FIELDS = ('optimize_pdf', 'deterministic', 'speculative')
+
+DURATION_RANGE = (1, 60)
+
+WORKER_RANGE = (1, 32)
+
+# Multipliers for budget shorthand such as "50k" or "1.2m"
+BUDGET_SCALES = {'': 1, 'k': 1_000, 'm': 1_000_000}
+
+# Budget currencies and how amounts in them are printed
+CURRENCY_PREFIXES = {
+    'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥',
+    'CAD': 'CA$', 'AUD': 'A$', 'CHF': 'CHF ',
+}
+
+# Currency symbols; "$" also prefixes CAD and AUD amounts ("CAD $50k")
+SYMBOL_CURRENCIES = {'$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY'}
+DOLLAR_CURRENCIES = ('USD', 'CAD', 'AUD')
+
+_TRUE_FLAGS = frozenset({'1', 'true', 'yes', 'on'})
+_FALSE_FLAGS = frozenset({'', '0', 'false', 'no', 'off'})
+
+_BUDGET_RE = re.compile(
+    r'^(?:(?P<code>[A-Z]{3})\s*)?(?P<symbol>[$€£¥])?\s*(?P<digits>\d[\d,\s]*(?:\.\d+)?)'
+    r'\s*(?P<scale>[km]?)\s*(?P<suffix>[A-Z]{3})?$',
+    re.IGNORECASE
+)
+_DURATION_RE = re.compile(r'^(\d+(?:\.0+)?)\s*(months?|mos?|years?|yrs?)?$', re.IGNORECASE)
+
+
+def parse_budget(value) -> tuple:
+    """
+    Parse a budget such as 50000, "$125,000", "USD 1.2m" or "€50k" into
+    (amount, currency code); amounts without a currency are USD.
+    Raises ValueError for anything else, including unknown or conflicting
+    currencies.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Budget must be an amount, got {value!r}")
+    if isinstance(value, (int, float)):
+        budget = (float(value), 'USD')
+    elif isinstance(value, str):
+        budget = _budget_parts(value.strip())
+    else:
+        budget = None
+
+    if budget is None:
+        raise ValueError(
+            f"Budget must be an amount such as \"$125,000\" in one of "
+            f"{', '.join(CURRENCY_PREFIXES)}, got {value!r}"
+        )
+    if budget[0] <= 0:
+        raise ValueError(f"Budget must be positive, got {value!r}")
+    return budget
+
+
+def format_budget(amount: float, currency: str = 'USD') -> str:
+    """Print an amount with its currency, e.g. "€50,000.00"."""
+    return f"{CURRENCY_PREFIXES.get(currency, currency + ' ')}{amount:,.2f}"
+
+
+@lru_cache(maxsize=4096)
+def _budget_parts(text: str):
+    """(amount, currency) for a budget string, or None if it is not one."""
+    match = _BUDGET_RE.match(text)
+    if not match:
+        return None
+
+    codes = {code.upper() for code in match.group('code', 'suffix') if code}
+    symbol = match.group('symbol')
+    if len(codes) > 1 or not codes <= CURRENCY_PREFIXES.keys():
+        return None
+    if codes:
+        currency = codes.pop()
+        dollar = symbol == '$' and currency in DOLLAR_CURRENCIES
+        if symbol and not dollar and SYMBOL_CURRENCIES[symbol] != currency:
+            return None
+    else:
+        currency = SYMBOL_CURRENCIES.get(symbol, 'USD')
+
+    digits = match.group('digits').replace(',', '').replace(' ', '')
+    return float(digits) * BUDGET_SCALES[match.group('scale').lower()], currency
+
+
+def parse_duration(value) -> int:
+    """
+    Parse a duration in months from 18, "18", "18 months" or "2 years".
+    Raises ValueError if it is not a whole number of months in DURATION_RANGE.
+    """
+    if isinstance(value, bool):
+        months = None
+    elif isinstance(value, int):
+        months = value
+    elif isinstance(value, float):
+        months = int(value) if value.is_integer() else None
+    elif isinstance(value, str):
+        months = _duration_months(value.strip())
+    else:
+        months = None
+
+    if months is None:
+        raise ValueError(f"Duration must be a whole number of months, got {value!r}")
+    low, high = DURATION_RANGE
+    if not low <= months <= high:
+        raise ValueError(f"Duration must be between {low} and {high} months, got {months}")
+    return months
+
+
+@lru_cache(maxsize=256)
+def _duration_months(text: str):
+    """Months for a duration string, or None if it is not one."""
+    match = _DURATION_RE.match(text)
+    if not match:
+        return None
+    months = int(float(match.group(1)))
+    if (match.group(2) or '').lower().startswith('y'):
+        months *= 12
+    return months
+
+
+def parse_threshold(value) -> float:
+    """Parse a similarity threshold between 0 (exclusive) and 1."""
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError):
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        raise ValueError(f"Threshold must be a number in (0, 1], got {value!r}")
+    return threshold
+
+
+def parse_workers(value) -> int:
+    """Parse a worker count within WORKER_RANGE."""
+    low, high = WORKER_RANGE
+    try:
+        workers = int(str(value).strip())
+    except ValueError:
+        workers = None
+    if workers is None or not low <= workers <= high:
+        raise ValueError(f"Workers must be a whole number from {low} to {high}, got {value!r}")
+    return workers
+
+
+def parse_positive(value, name: str) -> float:
+    """Parse a positive number such as a retention limit."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not number > 0:
+        raise ValueError(f"{name} must be a positive number, got {value!r}")
+    return number
+
+
+def parse_flag(value) -> bool:
+    """Parse a boolean flag from a bool or a string such as "yes"."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_FLAGS:
+        return True
+    if text in _FALSE_FLAGS:
+        return False
+    raise ValueError(f"Expected yes/no, got {value!r}")
+
+
+def validate_record(record: dict) -> tuple:
+    """
+    Validate one input record. Returns (normalised record, errors), where
+    each error is a dict with field, code, message and the offending value.
+    """
+    if not isinstance(record, dict):
+        return None, [_error(None, 'invalid_type', "Record must be a JSON object", record)]
+
+    normalized = dict(record)
+    errors = []
+
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            errors.append(_error(field, 'invalid_type', f"'{field}' must be text", value))
+            continue
+        normalized[field] = value.strip()
+
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            errors.append(_error(field, 'required', f"Required field '{field}' is missing", value))
+
+    for field, parser, code in (
+        ('duration_months', parse_duration, 'invalid_duration'),
+        ('dedup_threshold', parse_threshold, 'invalid_threshold'),
+        ('speculation_threshold', parse_threshold, 'invalid_threshold'),
+        ('workers', parse_workers, 'invalid_workers'),
+    ):
+        value = record.get(field)
+        if value is None or value == '':
+            continue
+        try:
+            normalized[field] = parser(value)
+        except ValueError as e:
+            errors.append(_error(field, code, str(e), value))
+
+    # The budget keeps its text, and so its currency, for rendering
+    budget = record.get('budget')
+    if budget is not None and budget != '':
+        try:
+            parse_budget(budget)
+        except ValueError as e:
+            errors.append(_error('budget', 'invalid_budget', str(e), budget))
+
+    for field in FLAG_FIELDS:
+        if field in record:
+            try:
+                normalized[field] = parse_flag(record[field])
+            except ValueError as e:
+                errors.append(_error(field, 'invalid_flag', str(e), record[field]))
+
+    return normalized, errors
+
+
+def validate_records(records: list, defaults: dict = None) -> dict:
+    """
+    Validate a batch in one pass. Defaults fill fields a record leaves out
+    or sets to null, and always supply the HOST_FIELDS.
+    Returns {'valid': [{index, record}], 'rejected': [{index, record, errors}],
+    'summary': {...}}; rejected entries keep the original record so it can be
+    fixed and resubmitted.
+    """
+    defaults = defaults or {}
+    valid = []
+    rejected = []
+    error_counts = {}
+
+    for index, record in enumerate(records):
+        # An explicit null is the same as leaving the field out
+        if isinstance(record, dict):
+            merged = {**defaults, **{
+                key: value for key, value in record.items()
+                if value is not None and key not in HOST_FIELDS
+            }}
+        else:
+            merged = record
+        normalized, errors = validate_record(merged)
+        if errors:
+            rejected.append({'index': index, 'record': record, 'errors': errors})
+            for error in errors:
+                error_counts[error['code']] = error_counts.get(error['code'], 0) + 1
+        else:
+            valid.append({'index': index, 'record': normalized})
+
+    return {
+        'valid': valid,
+        'rejected': rejected,
+        'summary': {
+            'total': len(valid) + len(rejected),
+            'valid': len(valid),
+            'rejected': len(rejected),
+            'errors_by_code': error_counts,
+        },
+    }
+
+
+def write_error_report(report: dict, path: Path) -> None:
+    """Write the summary and rejected records of a validation report as JSON."""
+    write_json(path, {'summary': report['summary'], 'rejected': report['rejected']}, indent=2)
+
+
+def _error(field, code: str, message: str, value) -> dict:
+    """Build one machine-readable error entry."""
+    if not isinstance(value, (str, int, float, bool, type(None))):
+        value = repr(value)
+    return {'field': field, 'code': code, 'message': message, 'value': value}